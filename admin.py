@@ -0,0 +1,130 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from data_loader import format_age
+from decision_tables import RULES
+from export import DOWNLOAD_MAX_PEOPLE, FORMATS, MIME_TYPES, REQUIRED_PACKAGES, available_formats, export_bytes
+from timing import stages
+
+# ===============================
+# ADMIN (เวลาแต่ละขั้น + สถานะ cache)
+# ===============================
+# อ่านจาก timing.stages ที่เก็บไว้ตลอดการทำงานของ process (ทุก session รวมกัน)
+# ชื่อขั้น: sheet_* = โหลด Google Sheet, snapshot_* = เตรียมข้อมูล, search / name_suggest = ค้นหา,
+#          section:<ชื่อส่วน> = สร้างส่วนแสดงผล (เฉพาะตอนไม่มีใน cache), tab:<ชื่อแท็บ> = แสดงแท็บทั้งแท็บ
+
+SUMMARY_COLUMNS = {
+    "count": "จำนวนครั้ง",
+    "mean_ms": "เฉลี่ย (ms)",
+    "p50_ms": "p50 (ms)",
+    "p95_ms": "p95 (ms)",
+    "max_ms": "สูงสุด (ms)",
+    "last_ms": "ล่าสุด (ms)",
+}
+
+
+def histogram_table(buckets):
+    labels = [f"≤ {edge:g} ms" if edge is not None else "> 30000 ms" for edge, _ in buckets]
+    return pd.DataFrame({"จำนวนครั้ง": [n for _, n in buckets]}, index=labels)
+
+
+def render_admin(snapshot, sheet_cache, report_cache, loader=None, sheets_client=None, password=None):
+    st.markdown("## ⏱️ ประสิทธิภาพระบบ")
+    if password and st.text_input("รหัสผ่านผู้ดูแล", type="password", key="admin_password") != password:
+        st.info("กรุณาใส่รหัสผ่านผู้ดูแลระบบ")
+        return
+
+    st.caption(f"เก็บสถิติมาแล้ว {format_age(time.time() - stages.started_at)} · ค่า p50 / p95 ประมาณจาก histogram")
+
+    # ===== สถานะข้อมูล / cache =====
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("อายุข้อมูล", format_age(sheet_cache.age()))
+    stats = report_cache.stats()
+    col2.metric("ส่วนแสดงผลใน cache", f"{stats['entries']:,} / {stats['maxsize']:,}")
+    col3.metric("cache hit", f"{stats['hit_rate'] * 100:.1f}%")
+    col4.metric("hit / miss", f"{stats['hits']:,} / {stats['misses']:,}")
+    memory = snapshot.memory_usage()
+    st.caption("หน่วยความจำของ snapshot: " + " · ".join(f"{name} {size / 1e6:,.1f} MB" for name, size in memory.items()))
+    if sheet_cache.last_error is not None:
+        st.warning(f"โหลดข้อมูลครั้งล่าสุดไม่สำเร็จ: {sheet_cache.last_error}")
+
+    # ===== โควตา Google Sheets API =====
+    if sheets_client is not None:
+        quota = sheets_client.stats()
+        st.markdown("### 📶 โควตา Google Sheets")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("เหลือในนาทีนี้", f"{quota['remaining']:,} / {quota['per_minute']:,}")
+        col2.metric("คำขอทั้งหมด", f"{quota['requests']:,}")
+        col3.metric("ลองใหม่ (429)", f"{quota['retries']:,} ({quota['rate_limited']:,})")
+        col4.metric("รอคิวรวม", f"{quota['waited_s']:,.1f} วินาที")
+        if quota["token_expires_in_s"] is not None:
+            st.caption(f"token หมดอายุในอีก {format_age(max(quota['token_expires_in_s'], 0))} · authorize แล้ว {quota['authorizations']} ครั้ง")
+
+    # ===== เวลาโหลดแต่ละแหล่ง (รอบล่าสุด) =====
+    if loader is not None and loader.last_sources:
+        st.markdown("### 📄 แหล่งข้อมูล")
+        st.caption(f"โหลดพร้อมกัน {len(loader.last_sources)} แหล่ง · รวม {loader.last_seconds:.1f} วินาที (รอบล่าสุด)")
+        st.dataframe(loader.report().rename(columns={"rows": "จำนวนแถว", "seconds": "วินาที", "summary": "ผลการ sync"}), width="stretch")
+
+    # ===== เวลาแต่ละขั้น =====
+    # ✅ ไม่มีข้อมูลเวลา (เช่น หลังกดล้างสถิติ) ยังแสดงส่วนอื่นของหน้าตามปกติ
+    summary = stages.summary()
+    if summary:
+        table = pd.DataFrame(summary).T[list(SUMMARY_COLUMNS)].rename(columns=SUMMARY_COLUMNS)
+        table = table.sort_values("p95 (ms)", ascending=False)
+        st.dataframe(table, width="stretch")
+
+        stage = st.selectbox("Histogram ของขั้น", list(table.index), key="admin_stage")
+        st.bar_chart(histogram_table(stages.histograms()[stage]), sort=False)
+    else:
+        st.info("ยังไม่มีข้อมูลเวลา")
+
+    # ===== ค่าที่อ่านเป็นตัวเลขไม่ได้ (นับตอนสร้าง snapshot) =====
+    failures = snapshot.year_data.parse_report()
+    st.markdown("### 🔢 ค่าที่อ่านเป็นตัวเลขไม่ได้")
+    if failures.empty:
+        st.caption("ทุกคอลัมน์ตัวเลขอ่านได้ครบ")
+    else:
+        st.caption("ช่องที่มีค่าแต่ไม่ใช่ตัวเลข จะแสดงเป็น \"ไม่มีข้อมูล\" ในการแปลผล")
+        st.dataframe(failures.rename(columns={"count": "จำนวนช่อง", "example": "ตัวอย่างค่า"}), width="stretch")
+
+    # ===== ตารางกฎคำแนะนำ (advice_rules.json ดู decision_tables.py) =====
+    st.markdown("### 📐 ตารางกฎคำแนะนำ")
+    st.caption(
+        f"โหลดไฟล์กฎเมื่อ {format_age(time.time() - RULES.loaded_at)}ที่แล้ว · แก้ไฟล์แล้วมีผลทันที "
+        "ผลแปลในหน้าเว็บเปลี่ยนตามเมื่อโหลดข้อมูลรอบถัดไป"
+    )
+    if RULES.last_error is not None:
+        st.warning(f"อ่านไฟล์กฎล่าสุดไม่สำเร็จ กำลังใช้กฎเดิม: {RULES.last_error}")
+    name = st.selectbox("ตาราง", list(RULES.tables), key="admin_rule_table")
+    st.dataframe(RULES.table(name).audit(), hide_index=True, width="stretch")
+
+    # ===== ส่งออกผลแปลทุกคน (1 แถวต่อคนต่อปี ดู export.py) =====
+    st.markdown("### 📤 ส่งออกผลแปลทุกคน")
+    if len(snapshot) > DOWNLOAD_MAX_PEOPLE:
+        # ✅ ไฟล์ที่ดาวน์โหลดต้องอยู่ในหน่วยความจำทั้งไฟล์ ข้อมูลใหญ่ให้เขียนลงดิสก์ด้วย CLI
+        st.info(
+            f"ข้อมูล {len(snapshot):,} คน เกิน {DOWNLOAD_MAX_PEOPLE:,} คนที่ดาวน์โหลดจากหน้านี้ได้ "
+            "ใช้คำสั่ง `python export.py health_results.xlsx` บนเครื่องเซิร์ฟเวอร์แทน"
+        )
+    else:
+        # ✅ แสดงเฉพาะรูปแบบที่ติดตั้งแพ็กเกจที่ต้องใช้แล้ว (ไม่ให้ปุ่มดาวน์โหลดล้มตอนสร้างไฟล์)
+        formats = available_formats()
+        missing = [f"{fmt} (pip install {REQUIRED_PACKAGES[fmt]})" for fmt in FORMATS if fmt not in formats]
+        if missing:
+            st.caption("ยังสร้างไม่ได้: " + ", ".join(missing))
+        fmt = st.radio("รูปแบบไฟล์", formats, horizontal=True, key="admin_export_format")
+        st.download_button(
+            f"ดาวน์โหลด (.{fmt})",
+            data=lambda: export_bytes(snapshot, fmt),  # ✅ สร้างไฟล์ตอนกดปุ่มเท่านั้น
+            file_name=f"health_results.{fmt}",
+            mime=MIME_TYPES[fmt],
+            on_click="ignore",
+            key="admin_export",
+        )
+
+    if st.button("ล้างสถิติเวลา", key="admin_reset"):
+        stages.reset()
+        st.rerun()
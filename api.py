@@ -0,0 +1,383 @@
+import argparse
+import hmac
+import http.client
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from data_loader import SnapshotCache
+from export import BASELINE_COLUMNS, LABEL_COLUMNS, NUMBER_COLUMNS
+from report import hearing_results
+from snapshot import Snapshot
+from snapshot_store import SnapshotStore, add_source_arguments, load_source, read_export
+from timing import record, stages, timed
+
+# ===============================
+# LOOKUP API (HTTP/JSON แยกจากหน้า Streamlit)
+# ===============================
+# python api.py serve --port 8600              (snapshot ล่าสุดใน snapshots/ ที่แอปบันทึกไว้)
+# python api.py serve --source export.csv --token <รหัส>
+# python api.py loadtest --rows 10000 --requests 5000 --concurrency 8
+#
+# GET /person?id=<เลขบัตร>&hn=<HN>&name=<ชื่อ-สกุล>  → {"count": n, "people": [...]}
+#     (ใส่อย่างน้อย 1 ช่อง ค้นหาแบบเดียวกับฟอร์มในแอป / ไม่พบ = 404)
+# GET /health   → จำนวนคน / ปีล่าสุด / เวลาที่บันทึก snapshot
+# GET /metrics  → เวลาแต่ละขั้น (Prometheus เหมือน timing.serve_metrics)
+#
+# - ใช้ Snapshot / LookupIndex / ผลแปลชุดเดียวกับ app.py (ไม่รันสคริปต์ Streamlit ต่อคำขอ)
+# - อ่าน snapshot จากดิสก์ที่แอปบันทึกไว้ (SnapshotStore) สร้างใหม่เบื้องหลังเมื่อไฟล์เปลี่ยน
+#   ระหว่างนั้นยังตอบจากข้อมูลเดิม (SnapshotCache) ไม่ต้องต่อ Google Sheet เอง
+# - JSON ของแต่ละคนสร้างครั้งเดียวแล้วเก็บเป็น bytes (LRU) snapshot ใหม่ → ล้างทั้งหมด
+# - ตั้ง --token แล้วทุกคำขอ (ยกเว้น /health) ต้องส่ง "Authorization: Bearer <token>"
+#   ค่าเริ่มต้นเปิดเฉพาะ localhost (ข้อมูลสุขภาพ) เปิดให้เครื่องอื่นด้วย --host 0.0.0.0 พร้อม token
+
+DEFAULT_PORT = 8600
+DEFAULT_CACHE_SIZE = 5000  # จำนวนคนที่เก็บ JSON ไว้
+RELOAD_INTERVAL = 60       # วินาที ตรวจว่า snapshot บนดิสก์เปลี่ยนหรือไม่
+
+PERSON_FIELDS = {"id": "เลขบัตรประชาชน", "hn": "HN", "name": "ชื่อ-สกุล", "sex": "เพศ"}
+# ค่ารายปี (ชื่อ metric ใน year_data) ตัวเลข = float / ผลแปลและคำแนะนำ = ข้อความ (ไม่มีข้อมูล = null)
+NUMBER_FIELDS = list(NUMBER_COLUMNS.values())
+RESULT_FIELDS = list(LABEL_COLUMNS.values()) + ["eye_advice_short"]
+
+
+def _cell(df, column, position):
+    # ✅ อ่านทีละคอลัมน์ (df.iloc[แถว] ทั้งแถวของตารางที่บีบอัดแล้วช้ากว่ามาก ~ทุกคอลัมน์ × category)
+    return df[column].iat[position] if column in df.columns else ""
+
+
+def _json_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        value = float(str(value)) if type(value) is np.float32 else float(value)
+        return None if math.isnan(value) else value
+    value = str(value).strip()
+    return None if value in ("", "-") else value
+
+
+# ===============================
+# PERSON → JSON
+# ===============================
+def person_result(snapshot, position):
+    # ผลของคนหนึ่งคน: ข้อมูลประจำตัว + ผลรายปี (เฉพาะปีที่มาตรวจ ปีล่าสุดอยู่บน)
+    year_data = snapshot.year_data
+    df = snapshot.df
+    rec = year_data.person(position)
+    hearing, _ = hearing_results(rec, {c: _cell(df, c, position) for c in BASELINE_COLUMNS})
+    examined = year_data.examined([position])[0]
+
+    years = []
+    for i in reversed(np.flatnonzero(examined).tolist()):
+        y = year_data.years[i]
+        entry = {"year": int(y)}
+        for metric in NUMBER_FIELDS:
+            entry[metric] = _json_value(rec.number(metric, y))
+        for metric in RESULT_FIELDS:
+            entry[metric] = _json_value(rec.get(metric, y))
+        entry["hearing"] = hearing[y]
+        years.append(entry)
+
+    result = {key: _json_value(_cell(df, column, position)) for key, column in PERSON_FIELDS.items()}
+    result["latest_year"] = int(year_data.latest_year)
+    result["years"] = years
+    return result
+
+
+class LookupService:
+    def __init__(self, get_snapshot, cache_size=DEFAULT_CACHE_SIZE, warm=False):
+        self._get_snapshot = get_snapshot
+        self.cache_size = cache_size
+        self.warm = warm  # สร้าง JSON ล่วงหน้าเบื้องหลัง (ไม่เกิน cache_size คน) ทุกครั้งที่ได้ snapshot ใหม่
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._encoded = OrderedDict()  # ตำแหน่งแถว → JSON (bytes) ของ snapshot ปัจจุบัน
+
+    def snapshot(self):
+        snapshot = self._get_snapshot()
+        with self._lock:
+            if snapshot is self._snapshot:
+                return snapshot
+            # ✅ ข้อมูลชุดใหม่ → ตำแหน่งแถวเดิมใช้ไม่ได้แล้ว
+            self._snapshot = snapshot
+            self._encoded.clear()
+        if self.warm and self.cache_size:
+            threading.Thread(target=self.prefill, args=(snapshot,), name="lookup-api-warm", daemon=True).start()
+        return snapshot
+
+    def prefill(self, snapshot):
+        # คำขอแรกของแต่ละคนไม่ต้องสร้าง JSON เอง (หยุดเมื่อ cache เต็มหรือมี snapshot ใหม่)
+        for position in range(min(len(snapshot), self.cache_size)):
+            if snapshot is not self._snapshot:
+                return
+            self._person_json(snapshot, position)
+            time.sleep(0)  # ✅ ปล่อย GIL ให้ thread ที่ตอบคำขออยู่
+
+    def _person_json(self, snapshot, position):
+        with self._lock:
+            body = self._encoded.get(position) if snapshot is self._snapshot else None
+            if body is not None:
+                self._encoded.move_to_end(position)
+                return body
+        body = json.dumps(person_result(snapshot, position), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            if snapshot is self._snapshot and self.cache_size:
+                self._encoded[position] = body
+                while len(self._encoded) > self.cache_size:
+                    self._encoded.popitem(last=False)
+        return body
+
+    def lookup(self, id_card="", hn="", name=""):
+        # → (จำนวนคนที่พบ, JSON bytes ของคำตอบ)
+        snapshot = self.snapshot()
+        positions = snapshot.index.find(id_card, hn, name)
+        people = b",".join(self._person_json(snapshot, p) for p in positions)
+        return len(positions), b'{"count":%d,"people":[%s]}' % (len(positions), people)
+
+
+class StoreReloader:
+    # loader ของ SnapshotCache: สร้าง Snapshot ใหม่เฉพาะเมื่อแอปบันทึก snapshot บนดิสก์ใหม่แล้ว
+    def __init__(self, store):
+        self.store = store
+        self.saved_at = None
+        self._snapshot = None
+
+    def __call__(self):
+        saved_at = self.store.saved_at()
+        if saved_at is None:
+            raise FileNotFoundError(f"ไม่พบ snapshot ที่ {self.store.path}")
+        if self._snapshot is None or saved_at != self.saved_at:
+            with timed("snapshot_load"):
+                df = self.store.load()
+            with timed("snapshot_build", rows=len(df)):
+                self._snapshot = Snapshot(df)
+            self.saved_at = saved_at
+        return self._snapshot
+
+
+# ===============================
+# HTTP SERVER
+# ===============================
+class _ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # ✅ keep-alive: ไม่ต้องเปิด TCP ใหม่ทุกคำขอ
+    disable_nagle_algorithm = True  # ✅ ส่งหัว + เนื้อหาทันที ไม่รอ ACK (~40 ms ต่อคำขอบน keep-alive)
+    service = None
+    token = None
+    status = None  # callable → dict สำหรับ /health
+
+    def _send(self, code, body, content_type="application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, message):
+        self._send(code, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"))
+
+    def _authorized(self):
+        if not self.token:
+            return True
+        given = self.headers.get("Authorization", "")
+        return hmac.compare_digest(given.encode("utf-8"), f"Bearer {self.token}".encode("utf-8"))
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send(200, json.dumps(self.status(), ensure_ascii=False).encode("utf-8"))
+            return
+        if not self._authorized():
+            self._error(401, "ต้องส่ง Authorization: Bearer <token>")
+            return
+        if url.path == "/metrics":
+            self._send(200, stages.prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            return
+        if url.path != "/person":
+            self._error(404, "ไม่พบ endpoint นี้ (ใช้ /person, /health, /metrics)")
+            return
+
+        query = {k: v[0].strip() for k, v in parse_qs(url.query).items()}
+        id_card, hn, name = query.get("id", ""), query.get("hn", ""), query.get("name", "")
+        if not (id_card or hn or name):
+            self._error(400, "ระบุ id, hn หรือ name อย่างน้อย 1 ช่อง")
+            return
+        try:
+            count, body = self.service.lookup(id_card, hn, name)
+        except Exception as e:
+            self._error(503, f"ยังไม่มีข้อมูลให้ค้นหา: {e}")
+            return
+        self._send(200 if count else 404, body)
+        record("api_person", time.perf_counter() - start, found=count)
+
+    def log_message(self, format, *args):
+        pass  # ไม่พิมพ์ทุกคำขอ (เวลาดูที่ /metrics)
+
+
+def serve_api(service, port=DEFAULT_PORT, host="127.0.0.1", token=None, status=None):
+    # เปิดใน thread เบื้องหลัง → คืน server (server.server_address[1] = port จริง เมื่อส่ง port=0)
+    snapshot_status = status or (lambda: {"people": len(service.snapshot())})
+    handler = type("ApiHandler", (_ApiHandler,), {"service": service, "token": token, "status": staticmethod(snapshot_status)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="lookup-api", daemon=True)
+    thread.start()
+    return server
+
+
+# ===============================
+# LOAD TEST
+# ===============================
+def load_test(host, port, queries, requests_total, concurrency, token=None):
+    # ยิงคำขอพร้อมกัน concurrency การเชื่อมต่อ (keep-alive) → เวลาต่อคำขอ (วินาที) + จำนวนที่ผิดพลาด
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    per_worker = [requests_total // concurrency + (i < requests_total % concurrency) for i in range(concurrency)]
+
+    def worker(n, seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        times, failed = [], 0
+        for _ in range(n):
+            path = rng.choice(queries)
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            times.append(time.perf_counter() - start)
+            failed += response.status != 200
+        conn.close()
+        with lock:
+            latencies.extend(times)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(n, i)) for i, n in enumerate(per_worker)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def person_queries(snapshot, sample, seed=0):
+    # path ของคำขอจากคนในข้อมูลจริง (สลับค้นด้วยเลขบัตร / HN)
+    from urllib.parse import quote
+    rng = random.Random(seed)
+    positions = rng.sample(range(len(snapshot)), min(sample, len(snapshot)))
+    queries = []
+    for i, p in enumerate(positions):
+        key, column = ("id", "เลขบัตรประชาชน") if i % 2 == 0 else ("hn", "HN")
+        value = str(_cell(snapshot.df, column, p)).strip()
+        if value:
+            queries.append(f"/person?{key}={quote(value)}")
+    return queries
+
+
+def load_snapshot(args):
+    if args.rows:
+        from sheet_sync import SheetSync
+        from synthetic_sheet import FakeWorksheet, SyntheticSheet
+        return Snapshot(SheetSync().sync(FakeWorksheet(SyntheticSheet(args.rows))).df)
+    df = load_source(args.source, args.dir)
+    return None if df is None else Snapshot(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API ค้นหาผลตรวจสุขภาพรายบุคคล (HTTP/JSON)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="เปิด API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--token", default=os.environ.get("HEALTH_API_TOKEN"), help="ค่าเริ่มต้นจาก HEALTH_API_TOKEN")
+    serve.add_argument("--reload", type=int, default=RELOAD_INTERVAL, help="วินาที ตรวจ snapshot บนดิสก์ใหม่")
+
+    test = sub.add_parser("loadtest", help="วัดเวลาตอบสนองของ API ในเครื่อง")
+    test.add_argument("--url", help="API ที่เปิดอยู่แล้ว เช่น http://127.0.0.1:8600 (ไม่ใส่ = เปิดในตัว)")
+    test.add_argument("--token", default=os.environ.get("HEALTH_API_TOKEN"))
+    test.add_argument("--requests", type=int, default=5000)
+    test.add_argument("--concurrency", type=int, default=8)
+    test.add_argument("--people", type=int, default=1000, help="จำนวนคนที่สุ่มมาค้นหา")
+    test.add_argument("--rows", type=int, help="ใช้ชีตปลอมจำนวนคนเท่านี้")
+
+    for p in (serve, test):
+        add_source_arguments(p)
+        p.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="จำนวนคนที่เก็บ JSON ไว้ (0 = ไม่เก็บ)")
+        p.add_argument("--warm", action="store_true", help="สร้าง JSON ล่วงหน้าเบื้องหลัง (ประมาณ 13 KB ต่อคน)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if args.source:
+            snapshot = Snapshot(read_export(args.source))
+            service = LookupService(lambda: snapshot, args.cache_size, args.warm)
+            status = lambda: {"people": len(snapshot), "latest_year": int(snapshot.year_data.latest_year)}
+        else:
+            store = SnapshotStore(args.dir)
+            reloader = StoreReloader(store)
+            cache = SnapshotCache(reloader, ttl=args.reload)
+            service = LookupService(cache.get, args.cache_size, args.warm)
+
+            def status():
+                snapshot = cache.get()
+                return {
+                    "people": len(snapshot),
+                    "latest_year": int(snapshot.year_data.latest_year),
+                    "saved_at": reloader.saved_at,
+                    "reload_error": None if cache.last_error is None else str(cache.last_error),
+                }
+        start = time.perf_counter()
+        service.snapshot()  # ✅ เตรียมข้อมูลให้เสร็จก่อนรับคำขอแรก
+        print(f"📦 เตรียมข้อมูล {len(service.snapshot()):,} คน · {time.perf_counter() - start:.1f} วินาที"
+              + (" · กำลังสร้าง JSON ล่วงหน้าเบื้องหลัง" if args.warm else ""))
+        server = serve_api(service, args.port, args.host, args.token, status)
+        print(f"✅ http://{args.host}:{server.server_address[1]}/person?id=... (Ctrl+C เพื่อหยุด)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    snapshot = load_snapshot(args)
+    if snapshot is None:
+        print("❌ ไม่พบข้อมูล (ระบุ --source, --rows หรือสร้าง snapshot ก่อน)")
+        return 1
+    queries = person_queries(snapshot, args.people)
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        service = LookupService(lambda: snapshot, args.cache_size)
+        if args.warm:
+            service.snapshot()
+            service.prefill(snapshot)  # วัดหลังสร้าง JSON ครบแล้ว
+        server = serve_api(service, port=0, token=args.token)
+        host, port = server.server_address[:2]
+    print(f"▶️ {args.requests:,} คำขอ · {args.concurrency} การเชื่อมต่อ · สุ่มจาก {len(queries):,} คน → {host}:{port}", flush=True)
+
+    stages.reset()
+    latencies, errors, elapsed = load_test(host, port, queries, args.requests, args.concurrency, args.token)
+    ms = np.asarray(latencies) * 1000
+    print(f"  ต่อคำขอ (ฝั่งผู้เรียก)  p50 {np.percentile(ms, 50):.2f} · p95 {np.percentile(ms, 95):.2f} · "
+          f"p99 {np.percentile(ms, 99):.2f} · สูงสุด {ms.max():.2f} ms")
+    print(f"  {len(ms) / elapsed:,.0f} คำขอ/วินาที · ผิดพลาด {errors:,} ครั้ง")
+    server_side = stages.summary().get("api_person")
+    if server_side:
+        print(f"  ฝั่ง API (api_person)  p50 ≤ {server_side['p50_ms']:g} · p95 ≤ {server_side['p95_ms']:g} · "
+              f"สูงสุด {server_side['max_ms']:.2f} ms")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,23 @@
-import numpy as np
 import streamlit as st
-import pandas as pd
-import gspread
 import json
-import matplotlib.pyplot as plt
+import logging
 from oauth2client.service_account import ServiceAccountCredentials
+from admin import render_admin
+from decision_tables import RULES
+from batch_lookup import render_batch_lookup
+from dashboard import render_dashboard
+from hearing_screen import render_hearing_screen
+from lung_screen import render_lung_screen
+from data_loader import SnapshotCache, format_age
+from report import SECTION_TABS
+from report_cache import ReportCache
+from sheet_sources import MultiSheetLoader, parse_sources
+from sheets_client import SCOPE, RequestScheduler, SheetsClient, is_rate_limited
+from snapshot import Snapshot
+from snapshot_store import SnapshotStore
+from timing import log_to_file, serve_metrics, timed
+
+logger = logging.getLogger("health_report.app")
 
 st.set_page_config(page_title="ระบบรายงานสุขภาพ", layout="wide")
 st.markdown("""
@@ -20,157 +33,117 @@ st.markdown("""
 # ===============================
 # CONNECT GOOGLE SHEET (ปลอดภัยแม้เปลี่ยน sheet แรก)
 # ===============================
-try:
+sheet_url = "https://docs.google.com/spreadsheets/d/1N3l0o_Y6QYbGKx22323mNLPym77N0jkJfyxXFM2BDmc"
+SHEET_CACHE_TTL = int(st.secrets.get("SHEET_CACHE_TTL", 300))  # วินาที
+REPORT_CACHE_SIZE = int(st.secrets.get("REPORT_CACHE_SIZE", 2000))  # จำนวนส่วน (ประมาณ 15 ส่วนต่อคน)
+SNAPSHOT_DIR = st.secrets.get("SNAPSHOT_DIR", "snapshots")
+TIMING_LOG = st.secrets.get("TIMING_LOG")  # ไฟล์ log เวลาแต่ละขั้น (JSON บรรทัดละ 1 ครั้ง)
+METRICS_PORT = st.secrets.get("METRICS_PORT")  # เปิด http://localhost:<port>/metrics
+ADMIN_PASSWORD = st.secrets.get("ADMIN_PASSWORD")  # รหัสผ่านหน้าประสิทธิภาพระบบ (ไม่ตั้ง = ไม่ต้องใส่)
+SHEET_SOURCES = st.secrets.get("SHEET_SOURCES")  # หลายแผ่น / หลายไฟล์ (ดู sheet_sources.py) ไม่ตั้ง = แผ่นแรกของ sheet_url
+SHEETS_REQUESTS_PER_MINUTE = int(st.secrets.get("SHEETS_REQUESTS_PER_MINUTE", 60))  # โควตาอ่าน Sheets API ต่อนาที
+
+def load_sheet(sheets_client, loader, store, previous=None):
+    # ✅ client เดียวทั้ง process (authorize ใหม่เฉพาะตอน token ใกล้หมดอายุ) ทุกคำขอผ่านคิวโควตา
+    with timed("sheet_open"):
+        client = sheets_client.get()
+
+    # ✅ ดึงทุกแหล่งพร้อมกัน แล้วรวมเป็น 1 แถวต่อคน (แต่ละแผ่น parse ใหม่เฉพาะแถวที่เพิ่ม/แก้ไข/ลบ)
+    df = loader.load(client)
+
+    # ✅ ไม่มีแหล่งไหนเปลี่ยน และกฎคำแนะนำยังเป็นรุ่นเดิม → ใช้ snapshot เดิม (ไม่บันทึก / แปลผล / สร้าง index ใหม่)
+    if previous is not None and not loader.last_changed and previous.year_data.rules_version == RULES.current_version():
+        return previous
+
+    # ✅ บันทึก snapshot ลงดิสก์ไว้ใช้ตอนเปิดแอปครั้งถัดไป หรือตอน Google Sheet ใช้ไม่ได้
+    try:
+        with timed("snapshot_save"):
+            store.save(df)
+    except Exception as e:
+        logger.warning("บันทึก snapshot ไม่สำเร็จ: %s", e)
+
+    # ✅ สร้าง index ค้นหาใน thread ที่โหลดข้อมูลเลย ผู้ใช้ไม่ต้องรอ
+    with timed("snapshot_build", rows=len(df)):
+        return Snapshot(df)
+
+# ✅ client ของ Google Sheets + คิวคำขอตามโควตา ใช้ร่วมกันทุก session
+@st.cache_resource
+def get_sheets_client():
     service_account_info = json.loads(st.secrets["GCP_SERVICE_ACCOUNT"])
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, scope)
-    client = gspread.authorize(creds)
-
-    sheet_url = "https://docs.google.com/spreadsheets/d/1N3l0o_Y6QYbGKx22323mNLPym77N0jkJfyxXFM2BDmc"
-    worksheet = client.open_by_url(sheet_url).sheet1  # ✅ sheet แรกเสมอ
-
-    raw_data = worksheet.get_all_records()  # ✅ พยายามอ่านข้อมูล
-    if not raw_data:
-        st.error("❌ ไม่พบข้อมูลในแผ่นแรกของ Google Sheet")
-        st.stop()
-
-    df = pd.DataFrame(raw_data)
+    return SheetsClient(
+        lambda: ServiceAccountCredentials.from_json_keyfile_dict(service_account_info, SCOPE),
+        RequestScheduler(per_minute=SHEETS_REQUESTS_PER_MINUTE),
+    )
+
+# ✅ ตัวโหลดทุกแหล่ง (เก็บสถานะ delta sync ของแต่ละแผ่น + เวลาที่ใช้รอบล่าสุด)
+@st.cache_resource
+def get_sheet_loader():
+    return MultiSheetLoader(parse_sources(SHEET_SOURCES, sheet_url))
+
+# ✅ ใช้ snapshot เดียวร่วมกันทั้ง process ไม่โหลดใหม่ทุกครั้งที่กดปุ่ม
+@st.cache_resource
+def get_sheet_cache():
+    sheets_client = get_sheets_client()
+    loader = get_sheet_loader()
+    store = SnapshotStore(SNAPSHOT_DIR)
+    cache = SnapshotCache(lambda: load_sheet(sheets_client, loader, store, cache.data), ttl=SHEET_CACHE_TTL)
+
+    # ✅ มี snapshot บนดิสก์ → แสดงผลได้ทันที แล้วค่อยดึงข้อมูลล่าสุดจาก Google Sheet เบื้องหลัง
+    try:
+        with timed("snapshot_load"):
+            saved_df = store.load()
+            if saved_df is not None and not saved_df.empty:
+                cache.seed(Snapshot(saved_df), store.saved_at())
+    except Exception as e:
+        logger.warning("อ่าน snapshot ไม่สำเร็จ: %s", e)
+    return cache
+
+# ✅ ผลแสดงผลรายส่วนที่สร้างแล้ว ใช้ร่วมกันทุก session (จำกัดจำนวนแบบ LRU)
+@st.cache_resource
+def get_report_cache():
+    return ReportCache(maxsize=REPORT_CACHE_SIZE)
+
+# ✅ log / metrics endpoint ของเวลาแต่ละขั้น เปิดครั้งเดียวต่อ process (ตั้งค่าใน secrets)
+@st.cache_resource
+def start_timing_outputs():
+    if TIMING_LOG:
+        log_to_file(TIMING_LOG)
+    if METRICS_PORT:
+        try:
+            return serve_metrics(int(METRICS_PORT))
+        except OSError as e:
+            logger.warning("เปิด metrics endpoint ไม่สำเร็จ: %s", e)
 
-    # ✅ ทำความสะอาดชื่อคอลัมน์และข้อมูลสำคัญ
-    df.columns = df.columns.str.strip()
-    df['เลขบัตรประชาชน'] = df['เลขบัตรประชาชน'].astype(str).str.strip()
-    df['HN'] = df['HN'].astype(str).str.strip()
-    df['ชื่อ-สกุล'] = df['ชื่อ-สกุล'].astype(str).str.strip()
+start_timing_outputs()
 
+try:
+    sheet_cache = get_sheet_cache()
+    snapshot = sheet_cache.get()
+    df = snapshot.df
 except Exception as e:
-    st.error(f"เกิดข้อผิดพลาดในการโหลด Google Sheet: {e}")
+    if is_rate_limited(e):
+        st.error("Google Sheet มีผู้ใช้งานเกินโควตาชั่วคราว กรุณาลองใหม่อีกครั้งในอีกสักครู่")
+    else:
+        st.error(f"เกิดข้อผิดพลาดในการโหลด Google Sheet: {e}")
     st.stop()
-    
-# ===============================
-# YEAR MAPPING
-# ===============================
-years = list(range(61, 69))
-columns_by_year = {
-    year: {
-        "weight": f"น้ำหนัก{year}" if year != 68 else "น้ำหนัก",
-        "height": f"ส่วนสูง{year}" if year != 68 else "ส่วนสูง",
-        "waist": f"รอบเอว{year}" if year != 68 else "รอบเอว",
-        "sbp": f"SBP{year}" if year != 68 else "SBP",
-        "dbp": f"DBP{year}" if year != 68 else "DBP",
-        "pulse": f"pulse{year}" if year != 68 else "pulse",
-        "bmi_value": f"BMI{year}" if year != 68 else "ดัชนีมวลกาย",
-    }
-    for year in years
-}
 
 # ===============================
 # FUNCTIONS
 # ===============================
-def interpret_bmi(bmi):
-    if bmi is None or bmi == "":
-        return "-"
-    try:
-        bmi = float(bmi)
-        if bmi > 30:
-            return "อ้วนมาก"
-        elif bmi >= 25:
-            return "อ้วน"
-        elif bmi >= 23:
-            return "น้ำหนักเกิน"
-        elif bmi >= 18.5:
-            return "ปกติ"
+# กฎแปลผลอยู่ใน interpret.py / interpret_engine.py (คำนวณทุกคนทุกปีครั้งเดียวตอนโหลด snapshot)
+# ส่วนแสดงผลรายบุคคลอยู่ใน report.py
+def show_blocks(blocks):
+    for kind, content in blocks:
+        if kind == "heading":
+            st.markdown(content)
+        elif kind == "success":
+            st.success(content)
+        elif kind == "info":
+            st.info(content)
+        elif kind == "image":
+            st.image(content, width="stretch")
         else:
-            return "ผอม"
-    except:
-        return "-"
-
-def interpret_waist(waist, height):
-    try:
-        waist = float(waist)
-        height = float(height)
-        return "เกินเกณฑ์" if waist > height else "ปกติ"
-    except:
-        return "-"
-
-def interpret_bp(sbp, dbp):
-    try:
-        sbp = float(sbp)
-        dbp = float(dbp)
-        if sbp == 0 or dbp == 0:
-            return "-"
-        if sbp >= 160 or dbp >= 100:
-            return "ความดันสูง"
-        elif sbp >= 140 or dbp >= 90:
-            return "ความดันสูงเล็กน้อย"
-        elif sbp < 120 and dbp < 80:
-            return "ความดันปกติ"
-        else:
-            return "ความดันค่อนข้างสูง"
-    except:
-        return "-"
-
-# 🩸 ข้อความคำแนะนำ CBC แบบกระชับ
-cbc_messages = {
-    2:  "ดูแลสุขภาพ ออกกำลังกาย ทานอาหารมีประโยชน์ ติดตามผลเลือดสม่ำเสมอ",
-    4:  "ควรพบแพทย์เพื่อตรวจหาสาเหตุเกล็ดเลือดต่ำ และเฝ้าระวังอาการผิดปกติ",
-    6:  "ควรตรวจซ้ำเพื่อติดตามเม็ดเลือดขาว และดูแลสุขภาพร่างกายให้แข็งแรง",
-    8:  "ควรพบแพทย์เพื่อตรวจหาสาเหตุภาวะโลหิตจาง และรักษาตามนัด",
-    9:  "ควรพบแพทย์เพื่อตรวจหาและติดตามภาวะโลหิตจางร่วมกับเม็ดเลือดขาวผิดปกติ",
-    10: "ควรพบแพทย์เพื่อตรวจหาสาเหตุเกล็ดเลือดสูง และพิจารณาการรักษา",
-    13: "ควรดูแลสุขภาพ ติดตามภาวะโลหิตจางและเม็ดเลือดขาวผิดปกติอย่างใกล้ชิด",
-}
-
-# 🩸 ฟังก์ชันให้คำแนะนำ CBC (ตามสูตร Excel)
-def cbc_advice(hb_result, wbc_result, plt_result):
-    if all(x in ["", "-", None] for x in [hb_result, wbc_result, plt_result]):
-        return "-"
-
-    hb = hb_result.strip()
-    wbc = wbc_result.strip()
-    plt = plt_result.strip()
-
-    # ✅ Plt ต่ำต้องตรวจสอบก่อน เพราะสูตร Excel ให้ความสำคัญเป็นพิเศษ
-    if plt in ["ต่ำกว่าเกณฑ์", "ต่ำกว่าเกณฑ์เล็กน้อย"]:
-        return cbc_messages[4]
-
-    if hb == "ปกติ" and wbc == "ปกติ" and plt == "ปกติ":
-        return ""
-
-    if hb == "พบภาวะโลหิตจาง" and wbc == "ปกติ" and plt == "ปกติ":
-        return cbc_messages[8]
-
-    if hb == "พบภาวะโลหิตจาง" and wbc in [
-        "ต่ำกว่าเกณฑ์", 
-        "ต่ำกว่าเกณฑ์เล็กน้อย", 
-        "สูงกว่าเกณฑ์เล็กน้อย", 
-        "สูงกว่าเกณฑ์"
-    ]:
-        return cbc_messages[9]
-
-    if hb == "พบภาวะโลหิตจางเล็กน้อย" and wbc == "ปกติ" and plt == "ปกติ":
-        return cbc_messages[2]
-
-    if hb == "ปกติ" and wbc in [
-        "ต่ำกว่าเกณฑ์", 
-        "ต่ำกว่าเกณฑ์เล็กน้อย", 
-        "สูงกว่าเกณฑ์เล็กน้อย", 
-        "สูงกว่าเกณฑ์"
-    ]:
-        return cbc_messages[6]
-
-    if plt == "สูงกว่าเกณฑ์":
-        return cbc_messages[10]
-
-    if hb == "พบภาวะโลหิตจางเล็กน้อย" and \
-       wbc in [
-           "ต่ำกว่าเกณฑ์", 
-           "ต่ำกว่าเกณฑ์เล็กน้อย", 
-           "สูงกว่าเกณฑ์เล็กน้อย", 
-           "สูงกว่าเกณฑ์"
-       ] and plt == "ปกติ":
-        return cbc_messages[13]
-
-    return "ควรพบแพทย์เพื่อตรวจเพิ่มเติม"
+            st.markdown(content, unsafe_allow_html=True)
 
 # ===============================
 # UI SEARCH
@@ -178,6 +151,36 @@ def cbc_advice(hb_result, wbc_result, plt_result):
 st.markdown("<h1 style='text-align:center;'>ระบบรายงานผลตรวจสุขภาพ</h1>", unsafe_allow_html=True)
 st.markdown("<h4 style='text-align:center; color:gray;'>- กลุ่มงานอาชีวเวชกรรม รพ.สันทราย -</h4>", unsafe_allow_html=True)
 
+# ✅ แจ้งอายุข้อมูล (ข้อมูลอาจเก่ากว่า TTL ได้ระหว่างที่กำลังโหลดใหม่เบื้องหลัง)
+data_status = f"🕒 ข้อมูลล่าสุดเมื่อ {format_age(sheet_cache.age())}ที่แล้ว"
+if sheet_cache.refreshing:
+    data_status += " · กำลังอัปเดตข้อมูลเบื้องหลัง..."
+st.caption(data_status)
+if sheet_cache.last_error is not None:
+    st.warning(f"⚠️ อัปเดตข้อมูลจาก Google Sheet ไม่สำเร็จ กำลังแสดงข้อมูลเดิม: {sheet_cache.last_error}")
+
+# ✅ หน้าภาพรวม: ใช้ตารางนับที่เตรียมไว้ใน snapshot (ไม่ต้องค้นหารายคน)
+page = st.sidebar.radio("เมนู", ["🔎 ผลตรวจรายบุคคล", "📋 ค้นหาหลายคน", "📊 ภาพรวมสุขภาพ", "👂 คัดกรองการได้ยิน", "🫁 สมรรถภาพปอดทั้งหน่วยงาน", "⏱️ ประสิทธิภาพระบบ"], key="page")
+if page == "📋 ค้นหาหลายคน":
+    # ✅ วางรายการเลขบัตร / HN → ตารางผลปีล่าสุดของทุกคน (ดู batch_lookup.py)
+    render_batch_lookup(snapshot)
+    st.stop()
+if page == "📊 ภาพรวมสุขภาพ":
+    with timed("dashboard"):
+        render_dashboard(snapshot)
+    st.stop()
+if page == "👂 คัดกรองการได้ยิน":
+    # ✅ คัดกรองทุกคนทุกปีในรอบเดียว → รายชื่อที่ควรตรวจซ้ำ (ดู hearing_screen.py)
+    render_hearing_screen(snapshot)
+    st.stop()
+if page == "🫁 สมรรถภาพปอดทั้งหน่วยงาน":
+    # ✅ จัดกลุ่มทุกคนทุกปีในรอบเดียว → จำนวนแต่ละรูปแบบต่อปี / รายชื่อที่ผลแย่ลง (ดู lung_screen.py)
+    render_lung_screen(snapshot)
+    st.stop()
+if page == "⏱️ ประสิทธิภาพระบบ":
+    render_admin(snapshot, sheet_cache, get_report_cache(), get_sheet_loader(), get_sheets_client(), ADMIN_PASSWORD)
+    st.stop()
+
 with st.form("search_form"):
     col1, col2, col3 = st.columns(3)
     id_card = col1.text_input("เลขบัตรประชาชน")
@@ -185,1261 +188,97 @@ with st.form("search_form"):
     full_name = col3.text_input("ชื่อ-สกุล")
     submitted = st.form_submit_button("ค้นหา")  # ✅ สร้างตัวแปรตรงนี้เท่านั้น!
 
+# ✅ ค้นหาด่วนจากชื่อบางส่วน (พิมพ์แล้วกด Enter จะขึ้นรายชื่อที่ใกล้เคียงให้เลือก)
+def select_suggestion():
+    position = st.session_state.get("name_suggestion")
+    if position is not None:
+        st.session_state["matches"] = snapshot.rows([position])
+        st.session_state["matches_fuzzy"] = False
+        st.session_state["person"] = st.session_state["matches"][0]
+
+name_query = st.text_input("🔎 ค้นหาด่วนจากชื่อบางส่วน", key="name_query", placeholder="เช่น สมชาย, ใจดี หรือสะกดใกล้เคียง")
+if name_query.strip():
+    with timed("name_suggest"):
+        suggestions = snapshot.suggest_names(name_query)
+    if suggestions:
+        suggestion_names = dict(suggestions)
+        st.selectbox(
+            "รายชื่อที่ใกล้เคียง",
+            list(suggestion_names),
+            index=None,
+            format_func=lambda p: f"{suggestion_names[p]} · HN {snapshot.cell(p, 'HN', '-')}",
+            placeholder=f"พบ {len(suggestions)} รายชื่อ เลือกเพื่อดูผลตรวจ",
+            key="name_suggestion",
+            on_change=select_suggestion,
+        )
+    else:
+        st.caption("ไม่พบรายชื่อที่ใกล้เคียง")
+
 # ✅ หลังจาก form เสร็จแล้ว ถึงใช้ได้
 if submitted:
-    query = df.copy()
-    if id_card.strip():
-        query = query[query["เลขบัตรประชาชน"] == id_card.strip()]
-    if hn.strip():
-        query = query[query["HN"] == hn.strip()]
-    if full_name.strip():
-        query = query[query["ชื่อ-สกุล"].str.strip() == full_name.strip()]
-
-    if query.empty:
+    # ✅ ค้นหาผ่าน index (O(1)) ไม่ต้อง copy / สแกนทั้งตาราง
+    with timed("search"):
+        matches = snapshot.find(id_card, hn, full_name)
+
+    # ✅ กรอกแค่ชื่อแต่ไม่ตรงทั้งหมด → เสนอรายชื่อที่ใกล้เคียงให้เลือก
+    fuzzy = False
+    if not matches and full_name.strip() and not id_card.strip() and not hn.strip():
+        matches = snapshot.rows([p for p, _ in snapshot.suggest_names(full_name)])
+        fuzzy = bool(matches)
+    st.session_state["matches_fuzzy"] = fuzzy
+
+    if not matches:
         st.error("❌ ไม่พบข้อมูล กรุณาตรวจสอบอีกครั้ง")
+        st.session_state.pop("matches", None)
         if "person" in st.session_state:
             del st.session_state["person"]  # 👈 ล้างข้อมูลเก่าทันที
 
     else:
-        st.session_state["person"] = query.iloc[0]
+        st.session_state["matches"] = matches
+        st.session_state["person"] = matches[0]
+
+# ✅ เลขบัตร/HN ซ้ำหลายแถว → ให้เลือกเอง ไม่หยิบแถวแรกแบบเงียบ ๆ
+matches = st.session_state.get("matches", [])
+if st.session_state.get("matches_fuzzy"):
+    st.info(f"🔎 ไม่พบชื่อที่ตรงทั้งหมด พบชื่อที่ใกล้เคียง {len(matches)} รายการ กรุณาเลือกรายการที่ต้องการ")
+elif len(matches) > 1:
+    st.warning(f"⚠️ พบข้อมูลที่ตรงกัน {len(matches)} รายการ กรุณาเลือกรายการที่ต้องการ")
+if len(matches) > 1 or st.session_state.get("matches_fuzzy"):
+    choice = st.radio(
+        "เลือกรายการ",
+        range(len(matches)),
+        format_func=lambda i: f"{matches[i].get('ชื่อ-สกุล', '-')} · HN {matches[i].get('HN', '-')} · เลขบัตร {matches[i].get('เลขบัตรประชาชน', '-')}",
+        label_visibility="collapsed",
+    )
+    st.session_state["person"] = matches[choice]
 
 # ===============================
 # DISPLAY
 # ===============================
+# ✅ fragment: เปลี่ยนแท็บ → รันใหม่เฉพาะส่วนแสดงผล ไม่รันฟอร์มค้นหา / โหลดข้อมูลทั้งหน้า
+# ✅ tabs ที่มี on_change → Streamlit บอกได้ว่าแท็บไหนเปิดอยู่ (tab.open) จึงสร้างแค่แท็บนั้น
+@st.fragment
+def show_report(rec, person):
+    report_cache = get_report_cache()
+    show_blocks(report_cache.report(rec, person, ["header"]))
+
+    tabs = st.tabs([title for title, _ in SECTION_TABS], key="report_tab", on_change="rerun")
+    for tab, (title, names) in zip(tabs, SECTION_TABS):
+        if tab.open:
+            with tab, timed(f"tab:{title}"):
+                show_blocks(report_cache.report(rec, person, names))
+
 if "person" in st.session_state:
     person = st.session_state["person"]
-
-    # ✅ แสดงชื่อคนไข้ ด้วยแถบเขียว และขนาดใหญ่
-    # ✅ ปลอดภัย ไม่ทำให้ error
-    st.success(f"✅ พบข้อมูลของ: {person.get('ชื่อ-สกุล', '-')}")
-
-    # ✅ แสดงเลขบัตร / HN / เพศ ด้วยสีขาว (เพื่อ contrast กับพื้นเข้ม)
-    st.markdown(f"""
-    <p style='color: white; font-size: 16px; line-height: 1.6;'>
-    เลขบัตรประชาชน: {person.get('เลขบัตรประชาชน', '-')}<br>
-    HN: {person.get('HN', '-')}<br>
-    เพศ: {person.get('เพศ', '-')}
-    </p>
-    """, unsafe_allow_html=True)
-
-    # ✅ สร้างตารางข้อมูลสุขภาพตามปี
-    table_data = {
-        "ปี พ.ศ.": [],
-        "น้ำหนัก (กก.)": [],
-        "ส่วนสูง (ซม.)": [],  # ✅ เพิ่มตรงนี้
-        "รอบเอว (ซม.)": [],
-        "ความดัน (mmHg)": [],
-        "BMI (แปลผล)": []
-    }
-    
-    for y in sorted(years):
-        cols = columns_by_year[y]  # ✅ ต้องมี
-        weight = person.get(cols["weight"], "")
-        height = person.get(cols["height"], "")
-        waist = person.get(cols["waist"], "")
-        sbp = person.get(cols["sbp"], "")
-        dbp = person.get(cols["dbp"], "")
-    
-        # ✅ คำนวณ BMI จากน้ำหนักและส่วนสูง
-        try:
-            bmi_val = float(weight) / ((float(height) / 100) ** 2)
-            bmi_val = round(bmi_val, 1)
-            bmi_str = f"{bmi_val}<br><span style='font-size: 13px; color: gray;'>{interpret_bmi(bmi_val)}</span>"
-        except:
-            bmi_val = None
-            bmi_str = "-"
-    
-        # ✅ แปลผลความดัน
-        try:
-            if sbp or dbp:
-                bp_val = f"{sbp}/{dbp}"
-                bp_meaning = interpret_bp(sbp, dbp)
-                bp_str = f"{bp_val}<br><span style='font-size: 13px; color: gray;'>{bp_meaning}</span>"
-            else:
-                bp_str = "-"
-        except:
-            bp_str = "-"
-    
-        # ✅ เติมข้อมูลลงตาราง
-        table_data["ปี พ.ศ."].append(y + 2500)
-        table_data["น้ำหนัก (กก.)"].append(weight if weight else "-")
-        table_data["ส่วนสูง (ซม.)"].append(height if height else "-")
-        table_data["รอบเอว (ซม.)"].append(waist if waist else "-")
-        table_data["ความดัน (mmHg)"].append(bp_str)
-        table_data["BMI (แปลผล)"].append(bmi_str)
-    
-    # ✅ แสดงผลตาราง (รองรับ HTML <br> ด้วย unsafe_allow_html)
-    st.markdown("### 📊 น้ำหนัก / รอบเอว / ความดัน")
-    html_table = pd.DataFrame(table_data).set_index("ปี พ.ศ.").T.to_html(escape=False)
-    st.markdown(html_table, unsafe_allow_html=True)
-
-    # ==========================
-    # GRAPH: BMI History
-    # ==========================
-
-    bmi_data = []
-    labels = []
-
-    for y in sorted(years):
-        cols = columns_by_year[y]  # ✅ ต้องอยู่ในลูปเท่านั้น!
-
-        weight = person.get(cols["weight"], "")
-        height = person.get(cols["height"], "")
-
-        try:
-            weight = float(weight)
-            height = float(height)
-            if weight > 0 and height > 0:
-                bmi_val = round(weight / ((height / 100) ** 2), 1)
-                bmi_data.append(bmi_val)
-                labels.append(f"B.E. {y + 2500}")
-        except:
-            continue
-
-    if bmi_data and labels:
-        st.markdown("### 📈 BMI Trend")
-        fig, ax = plt.subplots(figsize=(10, 4))
-        
-        ax.axhspan(30, 40, facecolor='#D32F2F', alpha=0.3, label='Severely Obese')
-        ax.axhspan(25, 30, facecolor='#FF5722', alpha=0.3, label='Obese')
-        ax.axhspan(23, 25, facecolor='#FF9900', alpha=0.3, label='Overweight')
-        ax.axhspan(18.5, 23, facecolor='#109618', alpha=0.3, label='Normal')
-        ax.axhspan(0, 18.5, facecolor='#3366CC', alpha=0.3, label='Underweight')
-
-        ax.plot(np.arange(len(labels)), bmi_data, marker='o', color='black', linewidth=2, label='BMI')
-        ax.set_xticks(np.arange(len(labels)))
-        ax.set_xticklabels(labels)
-        ax.set_ylabel("BMI", fontsize=12)
-        ax.set_ylim(15, 40)
-        ax.set_title("BMI Over Time", fontsize=14)
-        ax.legend(loc="upper left")
-
-        st.pyplot(fig)
+    position = snapshot.position_of(person)
+    if position is None:
+        rec = snapshot.person_years(person)
     else:
-        st.info("ไม่มีข้อมูล BMI เพียงพอสำหรับแสดงกราฟ")
-
-    # ===============================
-    # DISPLAY: URINE TEST (ปี 2561–2568)
-    # ===============================
-    
-    def interpret_alb(value):
-        if value == "":
-            return "-"
-        if value.lower() == "negative":
-            return "ไม่พบ"
-        elif value in ["trace", "1+", "2+"]:
-            return "พบโปรตีนในปัสสาวะเล็กน้อย"
-        elif value == "3+":
-            return "พบโปรตีนในปัสสาวะ"
-        return "-"
-    
-    def interpret_sugar(value):
-        if value == "":
-            return "-"
-        if value.lower() == "negative":
-            return "ไม่พบ"
-        elif value == "trace":
-            return "พบน้ำตาลในปัสสาวะเล็กน้อย"
-        elif value in ["1+", "2+", "3+", "4+", "5+", "6+"]:
-            return "พบน้ำตาลในปัสสาวะ"
-        return "-"
-    
-    def interpret_rbc(value):
-        if value == "":
-            return "-"
-        if value in ["0-1", "negative", "1-2", "2-3", "3-5"]:
-            return "ปกติ"
-        elif value in ["5-10", "10-20"]:
-            return "พบเม็ดเลือดแดงในปัสสาวะเล็กน้อย"
-        else:
-            return "พบเม็ดเลือดแดงในปัสสาวะ"
-    
-    def interpret_wbc(value):
-        if value == "":
-            return "-"
-        if value in ["0-1", "negative", "1-2", "2-3", "3-5"]:
-            return "ปกติ"
-        elif value in ["5-10", "10-20"]:
-            return "พบเม็ดเลือดขาวในปัสสาวะเล็กน้อย"
-        else:
-            return "พบเม็ดเลือดขาวในปัสสาวะ"
-    
-    def summarize_urine(*results):
-        if all(
-            r in ["-", "ปกติ", "ไม่พบ", "พบโปรตีนในปัสสาวะเล็กน้อย", "พบน้ำตาลในปัสสาวะเล็กน้อย"]
-            for r in results
-        ):
-            return "ปกติ"
-        if any("พบ" in r and "เล็กน้อย" not in r for r in results):
-            return "ผิดปกติ"
-        if any("เม็ดเลือดแดง" in r or "เม็ดเลือดขาว" in r for r in results if "ปกติ" not in r):
-            return "ผิดปกติ"
-        return "-"
-    
-    def advice_urine(sex, alb, sugar, rbc, wbc):
-        alb_text = interpret_alb(alb)
-        sugar_text = interpret_sugar(sugar)
-        rbc_text = interpret_rbc(rbc)
-        wbc_text = interpret_wbc(wbc)
-    
-        if all(x in ["-", "ปกติ", "ไม่พบ", "พบโปรตีนในปัสสาวะเล็กน้อย", "พบน้ำตาลในปัสสาวะเล็กน้อย"]
-               for x in [alb_text, sugar_text, rbc_text, wbc_text]):
-            return "ผลปัสสาวะอยู่ในเกณฑ์ปกติ ควรรักษาสุขภาพและตรวจประจำปีสม่ำเสมอ"
-    
-        if "พบน้ำตาลในปัสสาวะ" in sugar_text and "เล็กน้อย" not in sugar_text:
-            return "ควรลดการบริโภคน้ำตาล และตรวจระดับน้ำตาลในเลือดเพิ่มเติม"
-    
-        if sex == "หญิง" and "พบเม็ดเลือดแดง" in rbc_text and "ปกติ" in wbc_text:
-            return "อาจมีปนเปื้อนจากประจำเดือน แนะนำให้ตรวจซ้ำ"
-    
-        if sex == "ชาย" and "พบเม็ดเลือดแดง" in rbc_text and "ปกติ" in wbc_text:
-            return "พบเม็ดเลือดแดงในปัสสาวะ ควรตรวจทางเดินปัสสาวะเพิ่มเติม"
-    
-        if "พบเม็ดเลือดขาวในปัสสาวะ" in wbc_text and "เล็กน้อย" not in wbc_text:
-            return "อาจมีการอักเสบของระบบทางเดินปัสสาวะ แนะนำให้ตรวจซ้ำ"
-    
-        return "ควรตรวจปัสสาวะซ้ำเพื่อติดตามผล"
-    
-    # ===============================
-    # เตรียมตาราง
-    # ===============================
-    sex = person.get("เพศ", "")
-    advice_latest = "-"
-    urine_table = {
-        "โปรตีน": [],
-        "น้ำตาล": [],
-        "เม็ดเลือดแดง": [],
-        "เม็ดเลือดขาว": [],
-        "ผลสรุป": []
-    }
-    
-    for y in years:
-        y_label = str(y) if y != 68 else ""
-        y_be = y + 2500
-    
-        alb_col = f"Alb{y_label}"
-        sugar_col = f"sugar{y_label}"
-        rbc_col = f"RBC1{y_label}"
-        wbc_col = f"WBC1{y_label}"
-        summary_col = f"ผลปัสสาวะ{y_label}" if y != 68 else None
-    
-        alb_raw = person.get(alb_col, "").strip()
-        sugar_raw = person.get(sugar_col, "").strip()
-        rbc_raw = person.get(rbc_col, "").strip()
-        wbc_raw = person.get(wbc_col, "").strip()
-    
-        alb = f"{alb_raw}<br><span style='font-size:13px;color:gray;'>{interpret_alb(alb_raw)}</span>" if alb_raw else "-"
-        sugar = f"{sugar_raw}<br><span style='font-size:13px;color:gray;'>{interpret_sugar(sugar_raw)}</span>" if sugar_raw else "-"
-        rbc = f"{rbc_raw}<br><span style='font-size:13px;color:gray;'>{interpret_rbc(rbc_raw)}</span>" if rbc_raw else "-"
-        wbc = f"{wbc_raw}<br><span style='font-size:13px;color:gray;'>{interpret_wbc(wbc_raw)}</span>" if wbc_raw else "-"
-    
-        if y >= 68:
-            if not any([alb_raw, sugar_raw, rbc_raw, wbc_raw]):
-                summary = "-"
-            else:
-                summary = summarize_urine(
-                    interpret_alb(alb_raw),
-                    interpret_sugar(sugar_raw),
-                    interpret_rbc(rbc_raw),
-                    interpret_wbc(wbc_raw)
-                )
-            
-            # สร้าง advice เฉพาะปี 68 เท่านั้น (หรือปรับ y == ปีอื่นก็ได้)
-            if y == 68:
-                advice_latest = (
-                    advice_urine(sex, alb_raw, sugar_raw, rbc_raw, wbc_raw)
-                    if any([alb_raw, sugar_raw, rbc_raw, wbc_raw])
-                    else "-"
-                )
-
-        else:
-            summary = person.get(summary_col, "").strip() or "-"
-            summary = "ผิดปกติ" if "ผิดปกติ" in summary else ("ปกติ" if "ปกติ" in summary else "-")
-
-        urine_table["โปรตีน"].append(alb)
-        urine_table["น้ำตาล"].append(sugar)
-        urine_table["เม็ดเลือดแดง"].append(rbc)
-        urine_table["เม็ดเลือดขาว"].append(wbc)
-        urine_table["ผลสรุป"].append(summary)
-    
-    # ===============================
-    # แสดงผลตาราง
-    # ===============================
-    st.markdown("### 🚽 ผลตรวจปัสสาวะ")
-    urine_df = pd.DataFrame.from_dict(urine_table, orient="index", columns=[y + 2500 for y in years])
-    st.markdown(urine_df.to_html(escape=False), unsafe_allow_html=True)
-    
-    # ===============================
-    # แสดงคำแนะนำปี 68 หรือมากกว่า
-    # ===============================
-    latest_year = None
-    for y in reversed(years):
-        if y >= 68:
-            y_label = str(y)
-            if any(person.get(f"{prefix}{y_label}", "").strip() for prefix in ["Alb", "sugar", "RBC1", "WBC1"]):
-                latest_year = y
-                break
-    
-    # อย่าเขียนทับ advice_latest ถ้ามีค่าที่ไม่ใช่ "-"
-    if advice_latest == "-":
-        if latest_year is not None:
-            y_label = str(latest_year)
-            alb_raw = person.get(f"Alb{y_label}", "").strip()
-            sugar_raw = person.get(f"sugar{y_label}", "").strip()
-            rbc_raw = person.get(f"RBC1{y_label}", "").strip()
-            wbc_raw = person.get(f"WBC1{y_label}", "").strip()
-            advice_latest = advice_urine(sex, alb_raw, sugar_raw, rbc_raw, wbc_raw)
-    
-    # แสดงคำแนะนำเฉพาะถ้าไม่ใช่ "ปกติ" และไม่ใช่ "-"
-    if advice_latest and advice_latest not in ["-", ""] and "ปกติ" not in advice_latest:
-        st.markdown(f"""
-        <div style='
-            background-color: rgba(255, 215, 0, 0.2);
-            padding: 1rem;
-            border-radius: 6px;
-            color: white;
-        '>
-            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจปัสสาวะปี 2568</div>
-            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_latest}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: STOOL TEST
-    # ===============================
-    
-    def interpret_stool_exam(value):
-        if not value or value.strip() == "":
-            return "-"
-        if "ปกติ" in value:
-            return "ปกติ"
-        elif "เม็ดเลือดแดง" in value:
-            return "พบเม็ดเลือดแดงในอุจจาระ นัดตรวจซ้ำ"
-        elif "เม็ดเลือดขาว" in value:
-            return "พบเม็ดเลือดขาวในอุจจาระ นัดตรวจซ้ำ"
-        return value.strip()
-    
-    def interpret_stool_cs(value, is_latest=False):
-        if not value or value.strip() == "":
-            return "-"
-        if "ไม่พบ" in value or "ปกติ" in value:
-            return "ไม่พบการติดเชื้อ"
-        if is_latest:
-            return "พบการติดเชื้อในอุจจาระ ให้พบแพทย์เพื่อตรวจรักษาเพิ่มเติม"
-        return "พบการติดเชื้อในอุจจาระ"
-    
-    st.markdown("### 💩 ผลตรวจอุจจาระ")
-    
-    stool_table = {
-        "ผลตรวจอุจจาระทั่วไป": [],
-        "ผลเพาะเชื้ออุจจาระ": []
-    }
-    
-    latest_year = max(years)
-    
-    for y in years:
-        y_label = "" if y == 68 else str(y)
-        year_be = y + 2500
-    
-        exam_col = f"Stool exam{y_label}"
-        cs_col = f"Stool C/S{y_label}"
-    
-        exam_raw = person.get(exam_col, "").strip()
-        cs_raw = person.get(cs_col, "").strip()
-    
-        is_latest = y == latest_year
-    
-        exam_text = interpret_stool_exam(exam_raw)
-        cs_text = interpret_stool_cs(cs_raw, is_latest=is_latest)
-    
-        stool_table["ผลตรวจอุจจาระทั่วไป"].append(exam_text)
-        stool_table["ผลเพาะเชื้ออุจจาระ"].append(cs_text)
-    
-    # แสดงเป็น DataFrame
-    stool_df = pd.DataFrame.from_dict(stool_table, orient="index", columns=[y + 2500 for y in years])
-    st.markdown(stool_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: BLOOD TEST (CBC)
-    # ===============================
-    
-    def interpret_wbc(wbc):
-        try:
-            wbc = float(wbc)
-            if wbc == 0:
-                return "-"
-            elif 4000 <= wbc <= 10000:
-                return "ปกติ"
-            elif 10000 < wbc < 13000:
-                return "สูงกว่าเกณฑ์เล็กน้อย"
-            elif wbc >= 13000:
-                return "สูงกว่าเกณฑ์ปกติ"
-            elif 3000 < wbc < 4000:
-                return "ต่ำกว่าเกณฑ์เล็กน้อย"
-            elif wbc <= 3000:
-                return "ต่ำกว่าเกณฑ์ปกติ"
-        except:
-            return "-"
-        return "-"
-    
-    def interpret_hb(hb, sex):
-        try:
-            hb = float(hb)
-            if sex == "ชาย":
-                if hb < 12:
-                    return "พบภาวะโลหิตจาง"
-                elif 12 <= hb < 13:
-                    return "พบภาวะโลหิตจางเล็กน้อย"
-                else:
-                    return "ปกติ"
-            elif sex == "หญิง":
-                if hb < 11:
-                    return "พบภาวะโลหิตจาง"
-                elif 11 <= hb < 12:
-                    return "พบภาวะโลหิตจางเล็กน้อย"
-                else:
-                    return "ปกติ"
-        except:
-            return "-"
-        return "-"
-    
-    def interpret_plt(plt):
-        try:
-            plt = float(plt)
-            if plt == 0:
-                return "-"
-            elif 150000 <= plt <= 500000:
-                return "ปกติ"
-            elif 500000 < plt < 600000:
-                return "สูงกว่าเกณฑ์เล็กน้อย"
-            elif plt >= 600000:
-                return "สูงกว่าเกณฑ์"
-            elif 100000 <= plt < 150000:
-                return "ต่ำกว่าเกณฑ์เล็กน้อย"
-            elif plt < 100000:
-                return "ต่ำกว่าเกณฑ์"
-        except:
-            return "-"
-        return "-"
-    
-    st.markdown("### 🩸 ความสมบูรณ์ของเลือด")
-    
-    blood_table = {
-        "เม็ดเลือดขาว (WBC)": [],
-        "ความเข้มข้นของเลือด (Hb%)": [],
-        "เกล็ดเลือด (Plt)": []
-    }
-    
-    sex = person.get("เพศ", "").strip()
-    
-    for y in years:
-        y_label = "" if y == 68 else str(y)
-        year_be = y + 2500
-    
-        wbc_raw = str(person.get(f"WBC (cumm){y_label}", "")).strip()
-        hb_raw = str(person.get(f"Hb(%){y_label}", "")).strip()
-        plt_raw = str(person.get(f"Plt (/mm){y_label}", "")).strip()
-    
-        blood_table["เม็ดเลือดขาว (WBC)"].append(interpret_wbc(wbc_raw))
-        blood_table["ความเข้มข้นของเลือด (Hb%)"].append(interpret_hb(hb_raw, sex))
-        blood_table["เกล็ดเลือด (Plt)"].append(interpret_plt(plt_raw))
-    
-    blood_df = pd.DataFrame.from_dict(blood_table, orient="index", columns=[y + 2500 for y in years])
-    st.markdown(blood_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # คำนวณคำแนะนำ CBC ปีล่าสุด (2568)
-    latest_y = 68
-    y_label = ""  # สำหรับปี 68 คอลัมน์ไม่มี suffix
-    
-    wbc_raw = str(person.get(f"WBC (cumm){y_label}", "")).strip()
-    hb_raw = str(person.get(f"Hb(%){y_label}", "")).strip()
-    plt_raw = str(person.get(f"Plt (/mm){y_label}", "")).strip()
-    
-    wbc_result = interpret_wbc(wbc_raw)
-    hb_result = interpret_hb(hb_raw, sex)
-    plt_result = interpret_plt(plt_raw)
-    
-    cbc_recommendation = cbc_advice(hb_result, wbc_result, plt_result)
-    
-    # แสดงคำแนะนำ เฉพาะเมื่อมีข้อมูลอย่างน้อย 1 ค่าที่ไม่ใช่ "-"
-    if cbc_recommendation and not all(x == "-" for x in [wbc_result, hb_result, plt_result]):
-        st.markdown(f"""
-        <div style='
-            background-color: rgba(255, 105, 135, 0.15);
-            padding: 1rem;
-            border-radius: 6px;
-            color: white;
-        '>
-            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจเลือด (CBC) ปี 2568</div>
-            <div style='font-size: 16px; margin-top: 0.3rem;'>{cbc_recommendation}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: LIVER TEST (การทำงานของตับ)
-    # ===============================
-    
-    import pandas as pd
-    import streamlit as st
-    
-    years = list(range(2561, 2569))
-    
-    alp_raw = str(person.get(f"ALP{y_label}", "") or "").strip()
-    sgot_raw = str(person.get(f"SGOT{y_label}", "") or "").strip()
-    sgpt_raw = str(person.get(f"SGPT{y_label}", "") or "").strip()
-
-    st.markdown("### 🧪 การทำงานของตับ")
-    
-    def interpret_liver(value, upper_limit):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif value > upper_limit:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>สูงกว่าเกณฑ์</span>", "สูง"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>", "ปกติ"
-        except:
-            return "-", "-"
-    
-    def summarize_liver(alp_val, sgot_val, sgpt_val):
-        try:
-            alp = float(alp_val)
-            sgot = float(sgot_val)
-            sgpt = float(sgpt_val)
-            if alp == 0 or sgot == 0 or sgpt == 0:
-                return "-"
-            if alp > 120 or sgot > 36 or sgpt > 40:
-                return "การทำงานของตับสูงกว่าเกณฑ์ปกติเล็กน้อย"
-            return "ปกติ"
-        except:
-            return "-"
-    
-    def liver_advice(summary_text):
-        if summary_text == "การทำงานของตับสูงกว่าเกณฑ์ปกติเล็กน้อย":
-            return "ควรลดอาหารไขมันสูงและตรวจติดตามการทำงานของตับซ้ำ"
-        elif summary_text == "ปกติ":
-            return ""
-        return "-"
-    
-    # เตรียมตาราง
-    liver_data = {
-        "ระดับเอนไซม์ ALP": [],
-        "SGOT (AST)": [],
-        "SGPT (ALT)": [],
-        "ผลสรุป": []
-    }
-    
-    advice_liver = "-"
-    
-    for y in years:
-        y_label = "" if y == 2568 else str(y % 100)
-        year_be = y
-    
-        alp_raw = str(person.get(f"ALP{y_label}", "") or "").strip()
-        sgot_raw = str(person.get(f"SGOT{y_label}", "") or "").strip()
-        sgpt_raw = str(person.get(f"SGPT{y_label}", "") or "").strip()
-    
-        alp_disp, alp_flag = interpret_liver(alp_raw, 120)
-        sgot_disp, sgot_flag = interpret_liver(sgot_raw, 36)
-        sgpt_disp, sgpt_flag = interpret_liver(sgpt_raw, 40)
-    
-        summary = summarize_liver(alp_raw, sgot_raw, sgpt_raw)
-    
-        liver_data["ระดับเอนไซม์ ALP"].append(alp_disp)
-        liver_data["SGOT (AST)"].append(sgot_disp)
-        liver_data["SGPT (ALT)"].append(sgpt_disp)
-        liver_data["ผลสรุป"].append(summary)
-    
-        # เก็บคำแนะนำเฉพาะปีล่าสุด
-        if y == 2568:
-            advice_liver = liver_advice(summary)
-    
-    # แสดงตาราง
-    liver_df = pd.DataFrame.from_dict(liver_data, orient="index", columns=[y for y in years])
-    st.markdown(liver_df.to_html(escape=False), unsafe_allow_html=True)
-    
-    # แสดงเฉพาะเมื่อมีความผิดปกติ
-    if advice_liver and advice_liver != "-" and advice_liver != "":
-        st.markdown(f"""
-        <div style='
-            background-color: rgba(100, 221, 23, 0.15);
-            padding: 1rem;
-            border-radius: 6px;
-            color: white;
-        '>
-            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจตับ ปี 2568</div>
-            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_liver}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: URIC ACID (ผลยูริคในเลือด)
-    # ===============================
-    st.markdown("### 🧪 ผลกรดยูริคในเลือด")
-    
-    # สร้างชื่อคอลัมน์แบบยืดหยุ่นตามปี
-    def get_uric_col_name(year):
-        return "Uric Acid" if year == 2568 else f"Uric Acid{str(year)[-2:]}"
-    
-    # ฟังก์ชันแปลผลยูริค
-    def interpret_uric(value):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif value > 7.2:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>สูงกว่าเกณฑ์</span>"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    # เตรียมตารางผล
-    uric_data = []
-    for y in range(2561, 2569):
-        col_name = get_uric_col_name(y)
-        raw_value = str(person.get(col_name, "") or "").strip()
-        result = interpret_uric(raw_value)
-        uric_data.append(result)
-    
-    # สร้าง DataFrame
-    uric_df = pd.DataFrame({
-        "กรดยูริคในเลือด (mg/dL)": uric_data
-    }, index=[y for y in range(2561, 2569)]).T
-    
-    # แสดงผล
-    st.markdown(uric_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: KIDNEY FUNCTION (ผลตรวจไต)
-    # ===============================
-    
-    st.markdown("### 🧪 การทำงานของไต")
-    
-    # ปีที่รองรับ
-    years = list(range(2561, 2569))
-    
-    # ฟังก์ชันแปลผลแต่ละค่า
-    def interpret_bun(value):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif value < 5 or value > 20:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ผิดปกติ</span>"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    def interpret_cr(value):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif value < 0.6 or value > 1.2:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ผิดปกติ</span>"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    def interpret_gfr(value):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif value < 60:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ต่ำกว่าเกณฑ์</span>"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    # เตรียมข้อมูล
-    kidney_data = {
-        "BUN (mg/dL)": [],
-        "Creatinine (mg/dL)": [],
-        "Estimated GFR (mL/min/1.73m²)": []
-    }
-    
-    for y in years:
-        y_label = "" if y == 2568 else str(y % 100)
-    
-        bun_raw = str(person.get(f"BUN{y_label}", "") or "").strip()
-        cr_raw = str(person.get(f"Cr{y_label}", "") or "").strip()
-        gfr_raw = str(person.get(f"GFR{y_label}", "") or "").strip()
-    
-        kidney_data["BUN (mg/dL)"].append(interpret_bun(bun_raw))
-        kidney_data["Creatinine (mg/dL)"].append(interpret_cr(cr_raw))
-        kidney_data["Estimated GFR (mL/min/1.73m²)"].append(interpret_gfr(gfr_raw))
-    
-    # แสดงผลเป็น DataFrame
-    kidney_df = pd.DataFrame.from_dict(kidney_data, orient="index", columns=[y for y in years])
-    st.markdown(kidney_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: FBS (ผลตรวจน้ำตาลในเลือด)
-    # ===============================
-    import pandas as pd
-    import streamlit as st
-    
-    # ===== ปีที่รองรับ =====
-    years = list(range(2561, 2569))
-    
-    # ===== ชื่อคอลัมน์ใน Google Sheet =====
-    def get_fbs_column(year):
-        return "FBS" if year == 2568 else f"FBS{str(year)[-2:]}"
-    
-    # ===== ฟังก์ชันแปลผล FBS =====
-    def interpret_fbs(value):
-        try:
-            value = float(value)
-            if value == 0:
-                return "-"
-            elif 100 <= value < 106:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>เริ่มสูงเล็กน้อย</span>"
-            elif 106 <= value < 126:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>สูงเล็กน้อย</span>"
-            elif value >= 126:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>สูง</span>"
-            else:
-                return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    # ===== เตรียมข้อมูลจาก person =====
-    fbs_data = []
-    
-    for y in years:
-        col_name = get_fbs_column(y)
-        raw = str(person.get(col_name, "") or "").strip()
-        result = interpret_fbs(raw)
-        fbs_data.append(result)
-    
-    # ===== สร้าง DataFrame และแสดง =====
-    fbs_df = pd.DataFrame({
-        "ระดับน้ำตาลในเลือด (FBS) (mg/dL)": fbs_data
-    }, index=years).T
-    
-    st.markdown("### 🍬 น้ำตาลในเลือด (FBS)")
-    st.markdown(fbs_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: BLOOD LIPIDS (ไขมันในเลือด)
-    # ===============================
-    st.markdown("### 🧪 ไขมันในเลือด")
-    
-    # ปี พ.ศ. ที่รองรับ
-    years = list(range(2561, 2569))  # 2561–2568
-    
-    # แปลผลในแต่ละรายการ
-    def interpret_chol(value):
-        try:
-            val = float(value)
-            if val == 0:
-                return "-"
-            elif val >= 250:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
-            elif val <= 200:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-            else:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>เริ่มสูง</span>"
-        except:
-            return "-"
-    
-    def interpret_tgl(value):
-        try:
-            val = float(value)
-            if val == 0:
-                return "-"
-            elif val >= 250:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
-            elif val <= 150:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-            else:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>เริ่มสูง</span>"
-        except:
-            return "-"
-    
-    def interpret_hdl(value):
-        try:
-            val = float(value)
-            if val == 0:
-                return "-"
-            elif val < 40:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>ต่ำ</span>"
-            else:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    def interpret_ldl(value):
-        try:
-            val = float(value)
-            if val == 0:
-                return "-"
-            elif val >= 180:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
-            else:
-                return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    # ฟังก์ชันสรุปไขมันในเลือดตามเกณฑ์สูตร Excel
-    def summarize_lipids(chol_raw, tgl_raw, ldl_raw):
-        try:
-            chol = float(chol_raw)
-            tgl = float(tgl_raw)
-            ldl = float(ldl_raw)
-            if chol == 0 and tgl == 0:
-                return "-"
-            if chol >= 250 or tgl >= 250 or ldl >= 180:
-                return "ไขมันในเลือดสูง"
-            elif chol <= 200 and tgl <= 150:
-                return "ปกติ"
-            else:
-                return "ไขมันในเลือดสูงเล็กน้อย"
-        except:
-            return "-"
-    
-    # เตรียมตาราง
-    lipid_data = {
-        "CHOL": [],
-        "TGL": [],
-        "HDL": [],
-        "LDL": [],
-        "ผลสรุป": []
-    }
-    
-    for y in years:
-        y_label = "" if y == 2568 else str(y % 100)
-    
-        chol_raw = str(person.get(f"CHOL{y_label}", "") or "").strip()
-        tgl_raw = str(person.get(f"TGL{y_label}", "") or "").strip()
-        hdl_raw = str(person.get(f"HDL{y_label}", "") or "").strip()
-        ldl_raw = str(person.get(f"LDL{y_label}", "") or "").strip()
-    
-        chol_result = interpret_chol(chol_raw)
-        tgl_result = interpret_tgl(tgl_raw)
-        hdl_result = interpret_hdl(hdl_raw)
-        ldl_result = interpret_ldl(ldl_raw)
-    
-        summary_result = summarize_lipids(chol_raw, tgl_raw, ldl_raw)
-    
-        lipid_data["CHOL"].append(chol_result)
-        lipid_data["TGL"].append(tgl_result)
-        lipid_data["HDL"].append(hdl_result)
-        lipid_data["LDL"].append(ldl_result)
-        lipid_data["ผลสรุป"].append(summary_result)
-    
-    # แสดงตาราง
-    lipid_df = pd.DataFrame.from_dict(lipid_data, orient="index", columns=[y for y in years])
-    st.markdown(lipid_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: CHEST X-RAY (ผลเอกซเรย์)
-    # ===============================
-    
-    st.markdown("### 🩻 ผลเอกซเรย์ (CXR)")
-    
-    # ปีที่รองรับ
-    years = list(range(2561, 2569))
-    
-    # สร้างชื่อคอลัมน์ CXR ตามปี
-    def get_cxr_col_name(year):
-        return "CXR" if year == 2568 else f"CXR{str(year)[-2:]}"
-    
-    # ฟังก์ชันแปลผล (ถ้าค่าไม่มีให้แสดง "-")
-    def interpret_cxr(value):
-        if not value or str(value).strip() == "":
-            return "-"
-        return str(value).strip()
-    
-    # สร้างตารางผล
-    cxr_data = []
-    
-    for y in years:
-        col_name = get_cxr_col_name(y)
-        raw_value = person.get(col_name, "")
-        result = interpret_cxr(raw_value)
-        cxr_data.append(result)
-    
-    # สร้าง DataFrame
-    cxr_df = pd.DataFrame({
-        "ผลเอกซเรย์": cxr_data
-    }, index=years).T
-    
-    # แสดงผลในตาราง
-    st.markdown(cxr_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: EKG (ผลคลื่นไฟฟ้าหัวใจ)
-    # ===============================
-    
-    st.markdown("### ❤️ ผลคลื่นไฟฟ้าหัวใจ (EKG)")
-    
-    # ปีที่รองรับ
-    years = list(range(2561, 2569))
-    
-    # ฟังก์ชันหาชื่อคอลัมน์ของปีนั้นๆ
-    def get_ekg_col_name(year):
-        return "EKG" if year == 2568 else f"EKG{str(year)[-2:]}"
-    
-    # ฟังก์ชันแปลผล (ถ้าไม่มีข้อมูล ให้แสดง "-")
-    def interpret_ekg(value):
-        if not value or str(value).strip() == "":
-            return "-"
-        return str(value).strip()
-    
-    # เตรียมข้อมูลลงตาราง
-    ekg_data = []
-    
-    for y in years:
-        col_name = get_ekg_col_name(y)
-        raw_value = person.get(col_name, "")
-        result = interpret_ekg(raw_value)
-        ekg_data.append(result)
-    
-    # สร้าง DataFrame แสดงผล
-    ekg_df = pd.DataFrame({
-        "ผลคลื่นไฟฟ้าหัวใจ (EKG)": ekg_data
-    }, index=years).T
-    
-    # แสดงผล
-    st.markdown(ekg_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: ความจุปอด
-    # ===============================
-    st.markdown("### 🫁 สมรรถภาพปอด")
-    
-    years = list(range(2561, 2569))  # รองรับปี 2561 ถึง 2568
-    
-    def get_col(name: str, y: int) -> str:
-        return f"{name}{str(y)[-2:]}"  # ทุกปีต้องมีเลขท้าย 2 หลัก (รวมปี 68)
-    
-    def get_first_available(person, candidates):
-        for col in candidates:
-            if col in person:
-                return str(person.get(col, "")).strip()
-        return "-"
-    
-    def format_result(value, suffix="%"):
-        try:
-            val = float(value)
-            if val == 0:
-                return "-"
-            return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
-        except:
-            return "-"
-    
-    def interpret_lung(fvc, fev1, ratio):
-        try:
-            fvc = float(fvc)
-            fev1 = float(fev1)
-            ratio = float(ratio)
-    
-            if fvc > 80 and fev1 > 80 and ratio > 70:
-                return "สมรรถภาพปอดปกติ"
-            elif fvc <= 80 and fev1 > 70 and ratio <= 100:
-                return "พบความผิดปกติแบบปอดจำกัดการขยายตัวเล็กน้อย"
-            elif fvc <= 80 and fev1 <= 70:
-                return "Mixed"
-            elif fvc < 100 and fev1 <= 70 and ratio <= 65:
-                return "พบความผิดปกติแบบหลอดลมอุดกั้นเล็กน้อย"
-            else:
-                return "สรุปไม่ได้"
-        except:
-            return "-"
-    
-    def lung_advice(summary_text):
-        if summary_text == "สมรรถภาพปอดปกติ":
-            return "ควรออกกำลังกายสม่ำเสมอเพื่อรักษาปอดให้แข็งแรง"
-        elif "ปอดจำกัดการขยายตัว" in summary_text or "หลอดลมอุดกั้น" in summary_text or "Mixed" in summary_text:
-            return "ควรเพิ่มสมรรถภาพปอดด้วยการออกกำลังกาย หลีกเลี่ยงควัน ฝุ่น และพบแพทย์หากมีอาการ"
-        elif summary_text == "สรุปไม่ได้":
-            return "ไม่สามารถสรุปผลได้ อาจเกิดจากข้อมูลไม่ครบ ควรตรวจซ้ำ"
-        return "-"
-    
-    # เตรียมข้อมูลตาราง
-    lung_data = {
-        "FVC (%)": [],
-        "FEV1 (%)": [],
-        "FEV1/FVC (%)": [],
-        "ผลสรุป": []
-    }
-    
-    summary_latest = "-"
-    for y in years:
-        y_suffix = str(y)[-2:]
-    
-        fvc_raw = get_first_available(person, [
-            f"FVC เปอร์เซ็นต์{y_suffix}",
-            f"FVCเปอร์เซ็นต์{y_suffix}"  # เผื่อไม่มีเว้นวรรค
-        ])
-    
-        fev1_raw = get_first_available(person, [
-            f"FEV1เปอร์เซ็นต์{y_suffix}",
-            f"FEV1 เปอร์เซ็นต์{y_suffix}"
-        ])
-    
-        ratio_raw = get_first_available(person, [
-            f"FEV1/FVC%{y_suffix}",
-            f"FEV1/FVC% {y_suffix}"  # เผื่อมีเว้นวรรคด้านหลัง
-        ])
-    
-        fvc_display = format_result(fvc_raw)
-        fev1_display = format_result(fev1_raw)
-        ratio_display = format_result(ratio_raw)
-    
-        summary = interpret_lung(fvc_raw, fev1_raw, ratio_raw)
-        if y == 2568:
-            summary_latest = summary
-    
-        lung_data["FVC (%)"].append(fvc_display)
-        lung_data["FEV1 (%)"].append(fev1_display)
-        lung_data["FEV1/FVC (%)"].append(ratio_display)
-        lung_data["ผลสรุป"].append(summary)
-    
-    # แสดงตาราง
-    lung_df = pd.DataFrame.from_dict(lung_data, orient="index", columns=years)
-    st.markdown(lung_df.to_html(escape=False), unsafe_allow_html=True)
-    
-    # แสดงคำแนะนำ
-    advice_lung = lung_advice(summary_latest)
-    
-    if advice_lung and advice_lung != "-":
-        st.markdown(f"""
-        <div style='
-            background-color: rgba(0, 150, 136, 0.15);
-            padding: 1rem;
-            border-radius: 6px;
-            color: white;
-        '>
-            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำสมรรถภาพปอด ปี 2568</div>
-            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_lung}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # ===============================
-    # DISPLAY: สมรรถภาพตา (รองรับปีอนาคต)
-    # ===============================
-    st.markdown("### 👁️ สมรรถภาพตา")
-    
-    # ดึงปีทั้งหมดจากข้อมูลจริง (จากชื่อคอลัมน์)
-    eye_years = sorted({
-        2500 + int(col[-2:])
-        for col in person.keys()
-        if col[-2:].isdigit() and 2500 + int(col[-2:]) >= 2561 and 2500 + int(col[-2:]) <= 2600
-    })
-    
-    def get_col(name: str, year: int) -> str:
-        return f"{name}{str(year)[-2:]}"  # เพิ่มเลขท้าย 2 หลักตามปี
-    
-    def get_first_available(person, col_names):
-        for col in col_names:
-            if col in person:
-                value = str(person.get(col, "")).strip()
-                if value:  # ค่าต้องไม่ว่าง
-                    return value
-        return "-"
-    
-    # ฟังก์ชันย่อผลสรุป
-    def shorten_eye_summary(text: str) -> str:
-        text = text.strip()
-        if "เหมาะสม" in text and "มองเห็น" in text:
-            return "การมองเห็นเหมาะสมกับงาน"
-        if "มองเห็นไม่เหมาะ" in text:
-            return "การมองเห็นไม่เหมาะกับงาน"
-        if "ไม่สามารถสรุป" in text:
-            return "ไม่สามารถสรุปได้"
-        return text[:35] + "..." if len(text) > 40 else text
-    
-    # ฟังก์ชันย่อคำแนะนำ
-    def shorten_eye_advice(text: str) -> str:
-        text = text.strip()
-    
-        if "บริหารสายตา" in text and "พักสายตา" in text:
-            return "บริหารสายตา-พักตาและตรวจปีละครั้ง"
-        if "เครื่องจักร" in text or "ขับรถ" in text:
-            return "การกะระยะต่ำกว่าเกณฑ์ ต้องระวังการทำงานใกล้เครื่องจักรและการขับรถ"
-        if "ควรพบจักษุแพทย์" in text:
-            return "ควรพบจักษุแพทย์เพื่อตรวจเพิ่มเติม"
-        if "พักสายตา" in text and "ประเมิน" in text:
-            return "พักสายตาและตรวจเพิ่ม"
-        if "เหมาะสมกับลักษณะงาน" in text:
-            return "การมองเห็นเหมาะสมกับงาน"
-        if "ควรพบแพทย์" in text:
-            return "พบแพทย์เพื่อตรวจเพิ่มเติม"
-        if "ตรวจสมรรถภาพ" in text:
-            return "ตรวจสมรรถภาพสายตาเพิ่มเติม"
-    
-        return text[:35] + "..." if len(text) > 40 else text
-    
-    # หัวข้อข้อมูลที่เราสนใจ
-    eye_metrics = {
-        "ภาพรวมสายตา (ป)": [
-            "ป.การรวมภาพ", 
-            "ป.ความชัดของภาพระยะไกล", 
-            "ป.การกะระยะและมองความชัดลึกของภาพ",
-            "ป.การจำแนกสี",
-            "ป.ความชัดของภาพระยะใกล้",
-            "ป.ลานสายตา",
-            "ปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวตั้ง",
-            "ปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวนอน",
-            "ปกติความสมดุลกล้ามเนื้อตาระยะใกล้แนวนอน",
-        ],
-        "ภาพรวมสายตา (ผ)": [
-            "ผ.ความชัดของภาพระยะไกล", 
-            "ผ.การกะระยะและมองความชัดลึกของภาพ",
-            "ผ.การจำแนกสี",
-            "ผ.ความชัดของภาพระยะใกล้",
-            "ผ.สายตาเขซ่อนเร้น",
-            "ผิดปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวตั้ง",
-            "ผิดปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวนอน",
-        ],
-        "ผลสรุป": ["สรุปเหมาะสมกับงาน"],
-        "คำแนะนำ": ["แนะนำABN EYE"],
-    }
-    
-    # เตรียมตารางข้อมูล
-    eye_data = {k: [] for k in eye_metrics.keys()}
-    
-    # Loop ตามปีที่ตรวจเจอในข้อมูล
-    for y in eye_years:
-        y_suffix = str(y)[-2:]
-        for field, prefixes in eye_metrics.items():
-            col_names = [f"{prefix}{y_suffix}" for prefix in prefixes]
-            value = get_first_available(person, col_names)
-    
-            if field == "ผลสรุป":
-                eye_data[field].append(shorten_eye_summary(value))
-            elif field == "คำแนะนำ":
-                eye_data[field].append(shorten_eye_advice(value))
-            else:
-                eye_data[field].append(value)
-    
-    # แสดงตาราง
-    eye_df = pd.DataFrame.from_dict(eye_data, orient="index", columns=eye_years)
-    st.markdown(eye_df.to_html(escape=False), unsafe_allow_html=True)
-
-    # ===============================
-    # แปลผลสมรรถภาพการได้ยิน (ตามเกณฑ์มาตรฐาน)
-    # ===============================
-    st.markdown("### 📌 สมรรถภาพการได้ยิน")
-    
-    years = list(range(2561, 2569))
-    low_freqs = ['500', '1k', '2k']
-    high_freqs = ['3k', '4k', '6k']
-    all_freqs = low_freqs + high_freqs
-    
-    def is_no_hearing_data(ear_data):
-        for val in ear_data.values():
-            try:
-                num = float(str(val).strip())
-                if num > 0:
-                    return False
-            except:
-                continue
-        return True
-    
-    def hearing_loss_at_freq(dB):
-        try:
-            return float(dB) > 25
-        except:
-            return False
-    
-    def get_first_valid_year_data():
-        for y in years:
-            y_suffix = str(y)[-2:]
-            left = {f: person.get(f"L{f}{y_suffix}", "") for f in all_freqs}
-            right = {f: person.get(f"R{f}{y_suffix}", "") for f in all_freqs}
-            if not is_no_hearing_data(left) or not is_no_hearing_data(right):
-                return {"data": {"left": left, "right": right}, "year": y}
-        return None
-    
-    def interpret_hearing(left, right, baseline=None, compare_with_baseline=True):
-        result = []
-    
-        for side, ear_data in [('หูซ้าย', left), ('หูขวา', right)]:
-            abnormal = [f for f in all_freqs if hearing_loss_at_freq(ear_data.get(f))]
-            if abnormal:
-                result.append(f"มีการได้ยินลดลงที่ {side} ความถี่ {', '.join(abnormal)} Hz")
-            else:
-                result.append(f"สมรรถภาพการได้ยิน{side}ปกติ")
-    
-        def avg(ear, freqs):
-            try:
-                return sum(float(ear.get(f, 0)) for f in freqs) / len(freqs)
-            except:
-                return 0
-    
-        diff_low = abs(avg(left, low_freqs) - avg(right, low_freqs))
-        diff_high = abs(avg(left, high_freqs) - avg(right, high_freqs))
-    
-        if diff_low > 15:
-            result.append("ระดับการได้ยินความถี่ต่ำของหูทั้งสองข้างต่างกันมากกว่า 15 dB")
-        if diff_high > 30:
-            result.append("ระดับการได้ยินความถี่สูงของหูทั้งสองข้างต่างกันมากกว่า 30 dB")
-    
-        if baseline and compare_with_baseline:
-            for f in low_freqs:
-                try:
-                    if float(left[f]) - float(baseline['left'][f]) > 15 or float(right[f]) - float(baseline['right'][f]) > 15:
-                        result.append(f"ค่าเฉลี่ยความถี่ต่ำ {f}Hz ต่างจาก baseline มากกว่า 15 dB")
-                except:
-                    continue
-            for f in high_freqs:
-                try:
-                    if float(left[f]) - float(baseline['left'][f]) > 20 or float(right[f]) - float(baseline['right'][f]) > 20:
-                        result.append(f"ค่าเฉลี่ยความถี่สูง {f}Hz ต่างจาก baseline มากกว่า 20 dB")
-                except:
-                    continue
-        elif compare_with_baseline:
-            result.append("ไม่มีข้อมูล baseline เพื่อเปรียบเทียบ")
-    
-        return result
-    
-    # ===== เตรียม baseline =====
-    baseline_left = {f: person.get(f"L{f}B", "") for f in all_freqs}
-    baseline_right = {f: person.get(f"R{f}B", "") for f in all_freqs}
-    baseline = None
-    baseline_source_year = None
-    
-    if all(baseline_left.values()) and all(baseline_right.values()):
-        baseline = {"left": baseline_left, "right": baseline_right}
-    else:
-        fallback = get_first_valid_year_data()
-        if fallback:
-            baseline = fallback["data"]
-            baseline_source_year = fallback["year"]
-    
-    # ===== วนตรวจทุกปี =====
-    result_by_year = {}
-    
-    for y in years:
-        y_suffix = str(y)[-2:]
-        left = {f: person.get(f"L{f}{y_suffix}", "") for f in all_freqs}
-        right = {f: person.get(f"R{f}{y_suffix}", "") for f in all_freqs}
-        compare = baseline is not None and y != baseline_source_year
-    
-        if is_no_hearing_data(left) and is_no_hearing_data(right):
-            result_by_year[y] = ["ไม่มีข้อมูลการตรวจ"]
-        else:
-            result_by_year[y] = interpret_hearing(left, right, baseline, compare_with_baseline=compare)
-    
-    # ===== แสดงผลเป็นตาราง =====
-    max_lines = max(len(v) for v in result_by_year.values())
-    table_data = {}
-    for year, results in result_by_year.items():
-        padded = results + [""] * (max_lines - len(results))
-        table_data[year] = padded
-    
-    hearing_interp_df = pd.DataFrame(table_data)
-    st.markdown(hearing_interp_df.to_html(escape=False, index=False), unsafe_allow_html=True)
-    
-    # ===== แจ้ง baseline ที่ใช้ =====
-    if baseline_source_year:
-        st.info(f"📌 ใช้ผลการตรวจปี {baseline_source_year} เป็น baseline เนื่องจากไม่มี baseline ที่แท้จริง")
+        # ✅ snapshot อาจถูกโหลดใหม่หลังค้นหา → ใช้แถวปัจจุบัน ให้ rec กับ hash ของ cache มาจากแถวเดียวกัน
+        person = snapshot.row(position)
+        st.session_state["person"] = person
+        rec = snapshot.year_data.person(position)  # ✅ ค่าทุก metric ทุกปี (เตรียมไว้ตอนโหลด snapshot)
+
+    # ✅ ทุกส่วน (BMI ปัสสาวะ ... การได้ยิน) สร้างใน report.py ใช้ร่วมกับรายงานแบบ batch
+    # ✅ เปิดดูคนเดิมซ้ำ (ข้อมูลแถวไม่เปลี่ยน) ใช้ผลที่สร้างไว้แล้วจาก cache
+    show_report(rec, person)
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from health_data import exact_float
+from search_index import parse_keys
+from snapshot_store import frame_column
+from timing import timed
+
+# ===============================
+# BATCH LOOKUP (วางรายการเลขบัตร / HN → ตารางผลปีล่าสุดของทุกคน)
+# ===============================
+# สำหรับวันตรวจนอกสถานที่ / คลินิก: ค้นทุกคีย์ผ่าน LookupIndex ในรอบเดียว
+# แล้วดึงผลแปลของปีล่าสุดที่แต่ละคนมาตรวจจาก year_data ทีเดียวทั้งชุด (fancy index คน × ปี)
+# ไม่เรียกส่วนแสดงผลรายบุคคล (report.py) ทีละคน
+
+# หัวตารางที่มักติดมากับไฟล์ที่อัปโหลด ไม่นับเป็นคีย์
+HEADER_KEYS = {"hn", "id", "เลขบัตรประชาชน", "เลขบัตร"}
+
+PERSON_COLUMNS = ["HN", "เลขบัตรประชาชน", "ชื่อ-สกุล"]
+# (หัวตาราง, metric ใน year_data, ตัวเลขหรือไม่)
+GRID_COLUMNS = [
+    ("BMI", "bmi", True),
+    ("ผล BMI", "bmi_label", False),
+    ("SBP", "sbp", True),
+    ("DBP", "dbp", True),
+    ("ผลความดัน", "bp_label", False),
+    ("FBS", "fbs", True),
+    ("ผล FBS", "fbs_label", False),
+    ("ผลสรุปไขมัน", "lipid_summary", False),
+    ("คำแนะนำ CBC", "cbc_advice", False),
+    ("GFR", "gfr", True),
+    ("ผล GFR", "gfr_label", False),
+]
+# ผลแปลที่นับว่าปกติ / ไม่มีข้อมูล (ที่เหลือนับเป็นรายการที่ต้องดู)
+FLAG_COLUMNS = ["ผล BMI", "ผลความดัน", "ผล FBS", "ผลสรุปไขมัน", "ผล GFR"]
+NORMAL_LABELS = ["ปกติ", "ความดันปกติ", "-", ""]
+
+
+def resolve_keys(snapshot, keys):
+    # → (ตำแหน่งแถวที่พบ, คีย์ที่ใช้ค้นของแต่ละแถว, คีย์ที่ไม่พบ)
+    positions, queries, missing = [], [], []
+    for key, found in zip(keys, snapshot.index.find_keys(keys)):
+        if not found:
+            missing.append(key)
+        positions += found
+        queries += [key] * len(found)
+    return np.asarray(positions, dtype=np.int64), queries, missing
+
+
+def latest_grid(snapshot, positions, queries=None):
+    # 1 แถวต่อคน: ผลของปีล่าสุดที่มาตรวจ (ไม่มีผลตรวจเลย = ช่องว่าง)
+    year_data = snapshot.year_data
+    latest = year_data.latest_examined(positions)
+    examined = latest >= 0
+    year_index = np.where(examined, latest, 0)
+
+    columns = {}
+    if queries is not None:
+        columns["ค้นหาด้วย"] = list(queries)
+    for column in PERSON_COLUMNS:
+        columns[column] = frame_column(snapshot.df, column)[positions]
+    years = np.asarray(year_data.years, dtype=object)[year_index]
+    columns["ปีที่ตรวจล่าสุด"] = np.where(examined, years, None)
+    for title, metric, is_number in GRID_COLUMNS:
+        if is_number:
+            arr = year_data.numbers[metric] if metric in year_data.numbers else year_data.values[metric]
+            columns[title] = np.where(examined, exact_float(arr[positions, year_index]), np.nan)
+        else:
+            columns[title] = np.where(examined, np.asarray(year_data.values[metric][positions, year_index]), "-")
+    grid = pd.DataFrame(columns)
+    grid.insert(
+        len(grid.columns) - len(GRID_COLUMNS),
+        "รายการที่ต้องดู",
+        (~grid[FLAG_COLUMNS].isin(NORMAL_LABELS)).sum(axis=1),
+    )
+    return grid
+
+
+def batch_grid(snapshot, keys):
+    positions, queries, missing = resolve_keys(snapshot, keys)
+    return latest_grid(snapshot, positions, queries), missing
+
+
+# ===============================
+# UI
+# ===============================
+def render_batch_lookup(snapshot):
+    st.markdown("## 📋 ค้นหาหลายคน")
+    st.caption("วางเลขบัตรประชาชน / HN บรรทัดละ 1 คน (หรือคั่นด้วย , ;) หรืออัปโหลดไฟล์ .csv / .txt · แสดงผลปีล่าสุดที่แต่ละคนมาตรวจ")
+    text = st.text_area("เลขบัตรประชาชน / HN", key="batch_keys", height=200)
+    upload = st.file_uploader("หรืออัปโหลดไฟล์", type=["csv", "txt"], key="batch_file")
+    if upload is not None:
+        text += "\n" + upload.getvalue().decode("utf-8-sig", errors="replace")
+    keys = [k for k in parse_keys(text) if k.lower() not in HEADER_KEYS]
+    if not keys:
+        st.info("กรุณาวางรายการเลขบัตรประชาชน / HN หรืออัปโหลดไฟล์")
+        return
+
+    with timed("batch_lookup", keys=len(keys)):
+        grid, missing = batch_grid(snapshot, keys)
+    st.caption(f"พบ {len(grid):,} คน จาก {len(keys):,} รายการ · \"รายการที่ต้องดู\" = จำนวนผล BMI / ความดัน / FBS / ไขมัน / GFR ที่ไม่ปกติ")
+    if missing:
+        shown = ", ".join(missing[:50]) + (f" และอีก {len(missing) - 50:,} รายการ" if len(missing) > 50 else "")
+        st.warning(f"⚠️ ไม่พบ {len(missing):,} รายการ: {shown}")
+    if grid.empty:
+        return
+
+    st.dataframe(grid, hide_index=True, width="stretch")
+    st.download_button(
+        "ดาวน์โหลด (.csv)",
+        data=grid.to_csv(index=False).encode("utf-8-sig"),
+        file_name="batch_lookup.csv",
+        mime="text/csv",
+        on_click="ignore",
+        key="batch_download",
+    )
@@ -0,0 +1,186 @@
+import argparse
+import importlib.util
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from decision_tables import RULES
+from report import REPORT_VERSION, build_report, report_html
+from search_index import LookupIndex
+from sheet_sync import row_fingerprint
+from snapshot import Snapshot
+from snapshot_store import add_source_arguments, load_source
+
+# ===============================
+# BATCH REPORT (รายงานรายบุคคลทั้งหน่วยงาน → ไฟล์ HTML / PDF)
+# ===============================
+# python batch_report.py --all
+# python batch_report.py --ids ids.txt --format pdf --workers 8
+# python batch_report.py 1100000000003 HN001 --source export.csv
+#
+# - ใช้ส่วนแสดงผลเดียวกับหน้าเว็บ (report.py) → รายงานที่พิมพ์ตรงกับหน้าจอ
+# - แบ่งงานให้หลาย process (แต่ละ process โหลด snapshot เองครั้งเดียว)
+# - ข้ามคนที่ข้อมูลไม่เปลี่ยนจากรอบก่อน (เทียบ fingerprint ใน manifest.json: ข้อมูลทั้งแถว + REPORT_VERSION + รุ่นกฎคำแนะนำ)
+# - PDF ต้องติดตั้ง weasyprint เพิ่ม (pip install weasyprint)
+
+MANIFEST_FILE = "manifest.json"
+_UNSAFE_FILENAME = re.compile(r"[^\w\-]+")
+
+_worker = {}
+
+
+def report_filename(person, position, used):
+    # ชื่อไฟล์จาก HN (หรือเลขบัตร) ให้คงที่ข้ามรอบ แม้ลำดับแถวในชีตจะเปลี่ยน
+    key = str(person.get("HN", "")).strip() or str(person.get("เลขบัตรประชาชน", "")).strip() or f"row{position}"
+    name = _UNSAFE_FILENAME.sub("_", key).strip("_") or f"row{position}"
+    if name in used:
+        name = f"{name}_{position}"
+    used.add(name)
+    return name
+
+
+def report_fingerprint(person, output_format):
+    values = [str(v) for v in person.tolist()] + [REPORT_VERSION, RULES.current_version(), output_format]
+    return row_fingerprint(values).hex()
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0)
+    os.replace(path + ".tmp", path)
+
+
+# ===============================
+# WORKER (ทำงานใน process ลูก)
+# ===============================
+def init_worker(source, directory):
+    import matplotlib
+    matplotlib.use("Agg")
+    _worker["snapshot"] = Snapshot(load_source(source, directory))
+
+
+def render_reports(jobs, out_dir, output_format):
+    snapshot = _worker["snapshot"]
+    done = []
+    for position, name, fingerprint in jobs:
+        person = snapshot.row(position)
+        rec = snapshot.year_data.person(position)
+        html = report_html(build_report(rec, person), f"ผลตรวจสุขภาพ {person.get('ชื่อ-สกุล', '')}")
+        path = os.path.join(out_dir, f"{name}.{output_format}")
+        if output_format == "pdf":
+            from weasyprint import HTML
+            HTML(string=html).write_pdf(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        done.append((name, fingerprint))
+    return done
+
+
+# ===============================
+# CLI
+# ===============================
+def select_positions(index, ids):
+    # เลขบัตร หรือ HN → ตำแหน่งแถว (ไม่พบ = แจ้งแล้วข้าม)
+    positions, missing = [], []
+    for value in ids:
+        found = index.find(id_card=value) or index.find(hn=value)
+        if found:
+            positions.extend(found)
+        else:
+            missing.append(value)
+    return sorted(set(positions)), missing
+
+
+def read_ids(values, ids_file):
+    ids = list(values)
+    if ids_file:
+        with open(ids_file, encoding="utf-8-sig") as f:
+            ids.extend(line.strip() for line in f)
+    return [v for v in ids if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างรายงานผลตรวจสุขภาพรายบุคคลแบบ batch")
+    parser.add_argument("ids", nargs="*", help="เลขบัตรประชาชน หรือ HN")
+    parser.add_argument("--ids", dest="ids_file", help="ไฟล์รายชื่อ (1 บรรทัดต่อ 1 คน)")
+    parser.add_argument("--all", action="store_true", help="ทุกคนในข้อมูล")
+    add_source_arguments(parser)
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--format", choices=["html", "pdf"], default="html")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=50, help="จำนวนรายงานต่องานที่ส่งให้ process ลูก")
+    parser.add_argument("--force", action="store_true", help="สร้างใหม่ทั้งหมด ไม่ข้ามรายงานเดิม")
+    args = parser.parse_args(argv)
+
+    if args.format == "pdf":
+        if importlib.util.find_spec("weasyprint") is None:
+            print("❌ การสร้าง PDF ต้องติดตั้ง weasyprint ก่อน (pip install weasyprint)")
+            return 1
+
+    df = load_source(args.source, args.dir)
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุ --source หรือสร้าง snapshot ก่อน)")
+        return 1
+    ids = read_ids(args.ids, args.ids_file)
+    if args.all:
+        positions = list(range(len(df)))
+    elif ids:
+        positions, missing = select_positions(LookupIndex(df), ids)
+        for value in missing:
+            print(f"⚠️ ไม่พบ {value}")
+    else:
+        parser.error("ระบุเลขบัตร / HN, --ids หรือ --all")
+
+    # ✅ ข้ามรายงานที่ข้อมูลไม่เปลี่ยน และไฟล์ยังอยู่
+    os.makedirs(args.out, exist_ok=True)
+    manifest = {} if args.force else load_manifest(args.out)
+    used, jobs = set(), []
+    for position in positions:
+        person = df.iloc[position]
+        name = report_filename(person, position, used)
+        fingerprint = report_fingerprint(person, args.format)
+        path = os.path.join(args.out, f"{name}.{args.format}")
+        if manifest.get(name) == fingerprint and os.path.exists(path):
+            continue
+        jobs.append((position, name, fingerprint))
+
+    skipped = len(positions) - len(jobs)
+    print(f"📄 รายงาน {len(positions)} คน · ข้อมูลไม่เปลี่ยน {skipped} · ต้องสร้าง {len(jobs)} · {args.workers} process")
+    if not jobs:
+        return 0
+
+    chunks = [jobs[i:i + args.chunk] for i in range(0, len(jobs), args.chunk)]
+    start = time.perf_counter()
+    finished = 0
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.source, args.dir)) as pool:
+            futures = [pool.submit(render_reports, chunk, args.out, args.format) for chunk in chunks]
+            for future in as_completed(futures):
+                done = future.result()
+                for name, fingerprint in done:
+                    manifest[name] = fingerprint
+                finished += len(done)
+                elapsed = time.perf_counter() - start
+                print(f"[{finished}/{len(jobs)}] {finished / elapsed:.1f} รายงาน/วินาที · {elapsed:.1f} วินาที", flush=True)
+    finally:
+        save_manifest(args.out, manifest)  # ✅ หยุดกลางคันก็ยังข้ามรายงานที่ทำเสร็จแล้วในรอบถัดไปได้
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ สร้าง {finished} รายงาน → {args.out} · {elapsed:.1f} วินาที ({finished / elapsed:.1f} รายงาน/วินาที)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
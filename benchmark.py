@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+from batch_lookup import batch_grid
+from export import iter_chunks
+from health_schema import YEARS
+from hearing_screen import Audiometry, retest_list
+from lung_screen import Spirometry, worse_list
+from report import SECTIONS, SECTION_TABS, build_report
+from report_cache import ReportCache
+from sheet_sources import ALL_WORKSHEETS, MultiSheetLoader, SheetSource
+from sheet_sync import SheetSync
+from snapshot import Snapshot
+from snapshot_store import SnapshotStore
+from synthetic_sheet import FakeClient, FakeWorksheet, SyntheticSheet
+
+# ===============================
+# BENCHMARK (วัดเวลาแต่ละขั้นด้วยชีตปลอม ไม่ต้องต่อเน็ต)
+# ===============================
+# python benchmark.py                          → 1,000 และ 10,000 คน
+# python benchmark.py --sizes 1000 10000 100000 --no-page
+# python benchmark.py --compare benchmarks/<commit เดิม>.json
+#
+# - ข้อมูลจาก synthetic_sheet (seed คงที่) + ค้นหา/เปิดดูคนชุดเดิมทุกครั้ง → เทียบผลข้าม commit ได้
+# - บันทึกผลเป็น JSON (median / p95 / min เป็นมิลลิวินาที) พร้อม commit และเครื่องที่วัด
+# - page_* = รันทั้งหน้า app.py ผ่าน streamlit AppTest (gspread ถูกแทนด้วย FakeClient)
+# - sources_* = ชีตเดียวกันแบ่งเป็นแผ่นละช่วงปี (หน่วงเวลาเครือข่ายต่อคำขอ --latency) โหลดทีละแผ่น vs พร้อมกัน
+
+DEFAULT_SIZES = [1000, 10000]
+RESULTS_DIR = "benchmarks"
+SLOWER = 1.2  # ช้ากว่าเดิมเกินนี้ → แจ้งเตือนตอนเทียบผล
+
+
+def measure(fn, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times):
+    ms = np.asarray(times) * 1000
+    return {
+        "n": len(ms),
+        "median_ms": round(float(np.median(ms)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "min_ms": round(float(ms.min()), 3),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ===============================
+# STAGES
+# ===============================
+def bench_load(sheet, repeat):
+    results = {}
+    worksheet = FakeWorksheet(sheet)
+
+    syncs = []
+    results["sheet_sync"] = measure(lambda: syncs.append(SheetSync().sync(worksheet)), repeat)
+    sync = SheetSync()
+    sync.sync(worksheet)
+    results["sheet_resync"] = measure(lambda: sync.sync(worksheet), repeat)  # ไม่มีแถวเปลี่ยน
+    df = syncs[-1].df
+
+    snapshots = []
+    results["snapshot_build"] = measure(lambda: snapshots.append(Snapshot(df)), repeat)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(directory)
+        results["store_save"] = measure(lambda: store.save(df), repeat)
+        results["store_load"] = measure(store.load, repeat)
+    return results, snapshots[-1]
+
+
+def bench_sources(size, args):
+    # ✅ แผ่นละช่วงปี (คนชุดเดียวกัน) → รวมด้วยเลขบัตร เทียบโหลดทีละแผ่นกับโหลดพร้อมกัน
+    worksheets = [
+        FakeWorksheet(SyntheticSheet(size, seed=args.seed, years=years, latest=YEARS[-1]),
+                      latency=args.latency, title=f"{years[0]}-{years[-1]}")
+        for years in np.array_split(YEARS, args.sources)
+    ]
+    client = FakeClient(*worksheets)
+    sources = [SheetSource("fake", ALL_WORKSHEETS)]
+    return {
+        "sources_serial": measure(lambda: MultiSheetLoader(sources, max_workers=1).load(client)),
+        "sources_parallel": measure(lambda: MultiSheetLoader(sources).load(client)),
+    }
+
+
+def bench_search(snapshot, queries):
+    rng = random.Random(0)
+    positions = rng.sample(range(len(snapshot)), min(queries, len(snapshot)))
+    rows = snapshot.rows(positions)
+    results = {"search_id": [], "search_hn": [], "search_name": [], "suggest_name": []}
+    for row in rows:
+        name = str(row["ชื่อ-สกุล"])
+        results["search_id"] += measure(lambda: snapshot.find(id_card=row["เลขบัตรประชาชน"]))
+        results["search_hn"] += measure(lambda: snapshot.find(hn=row["HN"]))
+        results["search_name"] += measure(lambda: snapshot.find(full_name=name))
+        results["suggest_name"] += measure(lambda: snapshot.suggest_names(name.split()[-1]))
+    # ✅ หน้าค้นหาหลายคน: ทุกคนที่ใช้วัดการค้นหาในรายการเดียว (สลับเลขบัตร / HN)
+    keys = [str(row["เลขบัตรประชาชน"] if i % 2 else row["HN"]) for i, row in enumerate(rows)]
+    results["batch_lookup"] = measure(lambda: batch_grid(snapshot, keys), 5)
+    return results
+
+
+def bench_population(snapshot):
+    # ✅ งานที่ทำกับทุกคนในครั้งเดียว: คัดกรองการได้ยิน / สมรรถภาพปอด / ผลแปลทุกคนสำหรับ export (ไม่รวมเวลาเขียนไฟล์)
+    return {
+        "hearing_screen": measure(lambda: retest_list(snapshot, audiometry=Audiometry(snapshot.year_data, snapshot.df)), 3),
+        "lung_screen": measure(lambda: worse_list(snapshot, spirometry=Spirometry(snapshot.year_data)), 3),
+        "export_rows": measure(lambda: sum(len(chunk) for chunk in iter_chunks(snapshot))),
+    }
+
+
+def bench_sections(snapshot, positions):
+    results = {f"section_{name}": [] for name, _ in SECTIONS}
+    results["report_uncached"] = []
+    results["report_cached"] = []
+    cache = ReportCache(maxsize=len(positions) * len(SECTIONS))
+    for position in positions:
+        person = snapshot.row(position)
+        rec = snapshot.person_years(person)
+        for name, render in SECTIONS:
+            results[f"section_{name}"] += measure(lambda: render(rec, person))
+        results["report_uncached"] += measure(lambda: build_report(rec, person))
+        cache.report(rec, person)
+        results["report_cached"] += measure(lambda: cache.report(rec, person))
+    return results
+
+
+def bench_page(sheet, ids, app_path):
+    # ✅ รันทั้งหน้าแบบเดียวกับผู้ใช้: เปิดแอป → ค้นหาเลขบัตร → เปิดทุกแท็บ
+    from oauth2client.service_account import ServiceAccountCredentials
+    from streamlit.testing.v1 import AppTest
+    import gspread
+
+    results = {"page_first_load": [], "page_lookup": [], "page_tab": []}
+    client = FakeClient(FakeWorksheet(sheet))
+    with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(ServiceAccountCredentials, "from_json_keyfile_dict", lambda *a, **k: None), \
+            mock.patch.object(gspread, "authorize", lambda credentials, **kwargs: client):
+        at = AppTest.from_file(app_path, default_timeout=600)
+        at.secrets["GCP_SERVICE_ACCOUNT"] = "{}"
+        at.secrets["SNAPSHOT_DIR"] = directory
+        results["page_first_load"] += measure(at.run)
+        if at.exception:
+            raise RuntimeError(f"app.py error: {at.exception[0].value}")
+        for id_card in ids:
+            at.text_input[0].input(id_card)
+            at.button[0].click()
+            results["page_lookup"] += measure(at.run)
+            for title, _ in SECTION_TABS[1:]:
+                at.session_state["report_tab"] = title
+                results["page_tab"] += measure(at.run)
+            at.session_state["report_tab"] = SECTION_TABS[0][0]
+    return results
+
+
+def run_size(size, args):
+    print(f"▶️ {size:,} คน", flush=True)
+    sheet = SyntheticSheet(size, seed=args.seed)
+    timings, snapshot = bench_load(sheet, args.repeat)
+    if args.sources > 1:
+        timings.update(bench_sources(size, args))
+    timings.update(bench_search(snapshot, args.queries))
+    timings.update(bench_population(snapshot))
+
+    rng = random.Random(1)
+    positions = sorted(rng.sample(range(size), min(args.people, size)))
+    timings.update(bench_sections(snapshot, positions))
+    if not args.no_page:
+        ids = [str(snapshot.cell(p, "เลขบัตรประชาชน")) for p in positions[:args.page_people]]
+        timings.update(bench_page(sheet, ids, args.app))
+
+    results = {stage: summarize(times) for stage, times in timings.items() if times}
+    for stage, stats in results.items():
+        print(f"  {stage:<24} median {stats['median_ms']:>10.2f} ms · p95 {stats['p95_ms']:>10.2f} ms · n={stats['n']}")
+    return results
+
+
+# ===============================
+# COMPARE
+# ===============================
+def compare(old, new):
+    print(f"\n📊 เทียบกับ {old['meta']['commit']} → {new['meta']['commit']} (median ms)")
+    for size, stages in new["results"].items():
+        before = old["results"].get(size)
+        if before is None:
+            continue
+        print(f"  {int(size):,} คน")
+        for stage, stats in stages.items():
+            if stage not in before:
+                continue
+            ratio = stats["median_ms"] / before[stage]["median_ms"] if before[stage]["median_ms"] else float("inf")
+            flag = " ⚠️" if ratio > SLOWER else ""
+            print(f"    {stage:<24} {before[stage]['median_ms']:>10.2f} → {stats['median_ms']:>10.2f} ({ratio:.2f}x){flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วัดเวลาโหลดข้อมูล / ค้นหา / ส่วนแสดงผล / ทั้งหน้า ด้วยชีตปลอม")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="จำนวนคนในชีต")
+    parser.add_argument("--repeat", type=int, default=3, help="จำนวนรอบของขั้นโหลดข้อมูล")
+    parser.add_argument("--queries", type=int, default=200, help="จำนวนคนที่ใช้วัดการค้นหา")
+    parser.add_argument("--people", type=int, default=30, help="จำนวนคนที่ใช้วัดส่วนแสดงผล")
+    parser.add_argument("--page-people", type=int, default=5, help="จำนวนคนที่ใช้วัดทั้งหน้า")
+    parser.add_argument("--no-page", action="store_true", help="ไม่วัดทั้งหน้า (AppTest)")
+    parser.add_argument("--sources", type=int, default=4, help="จำนวนแผ่นที่แบ่งปีไว้ (1 = ไม่วัด sources_*)")
+    parser.add_argument("--latency", type=float, default=0.3, help="วินาทีต่อคำขอของแผ่นปลอม (sources_*)")
+    parser.add_argument("--app", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help=f"ไฟล์ผล (ค่าเริ่มต้น {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="ไฟล์ผลเดิมที่ต้องการเทียบ")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "queries": args.queries,
+            "people": args.people,
+            "sources": args.sources,
+            "latency": args.latency,
+        },
+        "results": {str(size): run_size(size, args) for size in args.sizes},
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"✅ บันทึกผล → {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+import io
+import queue
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# ===============================
+# TREND CHARTS (กราฟแนวโน้มรายปี + แถบเกณฑ์แปลผล)
+# ===============================
+# - ทุกกราฟใช้แถบสีตามเกณฑ์เหมือนกราฟ BMI เดิม (เกณฑ์เดียวกับ interpret.py)
+# - ไม่สร้าง figure ใหม่ทุกครั้ง (plt.subplots ช้า): ยืม Figure Agg จากคิว _pool แล้ว clear ก่อนวาด
+#   ไม่ผ่าน pyplot จึงไม่มี state กลางที่ชนกันระหว่าง session
+# - ผลลัพธ์เป็น PNG bytes → report_cache เก็บไว้ตาม (hash ของแถว, ชื่อกราฟ)
+
+CHART_SIZE = (10, 4)
+CHART_DPI = 150
+
+RED = '#D32F2F'
+DEEP_ORANGE = '#FF5722'
+ORANGE = '#FF9900'
+GREEN = '#109618'
+BLUE = '#3366CC'
+
+# ชื่อกราฟ → รายละเอียด
+#   series: [(metric ใน year_data, ชื่อเส้น, สี, scale)]  scale = ตัวคูณก่อนวาด (เช่น % ของค่าสูงสุดปกติ)
+#   bands: [(ล่าง, บน, สี, ชื่อ)]
+CHART_SPECS = {
+    "bmi": {
+        "title": "BMI Over Time",
+        "ylabel": "BMI",
+        "ylim": (15, 40),
+        "series": [("bmi", "BMI", "black", 1)],
+        "bands": [
+            (30, 40, RED, 'Severely Obese'),
+            (25, 30, DEEP_ORANGE, 'Obese'),
+            (23, 25, ORANGE, 'Overweight'),
+            (18.5, 23, GREEN, 'Normal'),
+            (0, 18.5, BLUE, 'Underweight'),
+        ],
+    },
+    "bp": {
+        "title": "Blood Pressure Over Time (bands: SBP)",
+        "ylabel": "mmHg",
+        "ylim": (40, 200),
+        "series": [("sbp_value", "SBP", "black", 1), ("dbp_value", "DBP", "dimgray", 1)],
+        "bands": [
+            (160, 250, RED, 'High'),
+            (140, 160, DEEP_ORANGE, 'Mildly high'),
+            (120, 140, ORANGE, 'Elevated'),
+            (0, 120, GREEN, 'Normal'),
+        ],
+    },
+    "liver": {
+        "title": "Liver Enzymes (% of upper limit: ALP 120, SGOT 36, SGPT 40)",
+        "ylabel": "% of upper limit",
+        "ylim": (0, 300),
+        "series": [
+            ("alp_value", "ALP", "black", 100 / 120),
+            ("sgot_value", "SGOT", "dimgray", 100 / 36),
+            ("sgpt_value", "SGPT", BLUE, 100 / 40),
+        ],
+        "bands": [
+            (100, 1000, RED, 'Above limit'),
+            (0, 100, GREEN, 'Normal'),
+        ],
+    },
+    "uric": {
+        "title": "Uric Acid Over Time",
+        "ylabel": "mg/dL",
+        "ylim": (0, 12),
+        "series": [("uric_value", "Uric acid", "black", 1)],
+        "bands": [
+            (7.2, 100, RED, 'High'),
+            (0, 7.2, GREEN, 'Normal'),
+        ],
+    },
+    "cr": {
+        "title": "Creatinine Over Time",
+        "ylabel": "mg/dL",
+        "ylim": (0, 3),
+        "series": [("cr_value", "Creatinine", "black", 1)],
+        "bands": [
+            (1.2, 100, RED, 'Abnormal'),
+            (0.6, 1.2, GREEN, 'Normal'),
+            (0, 0.6, ORANGE, 'Abnormal (low)'),
+        ],
+    },
+    "gfr": {
+        "title": "Estimated GFR Over Time",
+        "ylabel": "mL/min/1.73m²",
+        "ylim": (0, 150),
+        "series": [("gfr_value", "eGFR", "black", 1)],
+        "bands": [
+            (60, 1000, GREEN, 'Normal'),
+            (0, 60, RED, 'Low'),
+        ],
+    },
+    "fbs": {
+        "title": "Fasting Blood Sugar Over Time",
+        "ylabel": "mg/dL",
+        "ylim": (50, 250),
+        "series": [("fbs_value", "FBS", "black", 1)],
+        "bands": [
+            (126, 1000, RED, 'High'),
+            (106, 126, DEEP_ORANGE, 'Mildly high'),
+            (100, 106, ORANGE, 'Borderline'),
+            (0, 100, GREEN, 'Normal'),
+        ],
+    },
+    "lipids": {
+        "title": "Blood Lipids Over Time (bands: CHOL)",
+        "ylabel": "mg/dL",
+        "ylim": (0, 400),
+        "series": [
+            ("chol_value", "CHOL", "black", 1),
+            ("tgl_value", "TGL", "dimgray", 1),
+            ("ldl_value", "LDL", BLUE, 1),
+            ("hdl_value", "HDL", GREEN, 1),
+        ],
+        "bands": [
+            (250, 1000, RED, 'High'),
+            (200, 250, ORANGE, 'Borderline'),
+            (0, 200, GREEN, 'Normal'),
+        ],
+    },
+}
+
+# ✅ Figure ที่สร้างแล้วใช้ซ้ำข้ามการ rerun / session (Streamlit สร้าง thread ใหม่ทุก rerun
+# จึงเก็บต่อ thread ไม่ได้) ยืมออกจากคิวตอนวาด แล้วคืนเมื่อเสร็จ → จำนวน Figure ไม่เกินจำนวนที่วาดพร้อมกัน
+_pool = queue.SimpleQueue()
+
+
+def _take_figure():
+    try:
+        fig = _pool.get_nowait()
+    except queue.Empty:
+        fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+        FigureCanvasAgg(fig)
+    fig.clear()
+    return fig
+
+
+def chart_series(rec, spec, years=None):
+    # ปีที่มีค่าอย่างน้อย 1 เส้น (ค่าว่าง / 0 = ไม่มีข้อมูล เหมือนตาราง) → (ปี, {ชื่อเส้น: ค่า})
+    years = years or rec.years
+    values = {}
+    for metric, label, _, scale in spec["series"]:
+        row = np.array([rec.get(metric, y, np.nan) for y in years], dtype=float) * scale
+        row[~(row > 0)] = np.nan
+        values[label] = row
+    has_data = np.logical_or.reduce([~np.isnan(v) for v in values.values()])
+    shown = [y for y, ok in zip(years, has_data) if ok]
+    return shown, {label: v[has_data] for label, v in values.items()}
+
+
+def render_chart(name, rec):
+    # คืน PNG bytes หรือ None ถ้าไม่มีข้อมูลเลย
+    spec = CHART_SPECS[name]
+    years, values = chart_series(rec, spec)
+    if not years:
+        return None
+
+    fig = _take_figure()
+    try:
+        ax = fig.add_subplot()
+        for low, high, color, label in spec["bands"]:
+            ax.axhspan(low, high, facecolor=color, alpha=0.3, label=label)
+
+        x = np.arange(len(years))
+        for _, label, color, _ in spec["series"]:
+            ax.plot(x, values[label], marker='o', color=color, linewidth=2, label=label)
+        ax.set_xticks(x)
+        ax.set_xticklabels([f"B.E. {y}" for y in years])
+        ax.set_ylabel(spec["ylabel"], fontsize=12)
+        ax.set_ylim(*spec["ylim"])
+        ax.set_title(spec["title"], fontsize=14)
+        ax.legend(loc="upper left", fontsize=8, ncol=2)
+        fig.subplots_adjust(left=0.07, right=0.98, top=0.9, bottom=0.1)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        _pool.put(fig)
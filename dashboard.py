@@ -0,0 +1,64 @@
+import pandas as pd
+import streamlit as st
+
+from population import CATEGORIES, HEADLINES, SEXES
+
+# ===============================
+# DASHBOARD (ภาพรวมสุขภาพทั้งหน่วยงาน)
+# ===============================
+# อ่านจาก snapshot.population ที่นับไว้แล้วตอนโหลดข้อมูล
+# เปลี่ยนตัวกรอง (ปี / เพศ / หมวด) แค่รวมตารางนับใหม่ ไม่สแกนข้อมูลรายคน
+
+
+def percent_table(table):
+    # แสดงเป็น "12.5%" และ "-" เมื่อไม่มีผู้ตรวจ
+    return table.apply(lambda col: col.map(lambda v: "-" if pd.isna(v) else f"{v}%"))
+
+
+def render_dashboard(snapshot):
+    stats = snapshot.population
+
+    st.markdown("## 📊 ภาพรวมสุขภาพ")
+    st.caption(f"จำนวนผู้รับบริการทั้งหมด {len(snapshot):,} คน · ร้อยละคิดจากผู้ที่มีผลตรวจในปีนั้น")
+
+    col1, col2 = st.columns(2)
+    years = col1.multiselect("ปี พ.ศ.", stats.years, default=stats.years, key="dashboard_years")
+    sexes = col2.multiselect("เพศ", SEXES, default=SEXES, key="dashboard_sexes")
+    years = sorted(years)
+    if not years or not sexes:
+        st.info("กรุณาเลือกปีและเพศอย่างน้อย 1 รายการ")
+        return
+
+    # ===== ตัวชี้วัดหลัก =====
+    st.markdown("### 📌 ตัวชี้วัดหลัก (ร้อยละ)")
+    headline = stats.headline(sexes, years)
+    st.markdown(percent_table(headline).to_html(escape=False), unsafe_allow_html=True)
+
+    # ✅ กราฟของ Streamlit จากตารางที่รวมแล้ว (ไม่ใช้ pyplot กลางที่ใช้ร่วมกันทุก session)
+    trend = headline.set_axis([chart_label for _, chart_label, _, _ in HEADLINES]).T.astype(float)
+    trend.index = [str(y) for y in years]
+    st.line_chart(trend, x_label="ปี พ.ศ.", y_label="ร้อยละ")
+
+    # ===== รายหมวด =====
+    st.markdown("### 🔍 รายละเอียดตามหมวด")
+    metric = st.selectbox(
+        "หมวด",
+        stats.metrics,
+        format_func=lambda m: CATEGORIES[m],
+        key="dashboard_metric",
+    )
+
+    counts = stats.table(metric, sexes, years)
+    prevalence = stats.prevalence(metric, sexes, years)
+    cells = percent_table(prevalence)
+    for label in cells.index:
+        cells.loc[label] = [f"{counts.loc[label, y]:,}<br><span style='font-size:13px;color:gray;'>{cells.loc[label, y]}</span>" for y in years]
+    cells.loc["ตรวจทั้งหมด"] = [f"{v:,}" for v in counts.loc["ตรวจทั้งหมด"]]
+    st.markdown(cells.to_html(escape=False), unsafe_allow_html=True)
+
+    # ===== แยกตามเพศ (ปีล่าสุดที่เลือก) =====
+    year = years[-1]
+    by_sex = stats.by_sex(metric, year, sexes)
+    if not by_sex.empty:
+        st.markdown(f"#### แยกตามเพศ ปี {year} (ร้อยละ)")
+        st.markdown(percent_table(by_sex).to_html(escape=False), unsafe_allow_html=True)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+# ===============================
+# SNAPSHOT CACHE (TTL + stale-while-revalidate)
+# ===============================
+# เก็บข้อมูลชุดเดียวไว้ใน process ให้ทุก session ใช้ร่วมกัน
+# - โหลดครั้งแรกแบบรอจนเสร็จ
+# - เมื่อหมดอายุ (TTL) ยังคืนข้อมูลเดิมไปก่อน แล้วโหลดใหม่ใน thread เบื้องหลัง
+# - ถ้าโหลดเบื้องหลังล้มเหลว เก็บ error ไว้และใช้ข้อมูลเดิมต่อ
+
+
+class SnapshotCache:
+    def __init__(self, loader, ttl=300):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+        self._loaded_at = None
+        self._next_refresh_at = None
+        self._refreshing = False
+        self.last_error = None
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def refreshing(self):
+        return self._refreshing
+
+    def age(self):
+        if self._loaded_at is None:
+            return None
+        return time.time() - self._loaded_at
+
+    def is_stale(self):
+        return self._next_refresh_at is None or time.time() >= self._next_refresh_at
+
+    def seed(self, data, loaded_at):
+        # ✅ ใส่ข้อมูลเก่า (เช่น snapshot จากดิสก์) ให้ใช้ได้ทันที แล้วให้ get() ครั้งถัดไปโหลดใหม่เบื้องหลัง
+        with self._lock:
+            if self._data is None:
+                self._data = data
+                self._loaded_at = loaded_at
+                self._next_refresh_at = None
+
+    def get(self):
+        # ✅ ยังไม่เคยโหลด → ต้องรอโหลดให้เสร็จ (error จะถูกส่งต่อให้ผู้เรียก)
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._store(self._loader())
+            return self._data
+
+        # ✅ หมดอายุ → คืนข้อมูลเดิมทันที แล้วเริ่มโหลดใหม่เบื้องหลัง
+        if self.is_stale():
+            self.refresh_async()
+        return self._data
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        thread = threading.Thread(target=self._refresh_worker, name="sheet-refresh", daemon=True)
+        thread.start()
+        return True
+
+    def refresh(self):
+        data = self._loader()
+        with self._lock:
+            self._store(data)
+        return data
+
+    def _refresh_worker(self):
+        try:
+            data = self._loader()
+            with self._lock:
+                self._store(data)
+        except Exception as e:
+            self.last_error = e
+            # ⏳ เลื่อนเวลาโหลดครั้งถัดไปออกไปอีก 1 TTL ไม่ให้ยิง API ซ้ำทุก rerun
+            self._next_refresh_at = time.time() + self.ttl
+        finally:
+            self._refreshing = False
+
+    def _store(self, data):
+        self._data = data
+        self._loaded_at = time.time()
+        self._next_refresh_at = self._loaded_at + self.ttl
+        self.last_error = None
+
+
+def format_age(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} วินาที"
+    if seconds < 3600:
+        return f"{seconds // 60} นาที"
+    return f"{seconds // 3600} ชั่วโมง {seconds % 3600 // 60} นาที"
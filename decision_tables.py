@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# DECISION TABLES (กฎคำแนะนำเป็นข้อมูล → ตาราง lookup)
+# ===============================
+# python decision_tables.py                          (รายชื่อตาราง)
+# python decision_tables.py cbc_advice --out cbc.csv  (ทุกชุดค่า + กฎข้อที่ใช้ สำหรับเทียบกับสูตร Excel)
+#
+# กฎคำแนะนำ (CBC / ปัสสาวะ / ตับ / ปอด) อยู่ใน advice_rules.json แต่ละตาราง:
+#   inputs  ชื่อ input ตามลำดับอาร์กิวเมนต์
+#   vocab   ค่าที่เป็นไปได้ของแต่ละ input (ผลแปลจาก interpret_engine) → ใช้ compile
+#   rules   ไล่จากบนลงล่าง ข้อแรกที่ตรง = ผล (then) ไม่ตรงเลย = default
+#           {"when": {input: เงื่อนไข}}              ทุก input ที่ระบุต้องตรง
+#           {"all": เงื่อนไข, "of": [input ...]}     ทุก input (ไม่ระบุ of = ทุกตัว) ต้องตรง
+#           {"any": เงื่อนไข, "of": [input ...]}     มี input ใดตรง
+#   เงื่อนไข: "ข้อความ" (เท่ากับ) หรือ {"in": [...], "contains": "...", "contains_any": [...], "not_contains": "..."}
+#            (หลาย key = ต้องตรงทุกข้อ)
+#   note    (ไม่บังคับ) คำอธิบายกฎ แสดงในตารางตรวจสอบ
+#   strip   ตัดช่องว่างหน้า/หลัง input ก่อนตรวจ
+#
+# compile: ประเมินกฎกับทุกชุดค่าใน vocab ไว้ล่วงหน้าเป็น array (input1, input2, ...)
+# → ทั้งหน่วยงานใช้ fancy index ครั้งเดียว, ค่าที่ไม่อยู่ใน vocab ประเมินกฎตรง ๆ (จำผลไว้)
+# แก้ไฟล์แล้วมีผลทันทีโดยไม่ต้อง restart (ตรวจเวลาแก้ไฟล์ทุก RELOAD_CHECK_SECONDS)
+# RULES.version = hash ของเนื้อหาไฟล์ → ใช้ในคีย์ report_cache / fingerprint ของ batch_report
+# ผลแปลใน snapshot เปลี่ยนตามเมื่อสร้าง snapshot รอบถัดไป (โหลดข้อมูลใหม่)
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "advice_rules.json")
+RELOAD_CHECK_SECONDS = 1.0
+CONDITION_KEYS = {"in", "contains", "contains_any", "not_contains"}
+
+
+def _condition(spec):
+    # เงื่อนไขใน JSON → ฟังก์ชัน value → bool
+    if not isinstance(spec, dict):
+        return lambda value: value == spec
+    unknown = set(spec) - CONDITION_KEYS
+    if unknown:
+        raise ValueError(f"ไม่รู้จักเงื่อนไข {', '.join(sorted(unknown))}")
+    checks = []
+    if "in" in spec:
+        choices = list(spec["in"])
+        checks.append(lambda value: value in choices)
+    if "contains" in spec:
+        checks.append(lambda value: isinstance(value, str) and spec["contains"] in value)
+    if "contains_any" in spec:
+        checks.append(lambda value: isinstance(value, str) and any(s in value for s in spec["contains_any"]))
+    if "not_contains" in spec:
+        checks.append(lambda value: not (isinstance(value, str) and spec["not_contains"] in value))
+    return lambda value: all(check(value) for check in checks)
+
+
+class DecisionTable:
+    def __init__(self, name, spec):
+        self.name = name
+        self.description = spec.get("description", "")
+        self.inputs = list(spec["inputs"])
+        self.strip = bool(spec.get("strip", False))
+        self.default = spec.get("default", "-")
+        self.rules = [self._rule(i, rule) for i, rule in enumerate(spec["rules"], start=1)]
+        self.notes = [rule.get("note", "") for rule in spec["rules"]]
+        self._memo = {}
+
+        # ===== compile: ผลของทุกชุดค่าใน vocab =====
+        vocab = spec.get("vocab", {})
+        missing = [name for name in self.inputs if name not in vocab]
+        if missing:
+            raise ValueError(f"{self.name}: ไม่มี vocab ของ {', '.join(missing)}")
+        self.vocab = [list(vocab[name]) for name in self.inputs]
+        self._indexes = [pd.Index(values, dtype=object) for values in self.vocab]
+        shape = tuple(len(values) for values in self.vocab)
+        self.compiled = np.empty(shape, dtype=object)
+        self.matched = np.zeros(shape, dtype=np.int16)  # กฎข้อที่ใช้ (0 = default)
+        for codes in itertools.product(*(range(n) for n in shape)):
+            values = [v[c] for v, c in zip(self.vocab, codes)]
+            self.matched[codes], self.compiled[codes] = self._match(values)
+
+    def _rule(self, number, rule):
+        where = f"{self.name} กฎข้อ {number}"
+        if "then" not in rule:
+            raise ValueError(f"{where}: ไม่มี then")
+        kinds = [k for k in ("when", "all", "any") if k in rule]
+        if len(kinds) != 1:
+            raise ValueError(f"{where}: ต้องมี when / all / any อย่างใดอย่างหนึ่ง")
+        kind = kinds[0]
+        if kind == "when":
+            unknown = set(rule["when"]) - set(self.inputs)
+            if unknown:
+                raise ValueError(f"{where}: ไม่มี input {', '.join(sorted(unknown))}")
+            checks = [(self.inputs.index(name), _condition(spec)) for name, spec in rule["when"].items()]
+            return lambda values: all(check(values[i]) for i, check in checks), rule["then"]
+        of = rule.get("of", self.inputs)
+        unknown = set(of) - set(self.inputs)
+        if unknown:
+            raise ValueError(f"{where}: ไม่มี input {', '.join(sorted(unknown))}")
+        positions = [self.inputs.index(name) for name in of]
+        check = _condition(rule[kind])
+        quantifier = all if kind == "all" else any
+        return lambda values: quantifier(check(values[i]) for i in positions), rule["then"]
+
+    def _match(self, values):
+        # → (กฎข้อที่ใช้, ผล) ไล่กฎจากบนลงล่าง
+        if self.strip:
+            values = [v.strip() if isinstance(v, str) else v for v in values]
+        for number, (test, result) in enumerate(self.rules, start=1):
+            if test(values):
+                return number, result
+        return 0, self.default
+
+    def __call__(self, *values):
+        # ค่าเดียว (ใช้ใน interpret.py) → ผล
+        key = tuple(values)
+        if key not in self._memo:
+            self._memo[key] = self._match(values)[1]
+        return self._memo[key]
+
+    def lookup(self, *arrays):
+        # ทั้ง array (ขนาดเดียวกันหรือ broadcast ได้) → ผลขนาดเดียวกัน
+        shape = np.broadcast_shapes(*(np.shape(a) for a in arrays))
+        flats = [np.broadcast_to(np.asarray(a, dtype=object), shape).ravel() for a in arrays]
+        codes = []
+        for index, flat in zip(self._indexes, flats):
+            # ✅ แปลงเฉพาะค่าที่ไม่ซ้ำเป็นตำแหน่งใน vocab แล้วกระจายกลับ (-1 = ไม่อยู่ใน vocab)
+            positions, uniques = pd.factorize(flat, use_na_sentinel=False)
+            codes.append(index.get_indexer(uniques)[positions])
+        known = np.logical_and.reduce([c >= 0 for c in codes])
+        out = np.empty(len(known), dtype=object)
+        out[known] = self.compiled[tuple(c[known] for c in codes)]
+        for i in np.flatnonzero(~known):
+            out[i] = self(*(flat[i] for flat in flats))
+        return out.reshape(shape)
+
+    def audit(self):
+        # ทุกชุดค่าใน vocab + กฎข้อที่ใช้ + ผล (1 แถวต่อชุดค่า)
+        rows = itertools.product(*self.vocab)
+        table = pd.DataFrame(list(rows), columns=self.inputs)
+        table["กฎข้อ"] = self.matched.ravel()
+        table["ผล"] = self.compiled.ravel()
+        table["หมายเหตุ"] = [self.notes[n - 1] if n else "" for n in table["กฎข้อ"]]
+        return table
+
+
+class RuleBook:
+    def __init__(self, path=RULES_PATH, check_every=RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.check_every = check_every
+        self.tables = {}
+        self.mtime = None
+        self.version = None
+        self.loaded_at = None
+        self.last_error = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload(raise_errors=True)
+
+    def reload(self, raise_errors=False):
+        # อ่านไฟล์ใหม่ทั้งไฟล์ ผิดพลาด = ใช้ตารางเดิมต่อ (ครั้งแรกต้องโหลดได้)
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path, "rb") as f:
+                    content = f.read()
+                specs = json.loads(content.decode("utf-8"))
+                tables = {name: DecisionTable(name, spec) for name, spec in specs.items()}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = e
+                if raise_errors:
+                    raise
+                return False
+            self.tables = tables
+            self.mtime = mtime
+            self.version = hashlib.sha1(content).hexdigest()[:12]
+            self.loaded_at = time.time()
+            self.last_error = None
+            return True
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_every:
+            return
+        self._checked_at = now
+        try:
+            changed = os.stat(self.path).st_mtime_ns != self.mtime
+        except OSError as e:
+            self.last_error = e
+            return
+        if changed:
+            self.reload()
+
+    def current_version(self):
+        # รุ่นของกฎที่ใช้อยู่ (ตรวจไฟล์ก่อน เหมือน table)
+        self._maybe_reload()
+        return self.version
+
+    def table(self, name):
+        self._maybe_reload()
+        return self.tables[name]
+
+
+RULES = RuleBook()
+
+
+# ===============================
+# CLI
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ตารางกฎคำแนะนำ (advice_rules.json)")
+    parser.add_argument("table", nargs="?", help="ชื่อตารางที่ต้องการดูทุกชุดค่า")
+    parser.add_argument("--rules", default=RULES_PATH, help="ไฟล์กฎ")
+    parser.add_argument("--out", help="ไฟล์ CSV")
+    args = parser.parse_args(argv)
+
+    book = RuleBook(args.rules)
+    if not args.table:
+        for name, table in book.tables.items():
+            print(f"{name} ({', '.join(table.inputs)}) · {len(table.rules)} กฎ · {table.compiled.size:,} ชุดค่า · {table.description}")
+        return 0
+    if args.table not in book.tables:
+        print(f"❌ ไม่พบตาราง {args.table} (มี: {', '.join(book.tables)})")
+        return 1
+    table = book.tables[args.table].audit()
+    if args.out:
+        table.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ {len(table):,} ชุดค่า → {args.out}")
+    else:
+        print(table.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from health_data import exact_float
+from health_schema import HEARING_FREQS
+from hearing_screen import Audiometry
+from snapshot import Snapshot
+from snapshot_store import add_source_arguments, frame_column, load_source
+
+# ===============================
+# EXPORT (ผลแปลทุกคน → CSV / Excel / Parquet)
+# ===============================
+# python export.py results.xlsx
+# python export.py results.parquet --source export.csv --chunk 5000
+#
+# - 1 แถวต่อคนต่อปี (เฉพาะปีที่มีผลตรวจอย่างน้อย 1 รายการ) ใช้ผลแปลเดียวกับหน้าเว็บ
+#   (ผลแปลคำนวณไว้แล้วใน snapshot ดู interpret_engine, การได้ยินใช้ hearing_screen.Audiometry)
+# - สร้างและเขียนทีละ chunk (จำนวนคน) → หน่วยความจำที่ใช้เพิ่มคงที่ ไม่ขึ้นกับจำนวนคนทั้งหมด
+# - Excel ต้องติดตั้ง openpyxl เพิ่ม (pip install openpyxl) เกิน 1,048,575 แถวจะขึ้นแผ่นใหม่
+# - ปุ่มดาวน์โหลดในหน้าประสิทธิภาพระบบต้องเก็บทั้งไฟล์ไว้ในหน่วยความจำ → จำกัด DOWNLOAD_MAX_PEOPLE คน
+#   มากกว่านั้นใช้ CLI นี้ (เขียนลงไฟล์ทีละ chunk)
+
+DEFAULT_CHUNK = 2000  # จำนวนคนต่อ chunk
+XLSX_MAX_ROWS = 1048575  # ไม่รวมหัวตาราง
+DOWNLOAD_MAX_PEOPLE = 20000  # ปุ่มดาวน์โหลดในแอป
+FORMATS = ("csv", "xlsx", "parquet")
+
+PERSON_COLUMNS = ["เลขบัตรประชาชน", "HN", "ชื่อ-สกุล", "เพศ"]
+
+# ชื่อคอลัมน์ในไฟล์ → metric ใน year_data (ตัวเลขใช้ numbers, ผลแปลใช้ values)
+NUMBER_COLUMNS = {
+    "น้ำหนัก (กก.)": "weight",
+    "ส่วนสูง (ซม.)": "height",
+    "รอบเอว (ซม.)": "waist",
+    "SBP": "sbp",
+    "DBP": "dbp",
+}
+LABEL_COLUMNS = {
+    "BMI": "bmi",
+    "ผล BMI": "bmi_label",
+    "ผลรอบเอว": "waist_label",
+    "ผลความดัน": "bp_label",
+    "ผลปัสสาวะ": "urine_result",
+    "คำแนะนำปัสสาวะ": "urine_advice",
+    "อุจจาระทั่วไป": "stool_exam_label",
+    "เพาะเชื้ออุจจาระ": "stool_cs_label",
+    "เม็ดเลือดขาว (WBC)": "cbc_wbc_label",
+    "ความเข้มข้นของเลือด (Hb)": "hb_label",
+    "เกล็ดเลือด (Plt)": "plt_label",
+    "คำแนะนำ CBC": "cbc_advice",
+    "ผลสรุปตับ": "liver_summary",
+    "คำแนะนำตับ": "liver_advice",
+    "กรดยูริค": "uric_label",
+    "Creatinine": "cr_label",
+    "GFR": "gfr_label",
+    "น้ำตาลในเลือด (FBS)": "fbs_label",
+    "ผลสรุปไขมัน": "lipid_summary",
+    "เอกซเรย์ทรวงอก": "cxr",
+    "คลื่นไฟฟ้าหัวใจ": "ekg",
+    "ผลสรุปสมรรถภาพปอด": "lung_summary",
+    "คำแนะนำสมรรถภาพปอด": "lung_advice",
+    "ผลสรุปสายตา": "eye_summary_short",
+}
+HEARING_COLUMN = "ผลการได้ยิน"
+BASELINE_COLUMNS = [f"{ear}{freq}B" for ear in ("L", "R") for freq in HEARING_FREQS]
+
+
+def _text(arr):
+    arr = np.asarray(arr, dtype=object)
+    return np.where(arr == None, "", arr)  # noqa: E711 (เทียบทีละช่อง)
+
+
+# ===============================
+# ROWS (ทีละ chunk)
+# ===============================
+def hearing_text(year_data, df, start, stop):
+    # ผลการได้ยินรายปี (หลายบรรทัดรวมด้วย " / ") ของทั้ง chunk ในรอบเดียว (ข้อความเดียวกับ report.hearing_results)
+    return np.frompyfunc(" / ".join, 1, 1)(Audiometry(year_data, df, slice(start, stop)).results_text())
+
+
+def iter_chunks(snapshot, chunk=DEFAULT_CHUNK):
+    # DataFrame ทีละ chunk คน (1 แถวต่อคนต่อปีที่มาตรวจ) ลำดับเดียวกับในชีต
+    year_data = snapshot.year_data
+    years = np.asarray(year_data.years)
+    people = {col: frame_column(snapshot.df, col) for col in PERSON_COLUMNS}
+    for start in range(0, len(snapshot), chunk):
+        stop = min(start + chunk, len(snapshot))
+        person_pos, year_pos = np.nonzero(year_data.examined(slice(start, stop)))
+        columns = {col: values[start:stop][person_pos] for col, values in people.items()}
+        columns["ปี พ.ศ."] = years[year_pos]
+        for col, metric in NUMBER_COLUMNS.items():
+            columns[col] = exact_float(year_data.numbers[metric][start:stop])[person_pos, year_pos]
+        for col, metric in LABEL_COLUMNS.items():
+            arr = year_data.values[metric][start:stop]
+            if np.asarray(arr).dtype.kind == "f":
+                columns[col] = exact_float(arr)[person_pos, year_pos]
+            else:
+                columns[col] = _text(arr)[person_pos, year_pos]
+        hearing = hearing_text(year_data, snapshot.df, start, stop)
+        columns[HEARING_COLUMN] = hearing[person_pos, year_pos]
+        yield pd.DataFrame(columns)
+
+
+# ===============================
+# WRITERS
+# ===============================
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")  # BOM → Excel อ่านภาษาไทยได้
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            # schema จาก chunk แรก ใช้กับทุก chunk (ไฟล์เดียว หลาย row group)
+            self.writer = pq.ParquetWriter(self.path, table.schema.remove_metadata())
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)  # ✅ เขียนทีละแถวลงไฟล์ ไม่เก็บทั้งแผ่นในหน่วยความจำ
+        self.sheet = None
+        self.rows = 0
+        self.columns = None
+
+    def _new_sheet(self):
+        self.sheet = self.workbook.create_sheet(f"ผลตรวจ {len(self.workbook.worksheets) + 1}")
+        self.sheet.append(self.columns)
+        self.rows = 0
+
+    def write(self, chunk):
+        if self.sheet is None:
+            self.columns = list(chunk.columns)
+            self._new_sheet()
+        for row in chunk.itertuples(index=False, name=None):
+            if self.rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.append([None if isinstance(v, float) and v != v else v for v in row])
+            self.rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.workbook.create_sheet("ผลตรวจ 1")
+        self.workbook.save(self.path)
+
+
+WRITERS = {"csv": CsvWriter, "xlsx": XlsxWriter, "parquet": ParquetWriter}
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# แพ็กเกจที่ writer แต่ละแบบต้องใช้ (csv ไม่ต้องใช้เพิ่ม)
+REQUIRED_PACKAGES = {"xlsx": "openpyxl", "parquet": "pyarrow"}
+
+
+def available_formats():
+    # รูปแบบที่สร้างได้ในเครื่องนี้ (ติดตั้งแพ็กเกจที่ต้องใช้แล้ว)
+    return [fmt for fmt in FORMATS if fmt not in REQUIRED_PACKAGES or importlib.util.find_spec(REQUIRED_PACKAGES[fmt])]
+
+
+def export_format(path):
+    return os.path.splitext(path)[1].lower().lstrip(".")
+
+
+def export_results(snapshot, path, fmt=None, chunk=DEFAULT_CHUNK, progress=None):
+    # เขียนผลแปลทุกคนลงไฟล์ → จำนวนแถว (progress(คนที่ทำแล้ว, ทั้งหมด) เรียกหลังแต่ละ chunk)
+    fmt = fmt or export_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"ไม่รองรับไฟล์ .{fmt} (ใช้ได้: {', '.join(FORMATS)})")
+    writer = WRITERS[fmt](path)
+    rows = 0
+    try:
+        for i, frame in enumerate(iter_chunks(snapshot, chunk)):
+            writer.write(frame)
+            rows += len(frame)
+            if progress:
+                progress(min((i + 1) * chunk, len(snapshot)), len(snapshot))
+    finally:
+        writer.close()
+    return rows
+
+
+def export_bytes(snapshot, fmt):
+    # สำหรับปุ่มดาวน์โหลดในแอป: เขียนลงไฟล์ชั่วคราวทีละ chunk แล้วอ่านไฟล์ที่เสร็จแล้วกลับมา
+    if len(snapshot) > DOWNLOAD_MAX_PEOPLE:
+        raise ValueError(f"ข้อมูล {len(snapshot):,} คน เกิน {DOWNLOAD_MAX_PEOPLE:,} คน ใช้ python export.py แทน")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"export.{fmt}")
+        export_results(snapshot, path, fmt)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ส่งออกผลแปลผลตรวจสุขภาพทุกคน (1 แถวต่อคนต่อปี)")
+    parser.add_argument("out", help="ไฟล์ผลลัพธ์ .csv / .xlsx / .parquet")
+    add_source_arguments(parser)
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="จำนวนคนต่อ chunk")
+    args = parser.parse_args(argv)
+
+    fmt = export_format(args.out)
+    if fmt not in WRITERS:
+        parser.error(f"ไม่รองรับไฟล์ .{fmt} (ใช้ได้: {', '.join(FORMATS)})")
+    if fmt not in available_formats():
+        package = REQUIRED_PACKAGES[fmt]
+        print(f"❌ การสร้างไฟล์ .{fmt} ต้องติดตั้ง {package} ก่อน (pip install {package})")
+        return 1
+
+    df = load_source(args.source, args.dir)
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุ --source หรือสร้าง snapshot ก่อน)")
+        return 1
+
+    start = time.perf_counter()
+    snapshot = Snapshot(df)
+    print(f"📦 เตรียมข้อมูล {len(snapshot):,} คน · {time.perf_counter() - start:.1f} วินาที")
+
+    start = time.perf_counter()
+    rows = export_results(
+        snapshot, args.out, fmt, args.chunk,
+        progress=lambda done, total: print(f"[{done:,}/{total:,}] {time.perf_counter() - start:.1f} วินาที", flush=True),
+    )
+    print(f"✅ {rows:,} แถว → {args.out} · {time.perf_counter() - start:.1f} วินาที")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
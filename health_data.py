@@ -0,0 +1,261 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from health_schema import COALESCED_METRICS, HEARING_METRICS, METRICS, NUMERIC_METRICS, SchemaRegistry
+
+# ===============================
+# YEAR DATA (คน × ปี × metric)
+# ===============================
+# แปลงตารางแบบกว้าง (1 คอลัมน์ต่อ metric ต่อปี) เป็น array ต่อ metric ขนาด (จำนวนคน, จำนวนปี)
+# สร้างครั้งเดียวต่อ snapshot แล้วทุกส่วนแสดงผลอ่านค่าด้วยตำแหน่ง ไม่ต้องต่อชื่อคอลัมน์ทุกครั้ง
+# ค่าที่ไม่มีคอลัมน์ในชีตจะเป็น "" (เหมือน person.get(col, "") แบบเดิม)
+# ปี / ชื่อคอลัมน์จริงของแต่ละ (metric, ปี) มาจาก SchemaRegistry (health_schema) ที่สร้างครั้งเดียวต่อ snapshot
+#
+# แปลงชนิดข้อมูลครั้งเดียวตอนสร้าง (ส่วนแสดงผล/แปลผลไม่ต้อง str() / strip() / float() ซ้ำทุกช่อง)
+# - NUMERIC_METRICS / HEARING_METRICS → numbers[metric] เป็น float (NaN = ว่าง/อ่านไม่ได้) ส่วน values เก็บค่าดิบไว้แสดงผล
+# - metric อื่น → values เป็นข้อความที่ตัดช่องว่างแล้ว ("" = ว่าง)
+# - ช่องที่มีค่าแต่อ่านเป็นตัวเลขไม่ได้ นับแยกตามคอลัมน์ใน parse_failures (ดูในหน้าประสิทธิภาพระบบ)
+
+
+def _is_blank(values):
+    return to_text(values) == ""
+
+
+def to_float(arr):
+    values = pd.to_numeric(pd.Series(np.asarray(arr, dtype=object).ravel()), errors="coerce")
+    return values.to_numpy(dtype=float).reshape(np.shape(arr))
+
+
+def exact_float(arr):
+    # float32 ใน snapshot ที่บีบอัดแล้ว → float ที่ตรงกับค่าที่กรอก (199.1 ไม่ใช่ 199.10000610351562)
+    arr = np.asarray(arr)
+    if arr.dtype != np.float32:
+        return arr.astype(float)
+    out = arr.astype(float)
+    # ✅ จำนวนเต็ม (dB, mmHg ส่วนใหญ่) แปลงตรงได้เลย ผ่านข้อความเฉพาะค่าที่มีทศนิยม
+    fraction = np.isfinite(out) & (out != np.round(out))
+    out[fraction] = arr[fraction].astype(str).astype(float)
+    return out
+
+
+def to_text(arr):
+    # เหมือน str(value).strip() ทีละช่อง (None → "") แต่แปลง/ตัดช่องว่างทั้ง array ในครั้งเดียว
+    flat = np.asarray(arr, dtype=object).ravel()
+    text = np.char.strip(flat.astype(str)).astype(object)
+    text[flat == None] = ""  # noqa: E711 (เทียบทีละช่อง)
+    return text.reshape(np.shape(arr))
+
+
+def _deep_nbytes(arr):
+    # ขนาด array + ขนาด object ที่ต่างกันทั้งหมดที่อ้างถึง (object ที่ใช้ร่วมกันนับครั้งเดียว)
+    if arr.dtype != object:
+        return arr.nbytes
+    seen = {}
+    for v in arr.ravel():
+        if id(v) not in seen:
+            seen[id(v)] = sys.getsizeof(v)
+    return arr.nbytes + sum(seen.values())
+
+
+class CodedArray:
+    # array ข้อความขนาด (คน, ปี) แบบ dictionary encoding: รหัส int8/int16 + ตารางค่าที่ไม่ซ้ำ
+    # ผลแปล ("ปกติ", "-") และค่าปัสสาวะ ("negative", "1+") ซ้ำกันหลายพันครั้ง → เก็บข้อความแค่ครั้งเดียว
+    # อ่านทีละช่อง arr[คน, ปี] ได้เหมือน ndarray / np.asarray(arr) ได้ array เต็มกลับมา
+    def __init__(self, arr):
+        arr = np.asarray(arr, dtype=object)
+        codes, uniques = pd.factorize(arr.ravel(), use_na_sentinel=False)
+        self.categories = np.empty(len(uniques), dtype=object)
+        self.categories[:] = list(uniques)
+        dtype = np.int8 if len(uniques) <= 127 else np.int16 if len(uniques) <= 32767 else np.int32
+        self.codes = codes.astype(dtype).reshape(arr.shape)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def dtype(self):
+        return np.dtype(object)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + _deep_nbytes(self.categories)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        return self.categories[self.codes[key]]
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.categories[self.codes]
+        return arr if dtype is None else arr.astype(dtype)
+
+    def ravel(self):
+        return self.categories[self.codes.ravel()]
+
+    def reshape(self, *shape):
+        return self.ravel().reshape(*shape)
+
+
+class YearData:
+    def __init__(self, df, schema=None):
+        # ✅ ปีที่แสดงผล = ตั้งแต่ปีแรกถึงปีล่าสุดที่พบในหัวตาราง (ส่ง schema เดิมมาได้ ไม่ต้องหาซ้ำ)
+        self.schema = schema or SchemaRegistry(df.columns)
+        self.years = self.schema.years
+        self.eye_years = self.schema.eye_years
+        self.latest_year = self.schema.latest_year
+        self.year_pos = {y: i for i, y in enumerate(self.years)}
+        self.size = len(df)
+
+        self.columns = self.schema.columns  # (metric, ปี) → ชื่อคอลัมน์จริง (None = ไม่มีในชีต)
+        self.values = {}          # metric → ndarray(object) ขนาด (คน, ปี)
+        self.numbers = {}         # metric ตัวเลข → ndarray(float) ขนาด (คน, ปี)
+        self.parse_failures = {}  # ชื่อคอลัมน์ → {"count": จำนวนช่องที่อ่านไม่ได้, "example": ตัวอย่างค่า}
+        self.rules_version = None  # รุ่นกฎคำแนะนำที่ใช้แปลผล (interpret_engine.interpret_all ใส่ให้)
+
+        numeric = set(NUMERIC_METRICS) | set(HEARING_METRICS)
+        for metric in METRICS:
+            arr = np.full((self.size, len(self.years)), "", dtype=object)
+            nums = np.full((self.size, len(self.years)), np.nan)
+            for y, i in self.year_pos.items():
+                col = self.columns[(metric, y)]
+                if col is None:
+                    continue
+                raw = df[col].to_numpy(dtype=object)
+                if metric in numeric:
+                    arr[:, i] = raw
+                    nums[:, i] = self._parse_numbers(col, raw)
+                else:
+                    arr[:, i] = to_text(raw)
+            self.values[metric] = arr
+            if metric in numeric:
+                self.numbers[metric] = nums
+
+        for metric in COALESCED_METRICS:
+            arr = np.full((self.size, len(self.years)), "", dtype=object)
+            for y, i in self.year_pos.items():
+                cols = self.schema.coalesced[(metric, y)]
+                filled = np.zeros(self.size, dtype=bool)
+                for col in cols:
+                    col_values = to_text(df[col].to_numpy(dtype=object))
+                    take = ~filled & (col_values != "")
+                    arr[take, i] = col_values[take]
+                    filled |= take
+            self.values[metric] = arr
+
+    def _parse_numbers(self, col, raw):
+        nums = to_float(raw)
+        missing = np.flatnonzero(np.isnan(nums))
+        failed = missing[~_is_blank(raw[missing])]  # ✅ ตรวจเฉพาะช่องที่อ่านไม่ได้ ไม่ต้องวนทุกช่อง
+        if len(failed):
+            self.parse_failures[col] = {"count": len(failed), "example": str(raw[failed[0]]).strip()}
+        return nums
+
+    def parse_report(self):
+        # ตารางคอลัมน์ที่มีค่าอ่านเป็นตัวเลขไม่ได้ เรียงจากมากไปน้อย
+        report = pd.DataFrame.from_dict(self.parse_failures, orient="index", columns=["count", "example"])
+        return report.sort_values("count", ascending=False)
+
+    def compact(self):
+        # ✅ ลดหน่วยความจำหลังแปลผลเสร็จ (snapshot อ่านอย่างเดียวจากนี้ไป)
+        # - ข้อความ → CodedArray, ตัวเลข → float32 (ค่าจำนวนเต็มถึง 16 ล้านยังตรงทุกหลัก)
+        converted = {}
+
+        def shrink(arr):
+            if id(arr) not in converted:
+                if isinstance(arr, CodedArray):
+                    converted[id(arr)] = arr
+                elif arr.dtype == object:
+                    converted[id(arr)] = CodedArray(arr)
+                elif np.issubdtype(arr.dtype, np.floating):
+                    converted[id(arr)] = arr.astype(np.float32)
+                else:
+                    converted[id(arr)] = arr
+            return converted[id(arr)]
+
+        self.numbers = {m: shrink(arr) for m, arr in self.numbers.items()}
+        self.values = {m: shrink(arr) for m, arr in self.values.items()}
+        return self
+
+    def memory_usage(self):
+        # metric → จำนวน byte (นับ array ที่ใช้ร่วมกันระหว่าง values / numbers ครั้งเดียว)
+        usage, seen = {}, set()
+        for name, arr in list(self.values.items()) + [(f"numbers:{m}", a) for m, a in self.numbers.items()]:
+            if id(arr) in seen:
+                continue
+            seen.add(id(arr))
+            usage[name] = arr.nbytes if isinstance(arr, CodedArray) else _deep_nbytes(arr)
+        return usage
+
+    def examined(self, rows=slice(None)):
+        # (คน, ปี) ที่มีค่าอย่างน้อย 1 คอลัมน์ในชีต (rows = slice / array ตำแหน่งแถว)
+        mask = np.zeros((len(np.arange(self.size)[rows]), len(self.years)), dtype=bool)
+        for metric in list(METRICS) + list(COALESCED_METRICS):
+            if metric in self.numbers:
+                mask |= ~np.isnan(np.asarray(self.numbers[metric][rows], dtype=float))
+            else:
+                mask |= np.asarray(self.values[metric][rows]) != ""
+        return mask
+
+    def latest_examined(self, rows=slice(None)):
+        # ตำแหน่งปีล่าสุดที่มาตรวจของแต่ละคน (-1 = ไม่มีผลตรวจเลย)
+        mask = self.examined(rows)
+        latest = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)
+        return np.where(mask.any(axis=1), latest, -1)
+
+    def person(self, pos):
+        return PersonYears(self, pos)
+
+    def to_long(self, metrics=None):
+        # ตาราง tidy: index (ตำแหน่งคน, ปี) × metric สำหรับ query ข้ามปี
+        metrics = metrics or list(self.values)
+        index = pd.MultiIndex.from_product([range(self.size), self.years], names=["person", "year"])
+        return pd.DataFrame({m: self.values[m].reshape(-1) for m in metrics}, index=index)
+
+
+class PersonYears:
+    def __init__(self, data, pos):
+        self.data = data
+        self.pos = pos
+
+    @property
+    def years(self):
+        return self.data.years
+
+    @property
+    def latest_year(self):
+        return self.data.latest_year
+
+    @property
+    def rules_version(self):
+        return self.data.rules_version
+
+    def get(self, metric, year, default=""):
+        i = self.data.year_pos.get(year)
+        arr = self.data.values.get(metric)
+        if i is None or arr is None:
+            return default
+        value = arr[self.pos, i]
+        if type(value) is np.float32:
+            # ✅ ค่าทศนิยมตามที่กรอก (199.1 ไม่ใช่ 199.10000610351562 ตอนแสดงผล)
+            return float(str(value))
+        return value
+
+    def text(self, metric, year):
+        value = self.get(metric, year)
+        if isinstance(value, str) and metric not in self.data.numbers:
+            return value  # ✅ metric ข้อความ normalize ไว้แล้วตอนสร้าง YearData
+        return "" if value is None else str(value).strip()
+
+    def number(self, metric, year):
+        i = self.data.year_pos.get(year)
+        arr = self.data.numbers.get(metric)
+        if i is None or arr is None:
+            return np.nan
+        return float(str(arr[self.pos, i]))
+
+    def series(self, metric, years=None):
+        return [self.get(metric, y) for y in (years or self.data.years)]
@@ -0,0 +1,169 @@
+# ===============================
+# HEALTH SCHEMA (metric + ปี → ชื่อคอลัมน์ใน Google Sheet)
+# ===============================
+# รวมกฎการตั้งชื่อคอลัมน์ไว้ที่เดียว แทนการต่อ string ในแต่ละส่วนแสดงผล
+# - ส่วนใหญ่: ปีล่าสุดไม่มีเลขท้าย ปีก่อนหน้ามีเลข 2 หลัก เช่น ALP61 ... ALP67, ALP (= 68)
+# - ปอด / ตา / การได้ยิน: ทุกปีมีเลขท้าย 2 หลัก (รวมปีล่าสุด)
+# - แต่ละ metric มีชื่อคอลัมน์สำรองได้หลายแบบ (เช่น มี/ไม่มีเว้นวรรค) ใช้อันแรกที่มีในชีต
+# - ปีล่าสุด / ปีที่มี / คอลัมน์จริงของแต่ละ (metric, ปี) หาจากหัวตารางครั้งเดียวต่อ snapshot (SchemaRegistry)
+#   → เพิ่มคอลัมน์ปีใหม่ (เช่น ALP68 + ALP = ปี 69) ไม่ต้องแก้โค้ด
+
+FIRST_YEAR = 2561
+YEARS = list(range(FIRST_YEAR, 2569))  # ปีของชีตปัจจุบัน พ.ศ. 2561–2568 (ใช้เมื่อหาจากหัวตารางไม่ได้)
+LATEST_YEAR = 2568
+
+
+def year_suffix(year):
+    return str(year)[-2:]
+
+
+def latest_unsuffixed(*prefixes):
+    return lambda year, latest=LATEST_YEAR: [p if year == latest else f"{p}{year_suffix(year)}" for p in prefixes]
+
+
+def always_suffixed(*prefixes):
+    return lambda year, latest=LATEST_YEAR: [f"{p}{year_suffix(year)}" for p in prefixes]
+
+
+def previous_years_only(*prefixes):
+    return lambda year, latest=LATEST_YEAR: [] if year == latest else [f"{p}{year_suffix(year)}" for p in prefixes]
+
+
+HEARING_LOW_FREQS = ['500', '1k', '2k']
+HEARING_HIGH_FREQS = ['3k', '4k', '6k']
+HEARING_FREQS = HEARING_LOW_FREQS + HEARING_HIGH_FREQS
+
+# metric → ฟังก์ชัน (ปี → รายชื่อคอลัมน์ที่เป็นไปได้) ใช้คอลัมน์แรกที่มีอยู่จริง
+METRICS = {
+    # น้ำหนัก / รอบเอว / ความดัน
+    "weight": latest_unsuffixed("น้ำหนัก"),
+    "height": latest_unsuffixed("ส่วนสูง"),
+    "waist": latest_unsuffixed("รอบเอว"),
+    "sbp": latest_unsuffixed("SBP"),
+    "dbp": latest_unsuffixed("DBP"),
+    "pulse": latest_unsuffixed("pulse"),
+    "bmi_value": lambda year, latest=LATEST_YEAR: ["ดัชนีมวลกาย" if year == latest else f"BMI{year_suffix(year)}"],
+
+    # ปัสสาวะ / อุจจาระ
+    "urine_alb": latest_unsuffixed("Alb"),
+    "urine_sugar": latest_unsuffixed("sugar"),
+    "urine_rbc": latest_unsuffixed("RBC1"),
+    "urine_wbc": latest_unsuffixed("WBC1"),
+    "urine_summary": previous_years_only("ผลปัสสาวะ"),
+    "stool_exam": latest_unsuffixed("Stool exam"),
+    "stool_cs": latest_unsuffixed("Stool C/S"),
+
+    # เลือด
+    "cbc_wbc": latest_unsuffixed("WBC (cumm)"),
+    "hb": latest_unsuffixed("Hb(%)"),
+    "plt": latest_unsuffixed("Plt (/mm)"),
+    "alp": latest_unsuffixed("ALP"),
+    "sgot": latest_unsuffixed("SGOT"),
+    "sgpt": latest_unsuffixed("SGPT"),
+    "uric": latest_unsuffixed("Uric Acid"),
+    "bun": latest_unsuffixed("BUN"),
+    "cr": latest_unsuffixed("Cr"),
+    "gfr": latest_unsuffixed("GFR"),
+    "fbs": latest_unsuffixed("FBS"),
+    "chol": latest_unsuffixed("CHOL"),
+    "tgl": latest_unsuffixed("TGL"),
+    "hdl": latest_unsuffixed("HDL"),
+    "ldl": latest_unsuffixed("LDL"),
+
+    # เอกซเรย์ / คลื่นไฟฟ้าหัวใจ
+    "cxr": latest_unsuffixed("CXR"),
+    "ekg": latest_unsuffixed("EKG"),
+
+    # สมรรถภาพปอด
+    "fvc": always_suffixed("FVC เปอร์เซ็นต์", "FVCเปอร์เซ็นต์"),
+    "fev1": always_suffixed("FEV1เปอร์เซ็นต์", "FEV1 เปอร์เซ็นต์"),
+    "fev1_fvc": always_suffixed("FEV1/FVC%", "FEV1/FVC% "),
+}
+
+# สมรรถภาพการได้ยิน: L500, R4k, ... (dB เป็นตัวเลข)
+HEARING_METRICS = [f"{ear}{freq}" for ear in ("L", "R") for freq in HEARING_FREQS]
+for _metric in HEARING_METRICS:
+    METRICS[_metric] = always_suffixed(_metric)
+
+# metric ผลแล็บที่เป็นตัวเลข: แปลงเป็น float ครั้งเดียวตอนสร้าง YearData (ค่าว่าง/อ่านไม่ได้ = NaN)
+# (การได้ยินก็แปลงเป็นตัวเลขด้วย ดู HEARING_METRICS) metric อื่นเก็บเป็นข้อความที่ตัดช่องว่างแล้ว
+NUMERIC_METRICS = [
+    "weight", "height", "waist", "sbp", "dbp",
+    "cbc_wbc", "hb", "plt",
+    "alp", "sgot", "sgpt", "uric", "bun", "cr", "gfr", "fbs",
+    "chol", "tgl", "hdl", "ldl",
+    "fvc", "fev1", "fev1_fvc",
+]
+
+# metric ที่รวมหลายคอลัมน์: ใช้ "ค่าแรกที่ไม่ว่าง" (ไม่ใช่คอลัมน์แรกที่มี)
+COALESCED_METRICS = {
+    "eye_normal": always_suffixed(
+        "ป.การรวมภาพ",
+        "ป.ความชัดของภาพระยะไกล",
+        "ป.การกะระยะและมองความชัดลึกของภาพ",
+        "ป.การจำแนกสี",
+        "ป.ความชัดของภาพระยะใกล้",
+        "ป.ลานสายตา",
+        "ปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวตั้ง",
+        "ปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวนอน",
+        "ปกติความสมดุลกล้ามเนื้อตาระยะใกล้แนวนอน",
+    ),
+    "eye_abnormal": always_suffixed(
+        "ผ.ความชัดของภาพระยะไกล",
+        "ผ.การกะระยะและมองความชัดลึกของภาพ",
+        "ผ.การจำแนกสี",
+        "ผ.ความชัดของภาพระยะใกล้",
+        "ผ.สายตาเขซ่อนเร้น",
+        "ผิดปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวตั้ง",
+        "ผิดปกติความสมดุลกล้ามเนื้อตาระยะไกลแนวนอน",
+    ),
+    "eye_summary": always_suffixed("สรุปเหมาะสมกับงาน"),
+    "eye_advice": always_suffixed("แนะนำABN EYE"),
+}
+
+
+def _suffixed_year(col):
+    # ปี พ.ศ. จากเลขท้าย 2 หลักของชื่อคอลัมน์ (FIRST_YEAR–2600) หรือ None
+    if len(col) > 2 and col[-2:].isdigit() and FIRST_YEAR <= 2500 + int(col[-2:]) <= 2600:
+        return 2500 + int(col[-2:])
+    return None
+
+
+def discover_years(columns):
+    # ปีที่มีอยู่จริงในชีต จากเลขท้าย 2 หลักของชื่อคอลัมน์
+    return sorted({year for year in map(_suffixed_year, map(str, columns)) if year is not None})
+
+
+def detect_latest_year(columns):
+    # ปีล่าสุด = ปีของคอลัมน์ที่ไม่มีเลขท้าย: ถ้ามีทั้ง ALP กับ ALP67 แสดงว่า ALP คือปี 68
+    # (รวมปีที่มีเลขท้ายด้วย เช่น ปอด / ตา ที่มีปีใหม่แล้วแต่ผลแล็บยังไม่มี)
+    columns = [str(c) for c in columns]
+    present = set(columns)
+    years = set(discover_years(columns))
+    years |= {year + 1 for col in columns if (year := _suffixed_year(col)) and col[:-2] in present}
+    return max(years) if years else LATEST_YEAR
+
+
+class SchemaRegistry:
+    # หัวตาราง → ปีที่มี + (metric, ปี) → ชื่อคอลัมน์จริง (เลือกชื่อสำรองไว้แล้ว)
+    # สร้างครั้งเดียวต่อ snapshot ส่วนแสดงผล / แปลผลไม่ต้องไล่ชื่อคอลัมน์หรือ person.keys() อีก
+    def __init__(self, columns):
+        columns = [str(c) for c in columns]
+        present = set(columns)
+        self.latest_year = detect_latest_year(columns)
+        self.eye_years = discover_years(columns)
+        self.years = sorted(set(range(FIRST_YEAR, self.latest_year + 1)) | set(self.eye_years))
+
+        self.columns = {}    # (metric, ปี) → ชื่อคอลัมน์ (None = ไม่มีในชีต)
+        self.coalesced = {}  # (metric, ปี) → [ชื่อคอลัมน์ที่มีในชีต ตามลำดับที่ใช้]
+        for year in self.years:
+            for metric, candidates in METRICS.items():
+                names = candidates(year, self.latest_year)
+                self.columns[(metric, year)] = next((c for c in names if c in present), None)
+            for metric, candidates in COALESCED_METRICS.items():
+                names = [c for c in candidates(year, self.latest_year) if c in present]
+                self.coalesced[(metric, year)] = names
+                self.columns[(metric, year)] = names[0] if names else None
+
+    def column(self, metric, year):
+        return self.columns.get((metric, year))
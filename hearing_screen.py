@@ -0,0 +1,265 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from health_data import exact_float, to_float
+from health_schema import HEARING_FREQS, HEARING_HIGH_FREQS, HEARING_LOW_FREQS
+from snapshot_store import add_source_arguments, frame_column, load_source, report_mismatches
+from timing import timed
+
+# ===============================
+# HEARING SCREEN (คัดกรองการได้ยินทั้งหน่วยงานในรอบเดียว)
+# ===============================
+# python hearing_screen.py retest.csv --year 2568     (รายชื่อที่ควรตรวจซ้ำ เรียงจากเปลี่ยนมากสุด)
+# python hearing_screen.py --check                    (เทียบข้อความผลกับ report.hearing_results ทีละคน)
+#
+# ผลตรวจทั้งหมดเป็น array เดียว thresholds ขนาด (คน, ปี, หู [ซ้าย, ขวา], ความถี่ HEARING_FREQS) หน่วย dB
+# แล้วคำนวณทุกอย่างด้วย numpy ทีเดียวทั้งชุด (เกณฑ์เดียวกับ interpret.interpret_hearing):
+# - ได้ยินลดลง: ความถี่ใด > 25 dB
+# - หูสองข้างต่างกัน: ค่าเฉลี่ยความถี่ต่ำต่างกัน > 15 dB / ความถี่สูง > 30 dB
+# - เทียบ baseline: ความถี่ต่ำเพิ่มขึ้น > 15 dB / ความถี่สูง > 20 dB
+#   baseline = คอลัมน์ L1kB ... (ครบทุกช่อง) ไม่มี → ปีแรกที่มีผลตรวจ (ปีนั้นไม่เทียบกับตัวเอง)
+# - STS (standard threshold shift): ค่าเฉลี่ยที่ 2k / 3k / 4k เพิ่มขึ้นจาก baseline ≥ 10 dB ในหูข้างใดข้างหนึ่ง
+#   (ไม่ปรับตามอายุ เพราะชีตไม่มีข้อมูลอายุ)
+# คนที่ควรตรวจซ้ำ = มี STS หรือเปลี่ยนจาก baseline เกินเกณฑ์ในปีที่เลือก
+
+EARS = ["หูซ้าย", "หูขวา"]
+LOSS_DB = 25
+ASYMMETRY_LOW_DB = 15
+ASYMMETRY_HIGH_DB = 30
+SHIFT_LOW_DB = 15
+SHIFT_HIGH_DB = 20
+STS_FREQS = ["2k", "3k", "4k"]
+STS_DB = 10
+NO_DATA = "ไม่มีข้อมูลการตรวจ"
+
+_LOW = [HEARING_FREQS.index(f) for f in HEARING_LOW_FREQS]
+_HIGH = [HEARING_FREQS.index(f) for f in HEARING_HIGH_FREQS]
+_STS = [HEARING_FREQS.index(f) for f in STS_FREQS]
+SHIFT_LIMITS = np.array([SHIFT_LOW_DB if f in HEARING_LOW_FREQS else SHIFT_HIGH_DB for f in HEARING_FREQS])
+
+
+def band_average(thresholds, freqs):
+    # ค่าเฉลี่ยของช่วงความถี่ (ขาดค่าใดค่าหนึ่ง = NaN)
+    return thresholds[..., freqs].mean(axis=-1)
+
+
+class Audiometry:
+    def __init__(self, year_data, df, rows=slice(None)):
+        # rows = ช่วงแถวที่ต้องการ (เช่น ทีละ chunk ตอน export) ค่าเริ่มต้น = ทุกคน
+        self.years = list(year_data.years)
+        self.size = len(np.arange(year_data.size)[rows])
+        # ✅ (คน, ปี, หู, ความถี่) จาก numbers ที่ YearData แปลงเป็นตัวเลขไว้แล้ว
+        self.thresholds = np.stack([
+            np.stack([exact_float(year_data.numbers[f"{ear}{freq}"][rows]) for freq in HEARING_FREQS], axis=-1)
+            for ear in ("L", "R")
+        ], axis=2)
+        self.tested = (self.thresholds > 0).any(axis=(2, 3))  # (คน, ปี) มีค่า > 0 อย่างน้อย 1 ช่อง
+
+        # ===== baseline (คน, หู, ความถี่) =====
+        raw = np.stack([
+            np.stack([frame_column(df, f"{ear}{freq}B")[rows] for freq in HEARING_FREQS], axis=-1)
+            for ear in ("L", "R")
+        ], axis=1)
+        # ครบทุกช่อง = ไม่มีช่องว่าง (ตรวจแบบเดียวกับ all(...) ใน report.hearing_results)
+        self.has_recorded_baseline = np.frompyfunc(bool, 1, 1)(raw).astype(bool).all(axis=(1, 2))
+        first = self.tested.argmax(axis=1)
+        self.baseline_year_index = np.where(
+            self.has_recorded_baseline, -1, np.where(self.tested.any(axis=1), first, -1)
+        )
+        fallback = self.thresholds[np.arange(self.size), first]
+        self.baseline = np.where(self.has_recorded_baseline[:, None, None], to_float(raw), fallback)
+        self.has_baseline = self.has_recorded_baseline | (self.baseline_year_index >= 0)
+
+    # ===== ผลรายปี (คน, ปี, ...) =====
+    def screen(self):
+        t = self.thresholds
+        with np.errstate(invalid="ignore"):
+            # หูสองข้าง: ขาดค่าในช่วงความถี่ = 0 (เหมือน interpret_hearing)
+            low = np.nan_to_num(band_average(t, _LOW))
+            high = np.nan_to_num(band_average(t, _HIGH))
+            compare = self.has_baseline[:, None] & (np.arange(len(self.years)) != self.baseline_year_index[:, None])
+            shift = t - self.baseline[:, None]
+            over = shift > SHIFT_LIMITS
+            # ความถี่ที่เกินเกณฑ์: หูซ้ายต้องอ่านค่าได้ แล้วหูใดหูหนึ่งเกิน (ลำดับการตรวจเดียวกับ interpret_hearing)
+            shift_flag = compare[..., None] & ~np.isnan(shift[:, :, 0]) & (over[:, :, 0] | over[:, :, 1])
+            sts = np.where(compare[..., None], band_average(shift, _STS), np.nan)
+            return {
+                "tested": self.tested,
+                "loss": t > LOSS_DB,                                             # (คน, ปี, หู, ความถี่)
+                "asymmetry_low": np.abs(low[..., 0] - low[..., 1]) > ASYMMETRY_LOW_DB,
+                "asymmetry_high": np.abs(high[..., 0] - high[..., 1]) > ASYMMETRY_HIGH_DB,
+                "compare": compare,
+                "shift": np.where(compare[..., None, None], shift, np.nan),      # (คน, ปี, หู, ความถี่)
+                "shift_flag": shift_flag,                                        # (คน, ปี, ความถี่)
+                "sts": sts,                                                      # (คน, ปี, หู)
+                "sts_flag": (sts >= STS_DB).any(axis=-1),
+            }
+
+    def results_text(self, flags=None):
+        # ข้อความผลรายปีแบบเดียวกับ report.hearing_results → array (คน, ปี) ของรายการบรรทัด
+        flags = flags or self.screen()
+        out = np.empty((self.size, len(self.years)), dtype=object)
+        for p, i in zip(*np.nonzero(~flags["tested"])):
+            out[p, i] = [NO_DATA]
+        loss, shift_flag = flags["loss"], flags["shift_flag"]
+        for p, i in zip(*np.nonzero(flags["tested"])):
+            lines = []
+            for e, side in enumerate(EARS):
+                abnormal = [f for f, hit in zip(HEARING_FREQS, loss[p, i, e]) if hit]
+                if abnormal:
+                    lines.append(f"มีการได้ยินลดลงที่ {side} ความถี่ {', '.join(abnormal)} Hz")
+                else:
+                    lines.append(f"สมรรถภาพการได้ยิน{side}ปกติ")
+            if flags["asymmetry_low"][p, i]:
+                lines.append("ระดับการได้ยินความถี่ต่ำของหูทั้งสองข้างต่างกันมากกว่า 15 dB")
+            if flags["asymmetry_high"][p, i]:
+                lines.append("ระดับการได้ยินความถี่สูงของหูทั้งสองข้างต่างกันมากกว่า 30 dB")
+            for k, f in enumerate(HEARING_FREQS):
+                if shift_flag[p, i, k]:
+                    band, limit = ("ต่ำ", SHIFT_LOW_DB) if f in HEARING_LOW_FREQS else ("สูง", SHIFT_HIGH_DB)
+                    lines.append(f"ค่าเฉลี่ยความถี่{band} {f}Hz ต่างจาก baseline มากกว่า {limit} dB")
+            out[p, i] = lines
+        return out
+
+    def summary(self, flags=None):
+        # จำนวนคนต่อปี: ตรวจ / ได้ยินลดลง / หูสองข้างต่างกัน / เปลี่ยนจาก baseline เกินเกณฑ์ / STS
+        flags = flags or self.screen()
+        tested = flags["tested"]
+        table = pd.DataFrame({
+            "ตรวจ": tested.sum(axis=0),
+            "ได้ยินลดลง (> 25 dB)": (flags["loss"].any(axis=(2, 3)) & tested).sum(axis=0),
+            "หูสองข้างต่างกัน": ((flags["asymmetry_low"] | flags["asymmetry_high"]) & tested).sum(axis=0),
+            "เปลี่ยนจาก baseline เกินเกณฑ์": (flags["shift_flag"].any(axis=-1) & tested).sum(axis=0),
+            f"STS (≥ {STS_DB} dB)": (flags["sts_flag"] & tested).sum(axis=0),
+        }, index=pd.Index(self.years, name="ปี"))
+        return table[table["ตรวจ"] > 0]
+
+
+# ===============================
+# RETEST LIST
+# ===============================
+def retest_list(snapshot, year=None, audiometry=None):
+    # คนที่ควรตรวจซ้ำในปีนี้ (ค่าเริ่มต้น = ปีล่าสุด) เรียงจาก STS / ค่าที่เปลี่ยนมากที่สุด
+    audiometry = audiometry or Audiometry(snapshot.year_data, snapshot.df)
+    year = year or snapshot.year_data.latest_year
+    i = audiometry.years.index(year)
+    flags = audiometry.screen()
+    shift_flag = flags["shift_flag"][:, i]
+    sts = flags["sts"][:, i]
+    needs = flags["tested"][:, i] & (flags["sts_flag"][:, i] | shift_flag.any(axis=1))
+    people = np.flatnonzero(needs)
+
+    shift = flags["shift"][people, i]                       # (คน, หู, ความถี่)
+    worst = np.nan_to_num(shift, nan=-np.inf).reshape(len(people), -1).argmax(axis=1)
+    worst_ear, worst_freq = np.divmod(worst, len(HEARING_FREQS))
+    baseline_year = audiometry.baseline_year_index[people]
+    years = np.asarray([f"ปี {y}" for y in audiometry.years], dtype=object)
+
+    table = pd.DataFrame({
+        "HN": frame_column(snapshot.df, "HN")[people],
+        "เลขบัตรประชาชน": frame_column(snapshot.df, "เลขบัตรประชาชน")[people],
+        "ชื่อ-สกุล": frame_column(snapshot.df, "ชื่อ-สกุล")[people],
+        "baseline": np.where(baseline_year < 0, "บันทึกไว้", years[np.maximum(baseline_year, 0)]),
+        "STS หูซ้าย (dB)": np.round(sts[people, 0], 1),
+        "STS หูขวา (dB)": np.round(sts[people, 1], 1),
+        "เปลี่ยนมากสุด (dB)": shift[np.arange(len(people)), worst_ear, worst_freq],
+        "ที่": [f"{EARS[e]} {HEARING_FREQS[f]}" for e, f in zip(worst_ear, worst_freq)],
+        "ความถี่ที่เกินเกณฑ์": [", ".join(f for f, hit in zip(HEARING_FREQS, row) if hit) or "-" for row in shift_flag[people]],
+        "หูสองข้างต่างกัน": flags["asymmetry_low"][people, i] | flags["asymmetry_high"][people, i],
+    })
+    table["_rank"] = np.fmax(table["STS หูซ้าย (dB)"], table["STS หูขวา (dB)"])
+    table = table.sort_values(["_rank", "เปลี่ยนมากสุด (dB)"], ascending=False, kind="stable", na_position="last")
+    return table.drop(columns="_rank").reset_index(drop=True)
+
+
+# ===============================
+# UI
+# ===============================
+def render_hearing_screen(snapshot):
+    import streamlit as st  # export / api ใช้ Audiometry โดยไม่ต้องโหลด streamlit
+
+    st.markdown("## 👂 คัดกรองการได้ยิน")
+    st.caption(
+        f"เทียบกับ baseline (คอลัมน์ L1kB ... หรือปีแรกที่มีผลตรวจ) · STS = ค่าเฉลี่ย 2k/3k/4k เพิ่มขึ้น ≥ {STS_DB} dB "
+        f"· เปลี่ยนเกินเกณฑ์ = ความถี่ต่ำ > {SHIFT_LOW_DB} dB / ความถี่สูง > {SHIFT_HIGH_DB} dB"
+    )
+    with timed("hearing_screen", rows=len(snapshot)):
+        audiometry = Audiometry(snapshot.year_data, snapshot.df)
+        summary = audiometry.summary()
+    if summary.empty:
+        st.info("ไม่มีข้อมูลการตรวจการได้ยิน")
+        return
+    st.dataframe(summary.T, width="stretch")
+
+    years = list(summary.index)
+    year = st.selectbox("ปีที่คัดกรอง", years, index=len(years) - 1, key="hearing_screen_year")
+    with timed("hearing_retest", year=year):
+        table = retest_list(snapshot, year, audiometry)
+    st.markdown(f"### 🔁 รายชื่อที่ควรตรวจซ้ำ ปี {year} ({len(table):,} คน)")
+    if table.empty:
+        st.success("ไม่มีผู้ที่ต้องตรวจซ้ำ")
+        return
+    st.dataframe(table, hide_index=True, width="stretch")
+    st.download_button(
+        "ดาวน์โหลด (.csv)",
+        data=table.to_csv(index=False).encode("utf-8-sig"),
+        file_name=f"hearing_retest_{year}.csv",
+        mime="text/csv",
+        on_click="ignore",
+        key="hearing_retest_download",
+    )
+
+
+# ===============================
+# CLI
+# ===============================
+def check_parity(snapshot):
+    # เทียบข้อความผลทุกคนทุกปีกับ report.hearing_results (ส่วนแสดงผลรายบุคคล)
+    from report import hearing_results
+    texts = Audiometry(snapshot.year_data, snapshot.df).results_text()
+    baselines = {f"{ear}{freq}B": frame_column(snapshot.df, f"{ear}{freq}B") for ear in ("L", "R") for freq in HEARING_FREQS}
+    mismatches = []
+    for p in range(len(snapshot)):
+        want, _ = hearing_results(snapshot.year_data.person(p), {c: v[p] for c, v in baselines.items()})
+        for i, y in enumerate(snapshot.year_data.years):
+            if texts[p, i] != want[y]:
+                mismatches.append((p, y, texts[p, i], want[y]))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="คัดกรองการได้ยินทั้งหน่วยงาน → รายชื่อที่ควรตรวจซ้ำ")
+    parser.add_argument("out", nargs="?", help="ไฟล์ CSV รายชื่อที่ควรตรวจซ้ำ")
+    parser.add_argument("--year", type=int, help="ปี พ.ศ. (ค่าเริ่มต้น = ปีล่าสุด)")
+    parser.add_argument("--check", action="store_true", help="เทียบข้อความผลกับส่วนแสดงผลรายบุคคล")
+    add_source_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from snapshot import Snapshot
+    df = load_source(args.source, args.dir)
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุ --source หรือสร้าง snapshot ก่อน)")
+        return 1
+    snapshot = Snapshot(df)
+    if args.year is not None and args.year not in snapshot.year_data.years:
+        parser.error(f"ไม่มีข้อมูลปี {args.year} (มี: {', '.join(map(str, snapshot.year_data.years))})")
+
+    if args.check:
+        return report_mismatches(check_parity(snapshot), len(snapshot))
+
+    audiometry = Audiometry(snapshot.year_data, snapshot.df)
+    print(audiometry.summary().to_string())
+    table = retest_list(snapshot, args.year, audiometry)
+    print(f"🔁 ควรตรวจซ้ำ {len(table):,} คน")
+    if args.out:
+        table.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ → {args.out}")
+    else:
+        print(table.head(20).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
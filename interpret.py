@@ -0,0 +1,552 @@
+from decision_tables import RULES
+from health_schema import HEARING_FREQS, HEARING_HIGH_FREQS, HEARING_LOW_FREQS
+
+# ===============================
+# INTERPRETATION RULES (แปลผลทีละค่า ตามสูตร Excel)
+# ===============================
+# กฎแปลผลแบบทีละค่า ย้ายมาจาก app.py เพื่อให้ทุกส่วนเรียกใช้ร่วมกันได้
+# - interpret_engine.py ใช้ฟังก์ชันกลุ่มข้อความ (ปัสสาวะ อุจจาระ คำแนะนำ) กับค่าที่ไม่ซ้ำกัน
+# - คำแนะนำ CBC / ปัสสาวะ / ตับ / ปอด เป็นตารางกฎใน advice_rules.json (decision_tables.py)
+# - ฟังก์ชันกลุ่มตัวเลขเป็นต้นแบบที่ interpret_engine.py ต้องให้ผลตรงกัน (ตรวจด้วย --check)
+
+
+def with_label(value, label):
+    # ค่า + ผลแปลตัวเล็กสีเทาใต้ค่า (รูปแบบเดียวกับตารางทุกส่วน)
+    if label == "-":
+        return "-"
+    return f"{value}<br><span style='font-size:13px;color:gray;'>{label}</span>"
+
+
+# ===============================
+# BMI / รอบเอว / ความดัน
+# ===============================
+def interpret_bmi(bmi):
+    if bmi is None or bmi == "":
+        return "-"
+    try:
+        bmi = float(bmi)
+        if bmi > 30:
+            return "อ้วนมาก"
+        elif bmi >= 25:
+            return "อ้วน"
+        elif bmi >= 23:
+            return "น้ำหนักเกิน"
+        elif bmi >= 18.5:
+            return "ปกติ"
+        else:
+            return "ผอม"
+    except:
+        return "-"
+
+
+def interpret_waist(waist, height):
+    try:
+        waist = float(waist)
+        height = float(height)
+        return "เกินเกณฑ์" if waist > height else "ปกติ"
+    except:
+        return "-"
+
+
+def interpret_bp(sbp, dbp):
+    try:
+        sbp = float(sbp)
+        dbp = float(dbp)
+        if sbp == 0 or dbp == 0:
+            return "-"
+        if sbp >= 160 or dbp >= 100:
+            return "ความดันสูง"
+        elif sbp >= 140 or dbp >= 90:
+            return "ความดันสูงเล็กน้อย"
+        elif sbp < 120 and dbp < 80:
+            return "ความดันปกติ"
+        else:
+            return "ความดันค่อนข้างสูง"
+    except:
+        return "-"
+
+
+# ===============================
+# URINE (ปัสสาวะ)
+# ===============================
+def interpret_alb(value):
+    if value == "":
+        return "-"
+    if value.lower() == "negative":
+        return "ไม่พบ"
+    elif value in ["trace", "1+", "2+"]:
+        return "พบโปรตีนในปัสสาวะเล็กน้อย"
+    elif value == "3+":
+        return "พบโปรตีนในปัสสาวะ"
+    return "-"
+
+
+def interpret_sugar(value):
+    if value == "":
+        return "-"
+    if value.lower() == "negative":
+        return "ไม่พบ"
+    elif value == "trace":
+        return "พบน้ำตาลในปัสสาวะเล็กน้อย"
+    elif value in ["1+", "2+", "3+", "4+", "5+", "6+"]:
+        return "พบน้ำตาลในปัสสาวะ"
+    return "-"
+
+
+def interpret_rbc(value):
+    if value == "":
+        return "-"
+    if value in ["0-1", "negative", "1-2", "2-3", "3-5"]:
+        return "ปกติ"
+    elif value in ["5-10", "10-20"]:
+        return "พบเม็ดเลือดแดงในปัสสาวะเล็กน้อย"
+    else:
+        return "พบเม็ดเลือดแดงในปัสสาวะ"
+
+
+def interpret_urine_wbc(value):
+    if value == "":
+        return "-"
+    if value in ["0-1", "negative", "1-2", "2-3", "3-5"]:
+        return "ปกติ"
+    elif value in ["5-10", "10-20"]:
+        return "พบเม็ดเลือดขาวในปัสสาวะเล็กน้อย"
+    else:
+        return "พบเม็ดเลือดขาวในปัสสาวะ"
+
+
+def summarize_urine(*results):
+    # ✅ กฎอยู่ใน advice_rules.json (ดู decision_tables.py)
+    return RULES.table("summarize_urine")(*results)
+
+
+def advice_urine(sex, alb, sugar, rbc, wbc):
+    return RULES.table("advice_urine")(
+        sex, interpret_alb(alb), interpret_sugar(sugar), interpret_rbc(rbc), interpret_urine_wbc(wbc)
+    )
+
+
+# ===============================
+# STOOL (อุจจาระ)
+# ===============================
+def interpret_stool_exam(value):
+    if not value or value.strip() == "":
+        return "-"
+    if "ปกติ" in value:
+        return "ปกติ"
+    elif "เม็ดเลือดแดง" in value:
+        return "พบเม็ดเลือดแดงในอุจจาระ นัดตรวจซ้ำ"
+    elif "เม็ดเลือดขาว" in value:
+        return "พบเม็ดเลือดขาวในอุจจาระ นัดตรวจซ้ำ"
+    return value.strip()
+
+
+def interpret_stool_cs(value, is_latest=False):
+    if not value or value.strip() == "":
+        return "-"
+    if "ไม่พบ" in value or "ปกติ" in value:
+        return "ไม่พบการติดเชื้อ"
+    if is_latest:
+        return "พบการติดเชื้อในอุจจาระ ให้พบแพทย์เพื่อตรวจรักษาเพิ่มเติม"
+    return "พบการติดเชื้อในอุจจาระ"
+
+
+# ===============================
+# CBC (ความสมบูรณ์ของเลือด)
+# ===============================
+def interpret_wbc(wbc):
+    try:
+        wbc = float(wbc)
+        if wbc == 0:
+            return "-"
+        elif 4000 <= wbc <= 10000:
+            return "ปกติ"
+        elif 10000 < wbc < 13000:
+            return "สูงกว่าเกณฑ์เล็กน้อย"
+        elif wbc >= 13000:
+            return "สูงกว่าเกณฑ์ปกติ"
+        elif 3000 < wbc < 4000:
+            return "ต่ำกว่าเกณฑ์เล็กน้อย"
+        elif wbc <= 3000:
+            return "ต่ำกว่าเกณฑ์ปกติ"
+    except:
+        return "-"
+    return "-"
+
+
+def interpret_hb(hb, sex):
+    try:
+        hb = float(hb)
+        if sex == "ชาย":
+            if hb < 12:
+                return "พบภาวะโลหิตจาง"
+            elif 12 <= hb < 13:
+                return "พบภาวะโลหิตจางเล็กน้อย"
+            else:
+                return "ปกติ"
+        elif sex == "หญิง":
+            if hb < 11:
+                return "พบภาวะโลหิตจาง"
+            elif 11 <= hb < 12:
+                return "พบภาวะโลหิตจางเล็กน้อย"
+            else:
+                return "ปกติ"
+    except:
+        return "-"
+    return "-"
+
+
+def interpret_plt(plt):
+    try:
+        plt = float(plt)
+        if plt == 0:
+            return "-"
+        elif 150000 <= plt <= 500000:
+            return "ปกติ"
+        elif 500000 < plt < 600000:
+            return "สูงกว่าเกณฑ์เล็กน้อย"
+        elif plt >= 600000:
+            return "สูงกว่าเกณฑ์"
+        elif 100000 <= plt < 150000:
+            return "ต่ำกว่าเกณฑ์เล็กน้อย"
+        elif plt < 100000:
+            return "ต่ำกว่าเกณฑ์"
+    except:
+        return "-"
+    return "-"
+
+
+# 🩸 ฟังก์ชันให้คำแนะนำ CBC (ตามสูตร Excel → ตาราง cbc_advice ใน advice_rules.json)
+def cbc_advice(hb_result, wbc_result, plt_result):
+    return RULES.table("cbc_advice")(hb_result, wbc_result, plt_result)
+
+
+# ===============================
+# LIVER (การทำงานของตับ)
+# ===============================
+def interpret_liver(value, upper_limit):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-", "-"
+        elif value > upper_limit:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>สูงกว่าเกณฑ์</span>", "สูง"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>", "ปกติ"
+    except:
+        return "-", "-"
+
+
+def summarize_liver(alp_val, sgot_val, sgpt_val):
+    try:
+        alp = float(alp_val)
+        sgot = float(sgot_val)
+        sgpt = float(sgpt_val)
+        if alp == 0 or sgot == 0 or sgpt == 0:
+            return "-"
+        if alp > 120 or sgot > 36 or sgpt > 40:
+            return "การทำงานของตับสูงกว่าเกณฑ์ปกติเล็กน้อย"
+        return "ปกติ"
+    except:
+        return "-"
+
+
+def liver_advice(summary_text):
+    return RULES.table("liver_advice")(summary_text)
+
+
+# ===============================
+# URIC ACID (กรดยูริค)
+# ===============================
+# ฟังก์ชันแปลผลยูริค
+def interpret_uric(value):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-"
+        elif value > 7.2:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>สูงกว่าเกณฑ์</span>"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+# ===============================
+# KIDNEY (การทำงานของไต)
+# ===============================
+# ฟังก์ชันแปลผลแต่ละค่า
+def interpret_bun(value):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-"
+        elif value < 5 or value > 20:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ผิดปกติ</span>"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+def interpret_cr(value):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-"
+        elif value < 0.6 or value > 1.2:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ผิดปกติ</span>"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+def interpret_gfr(value):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-"
+        elif value < 60:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ต่ำกว่าเกณฑ์</span>"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+# ===============================
+# FBS (น้ำตาลในเลือด)
+# ===============================
+# ===== ฟังก์ชันแปลผล FBS =====
+def interpret_fbs(value):
+    try:
+        value = float(value)
+        if value == 0:
+            return "-"
+        elif 100 <= value < 106:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>เริ่มสูงเล็กน้อย</span>"
+        elif 106 <= value < 126:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>สูงเล็กน้อย</span>"
+        elif value >= 126:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>สูง</span>"
+        else:
+            return f"{value}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+# ===============================
+# LIPIDS (ไขมันในเลือด)
+# ===============================
+# แปลผลในแต่ละรายการ
+def interpret_chol(value):
+    try:
+        val = float(value)
+        if val == 0:
+            return "-"
+        elif val >= 250:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
+        elif val <= 200:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+        else:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>เริ่มสูง</span>"
+    except:
+        return "-"
+
+
+def interpret_tgl(value):
+    try:
+        val = float(value)
+        if val == 0:
+            return "-"
+        elif val >= 250:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
+        elif val <= 150:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+        else:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>เริ่มสูง</span>"
+    except:
+        return "-"
+
+
+def interpret_hdl(value):
+    try:
+        val = float(value)
+        if val == 0:
+            return "-"
+        elif val < 40:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>ต่ำ</span>"
+        else:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+def interpret_ldl(value):
+    try:
+        val = float(value)
+        if val == 0:
+            return "-"
+        elif val >= 180:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>สูง</span>"
+        else:
+            return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+# ฟังก์ชันสรุปไขมันในเลือดตามเกณฑ์สูตร Excel
+def summarize_lipids(chol_raw, tgl_raw, ldl_raw):
+    try:
+        chol = float(chol_raw)
+        tgl = float(tgl_raw)
+        ldl = float(ldl_raw)
+        if chol == 0 and tgl == 0:
+            return "-"
+        if chol >= 250 or tgl >= 250 or ldl >= 180:
+            return "ไขมันในเลือดสูง"
+        elif chol <= 200 and tgl <= 150:
+            return "ปกติ"
+        else:
+            return "ไขมันในเลือดสูงเล็กน้อย"
+    except:
+        return "-"
+
+
+# ===============================
+# LUNG (สมรรถภาพปอด)
+# ===============================
+def format_result(value, suffix="%"):
+    try:
+        val = float(value)
+        if val == 0:
+            return "-"
+        return f"{val}<br><span style='font-size:13px;color:gray;'>ปกติ</span>"
+    except:
+        return "-"
+
+
+def interpret_lung(fvc, fev1, ratio):
+    try:
+        fvc = float(fvc)
+        fev1 = float(fev1)
+        ratio = float(ratio)
+
+        if fvc > 80 and fev1 > 80 and ratio > 70:
+            return "สมรรถภาพปอดปกติ"
+        elif fvc <= 80 and fev1 > 70 and ratio <= 100:
+            return "พบความผิดปกติแบบปอดจำกัดการขยายตัวเล็กน้อย"
+        elif fvc <= 80 and fev1 <= 70:
+            return "Mixed"
+        elif fvc < 100 and fev1 <= 70 and ratio <= 65:
+            return "พบความผิดปกติแบบหลอดลมอุดกั้นเล็กน้อย"
+        else:
+            return "สรุปไม่ได้"
+    except:
+        return "-"
+
+
+def lung_advice(summary_text):
+    return RULES.table("lung_advice")(summary_text)
+
+
+# ===============================
+# EYE (สมรรถภาพตา)
+# ===============================
+# ฟังก์ชันย่อผลสรุป
+def shorten_eye_summary(text: str) -> str:
+    text = text.strip()
+    if "เหมาะสม" in text and "มองเห็น" in text:
+        return "การมองเห็นเหมาะสมกับงาน"
+    if "มองเห็นไม่เหมาะ" in text:
+        return "การมองเห็นไม่เหมาะกับงาน"
+    if "ไม่สามารถสรุป" in text:
+        return "ไม่สามารถสรุปได้"
+    return text[:35] + "..." if len(text) > 40 else text
+
+
+# ฟังก์ชันย่อคำแนะนำ
+def shorten_eye_advice(text: str) -> str:
+    text = text.strip()
+
+    if "บริหารสายตา" in text and "พักสายตา" in text:
+        return "บริหารสายตา-พักตาและตรวจปีละครั้ง"
+    if "เครื่องจักร" in text or "ขับรถ" in text:
+        return "การกะระยะต่ำกว่าเกณฑ์ ต้องระวังการทำงานใกล้เครื่องจักรและการขับรถ"
+    if "ควรพบจักษุแพทย์" in text:
+        return "ควรพบจักษุแพทย์เพื่อตรวจเพิ่มเติม"
+    if "พักสายตา" in text and "ประเมิน" in text:
+        return "พักสายตาและตรวจเพิ่ม"
+    if "เหมาะสมกับลักษณะงาน" in text:
+        return "การมองเห็นเหมาะสมกับงาน"
+    if "ควรพบแพทย์" in text:
+        return "พบแพทย์เพื่อตรวจเพิ่มเติม"
+    if "ตรวจสมรรถภาพ" in text:
+        return "ตรวจสมรรถภาพสายตาเพิ่มเติม"
+
+    return text[:35] + "..." if len(text) > 40 else text
+
+
+# ===============================
+# HEARING (สมรรถภาพการได้ยิน ตามเกณฑ์มาตรฐาน)
+# ===============================
+def is_no_hearing_data(ear_data):
+    for val in ear_data.values():
+        try:
+            num = float(str(val).strip())
+            if num > 0:
+                return False
+        except:
+            continue
+    return True
+
+
+def hearing_loss_at_freq(dB):
+    try:
+        return float(dB) > 25
+    except:
+        return False
+
+
+def interpret_hearing(left, right, baseline=None, compare_with_baseline=True):
+    result = []
+
+    for side, ear_data in [('หูซ้าย', left), ('หูขวา', right)]:
+        abnormal = [f for f in HEARING_FREQS if hearing_loss_at_freq(ear_data.get(f))]
+        if abnormal:
+            result.append(f"มีการได้ยินลดลงที่ {side} ความถี่ {', '.join(abnormal)} Hz")
+        else:
+            result.append(f"สมรรถภาพการได้ยิน{side}ปกติ")
+
+    def avg(ear, freqs):
+        try:
+            return sum(float(ear.get(f, 0)) for f in freqs) / len(freqs)
+        except:
+            return 0
+
+    diff_low = abs(avg(left, HEARING_LOW_FREQS) - avg(right, HEARING_LOW_FREQS))
+    diff_high = abs(avg(left, HEARING_HIGH_FREQS) - avg(right, HEARING_HIGH_FREQS))
+
+    if diff_low > 15:
+        result.append("ระดับการได้ยินความถี่ต่ำของหูทั้งสองข้างต่างกันมากกว่า 15 dB")
+    if diff_high > 30:
+        result.append("ระดับการได้ยินความถี่สูงของหูทั้งสองข้างต่างกันมากกว่า 30 dB")
+
+    if baseline and compare_with_baseline:
+        for f in HEARING_LOW_FREQS:
+            try:
+                if float(left[f]) - float(baseline['left'][f]) > 15 or float(right[f]) - float(baseline['right'][f]) > 15:
+                    result.append(f"ค่าเฉลี่ยความถี่ต่ำ {f}Hz ต่างจาก baseline มากกว่า 15 dB")
+            except:
+                continue
+        for f in HEARING_HIGH_FREQS:
+            try:
+                if float(left[f]) - float(baseline['left'][f]) > 20 or float(right[f]) - float(baseline['right'][f]) > 20:
+                    result.append(f"ค่าเฉลี่ยความถี่สูง {f}Hz ต่างจาก baseline มากกว่า 20 dB")
+            except:
+                continue
+    elif compare_with_baseline:
+        result.append("ไม่มีข้อมูล baseline เพื่อเปรียบเทียบ")
+
+    return result
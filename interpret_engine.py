@@ -0,0 +1,263 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import interpret
+from decision_tables import RULES
+from health_data import YearData, to_text
+from health_schema import NUMERIC_METRICS
+from interpret import (
+    interpret_alb,
+    interpret_rbc,
+    interpret_stool_cs,
+    interpret_stool_exam,
+    interpret_sugar,
+    interpret_urine_wbc,
+    shorten_eye_advice,
+    shorten_eye_summary,
+)
+from lung_screen import LUNG_SUMMARIES, classify_lung
+
+# ===============================
+# INTERPRETATION ENGINE (แปลผลทุกคนทุกปีในรอบเดียว)
+# ===============================
+# ทำครั้งเดียวต่อ snapshot แล้วเก็บผลไว้ใน YearData ให้หน้าเว็บอ่านอย่างเดียว
+# - ค่าตัวเลข: ใช้ float array จาก YearData.numbers (ค่าว่าง/ไม่ใช่ตัวเลข = NaN) แปลผลด้วย np.select
+# - ค่าข้อความ (ปัสสาวะ อุจจาระ ตา): ค่าซ้ำกันเยอะ จึงเรียกฟังก์ชันใน interpret.py
+#   แค่กับค่าที่ไม่ซ้ำ แล้วกระจายผลกลับด้วย index
+# - คำแนะนำ CBC / ปัสสาวะ / ตับ / ปอด: ตารางกฎที่ compile แล้ว (decision_tables.py) fancy index ทีเดียวทั้ง array
+#
+# ผลลัพธ์ที่เพิ่มใน year_data.values (ทุกตัวขนาด คน × ปี):
+#   <metric>_value  ค่าตัวเลข (float, NaN = ไม่มีข้อมูล)
+#   <metric>_label  ผลแปล ("-" = ไม่มีข้อมูล)
+#   bmi, bmi_label, bp_label, waist_label
+#   urine_result, urine_advice, cbc_advice, liver_summary, liver_advice,
+#   lipid_summary, lung_summary, lung_advice, eye_summary_short, eye_advice_short
+
+LIVER_UPPER_LIMITS = {"alp": 120, "sgot": 36, "sgpt": 40}
+LIVER_HIGH_SUMMARY = "การทำงานของตับสูงกว่าเกณฑ์ปกติเล็กน้อย"
+
+
+def select(conditions, choices, default="-"):
+    return np.select(conditions, choices, default=default).astype(object)
+
+
+def map_values(func, arr):
+    # เรียก func กับค่าที่ไม่ซ้ำกันเท่านั้น แล้วกระจายผลกลับ
+    arr = np.asarray(arr, dtype=object)
+    codes, uniques = pd.factorize(arr.ravel(), use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(u) for u in uniques]
+    return mapped[codes].reshape(arr.shape)
+
+
+def _missing_or_zero(x):
+    return np.isnan(x) | (x == 0)
+
+
+def interpret_all(year_data, sex):
+    v = year_data.values
+    year_data.rules_version = RULES.current_version()
+    latest = np.array([y == year_data.latest_year for y in year_data.years])
+    is_latest_or_later = np.array([y >= year_data.latest_year for y in year_data.years])
+
+    sex_raw = np.asarray(sex, dtype=object).reshape(-1, 1)
+    sex_text = to_text(sex_raw)
+    num = {m: year_data.numbers[m] for m in NUMERIC_METRICS}  # ✅ แปลงเป็น float ไว้แล้วตอนสร้าง YearData
+    out = {f"{m}_value": arr for m, arr in num.items()}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # ===== BMI / รอบเอว / ความดัน =====
+        w, h = num["weight"], num["height"]
+        bmi = np.round(w / ((h / 100) ** 2), 1)
+        bmi[~np.isfinite(bmi)] = np.nan
+        out["bmi"] = bmi
+        out["bmi_label"] = select(
+            [np.isnan(bmi), bmi > 30, bmi >= 25, bmi >= 23, bmi >= 18.5],
+            ["-", "อ้วนมาก", "อ้วน", "น้ำหนักเกิน", "ปกติ"],
+            "ผอม",
+        )
+        out["waist_label"] = select(
+            [np.isnan(num["waist"]) | np.isnan(h), num["waist"] > h],
+            ["-", "เกินเกณฑ์"],
+            "ปกติ",
+        )
+        s, d = num["sbp"], num["dbp"]
+        out["bp_label"] = select(
+            [_missing_or_zero(s) | _missing_or_zero(d), (s >= 160) | (d >= 100), (s >= 140) | (d >= 90), (s < 120) & (d < 80)],
+            ["-", "ความดันสูง", "ความดันสูงเล็กน้อย", "ความดันปกติ"],
+            "ความดันค่อนข้างสูง",
+        )
+
+        # ===== ปัสสาวะ =====
+        urine = {m: v[m] for m in ("urine_alb", "urine_sugar", "urine_rbc", "urine_wbc")}
+        out["urine_alb_label"] = map_values(interpret_alb, urine["urine_alb"])
+        out["urine_sugar_label"] = map_values(interpret_sugar, urine["urine_sugar"])
+        out["urine_rbc_label"] = map_values(interpret_rbc, urine["urine_rbc"])
+        out["urine_wbc_label"] = map_values(interpret_urine_wbc, urine["urine_wbc"])
+        has_urine = np.logical_or.reduce([urine[m] != "" for m in urine])
+
+        # ปีล่าสุด: สรุปจากผลแปล 4 ค่า / ปีก่อนหน้า: ใช้คอลัมน์ผลปัสสาวะในชีต
+        labels = (out["urine_alb_label"], out["urine_sugar_label"], out["urine_rbc_label"], out["urine_wbc_label"])
+        computed = RULES.table("summarize_urine").lookup(*labels)
+        recorded = map_values(
+            lambda t: "ผิดปกติ" if "ผิดปกติ" in t else ("ปกติ" if "ปกติ" in t else "-"),
+            v["urine_summary"],
+        )
+        out["urine_result"] = np.where(
+            is_latest_or_later, np.where(has_urine, computed, "-"), recorded
+        ).astype(object)
+        advice = RULES.table("advice_urine").lookup(sex_raw, *labels)
+        out["urine_advice"] = np.where(has_urine, advice, "-").astype(object)
+
+        # ===== อุจจาระ =====
+        out["stool_exam_label"] = map_values(interpret_stool_exam, v["stool_exam"])
+        stool_cs = v["stool_cs"]
+        out["stool_cs_label"] = np.where(
+            latest,
+            map_values(lambda t: interpret_stool_cs(t, is_latest=True), stool_cs),
+            map_values(interpret_stool_cs, stool_cs),
+        ).astype(object)
+
+        # ===== CBC =====
+        x = num["cbc_wbc"]
+        out["cbc_wbc_label"] = select(
+            [_missing_or_zero(x), (x >= 4000) & (x <= 10000), (x > 10000) & (x < 13000), x >= 13000, (x > 3000) & (x < 4000), x <= 3000],
+            ["-", "ปกติ", "สูงกว่าเกณฑ์เล็กน้อย", "สูงกว่าเกณฑ์ปกติ", "ต่ำกว่าเกณฑ์เล็กน้อย", "ต่ำกว่าเกณฑ์ปกติ"],
+        )
+        x = num["hb"]
+        male, female = sex_text == "ชาย", sex_text == "หญิง"
+        out["hb_label"] = select(
+            [np.isnan(x), male & (x < 12), male & (x < 13), male, female & (x < 11), female & (x < 12), female],
+            ["-", "พบภาวะโลหิตจาง", "พบภาวะโลหิตจางเล็กน้อย", "ปกติ", "พบภาวะโลหิตจาง", "พบภาวะโลหิตจางเล็กน้อย", "ปกติ"],
+        )
+        x = num["plt"]
+        out["plt_label"] = select(
+            [_missing_or_zero(x), (x >= 150000) & (x <= 500000), (x > 500000) & (x < 600000), x >= 600000, (x >= 100000) & (x < 150000), x < 100000],
+            ["-", "ปกติ", "สูงกว่าเกณฑ์เล็กน้อย", "สูงกว่าเกณฑ์", "ต่ำกว่าเกณฑ์เล็กน้อย", "ต่ำกว่าเกณฑ์"],
+        )
+        out["cbc_advice"] = RULES.table("cbc_advice").lookup(out["hb_label"], out["cbc_wbc_label"], out["plt_label"])
+
+        # ===== ตับ =====
+        for m, limit in LIVER_UPPER_LIMITS.items():
+            x = num[m]
+            out[f"{m}_label"] = select([_missing_or_zero(x), x > limit], ["-", "สูงกว่าเกณฑ์"], "ปกติ")
+        alp, sgot, sgpt = num["alp"], num["sgot"], num["sgpt"]
+        out["liver_summary"] = select(
+            [_missing_or_zero(alp) | _missing_or_zero(sgot) | _missing_or_zero(sgpt), (alp > 120) | (sgot > 36) | (sgpt > 40)],
+            ["-", LIVER_HIGH_SUMMARY],
+            "ปกติ",
+        )
+        out["liver_advice"] = RULES.table("liver_advice").lookup(out["liver_summary"])
+
+        # ===== ยูริค / ไต / น้ำตาล =====
+        x = num["uric"]
+        out["uric_label"] = select([_missing_or_zero(x), x > 7.2], ["-", "สูงกว่าเกณฑ์"], "ปกติ")
+        x = num["bun"]
+        out["bun_label"] = select([_missing_or_zero(x), (x < 5) | (x > 20)], ["-", "ผิดปกติ"], "ปกติ")
+        x = num["cr"]
+        out["cr_label"] = select([_missing_or_zero(x), (x < 0.6) | (x > 1.2)], ["-", "ผิดปกติ"], "ปกติ")
+        x = num["gfr"]
+        out["gfr_label"] = select([_missing_or_zero(x), x < 60], ["-", "ต่ำกว่าเกณฑ์"], "ปกติ")
+        x = num["fbs"]
+        out["fbs_label"] = select(
+            [_missing_or_zero(x), (x >= 100) & (x < 106), (x >= 106) & (x < 126), x >= 126],
+            ["-", "เริ่มสูงเล็กน้อย", "สูงเล็กน้อย", "สูง"],
+            "ปกติ",
+        )
+
+        # ===== ไขมัน =====
+        chol, tgl, hdl, ldl = num["chol"], num["tgl"], num["hdl"], num["ldl"]
+        out["chol_label"] = select([_missing_or_zero(chol), chol >= 250, chol <= 200], ["-", "สูง", "ปกติ"], "เริ่มสูง")
+        out["tgl_label"] = select([_missing_or_zero(tgl), tgl >= 250, tgl <= 150], ["-", "สูง", "ปกติ"], "เริ่มสูง")
+        out["hdl_label"] = select([_missing_or_zero(hdl), hdl < 40], ["-", "ต่ำ"], "ปกติ")
+        out["ldl_label"] = select([_missing_or_zero(ldl), ldl >= 180], ["-", "สูง"], "ปกติ")
+        out["lipid_summary"] = select(
+            [np.isnan(chol) | np.isnan(tgl) | np.isnan(ldl), (chol == 0) & (tgl == 0), (chol >= 250) | (tgl >= 250) | (ldl >= 180), (chol <= 200) & (tgl <= 150)],
+            ["-", "-", "ไขมันในเลือดสูง", "ปกติ"],
+            "ไขมันในเลือดสูงเล็กน้อย",
+        )
+
+        # ===== ปอด =====
+        fvc, fev1, ratio = num["fvc"], num["fev1"], num["fev1_fvc"]
+        for m in ("fvc", "fev1", "fev1_fvc"):
+            out[f"{m}_label"] = select([_missing_or_zero(num[m])], ["-"], "ปกติ")
+        # ✅ เกณฑ์เดียวกับหน้าสมรรถภาพปอดทั้งหน่วยงาน (ดู lung_screen.classify_lung)
+        out["lung_summary"] = LUNG_SUMMARIES[classify_lung(fvc, fev1, ratio)]
+        out["lung_advice"] = RULES.table("lung_advice").lookup(out["lung_summary"])
+
+    # ===== ตา =====
+    out["eye_summary_short"] = map_values(shorten_eye_summary, np.where(v["eye_summary"] == "", "-", v["eye_summary"]))
+    out["eye_advice_short"] = map_values(shorten_eye_advice, np.where(v["eye_advice"] == "", "-", v["eye_advice"]))
+
+    v.update(out)
+    return out
+
+
+# ===============================
+# CHECK: เทียบผลกับฟังก์ชันทีละค่าใน interpret.py
+# ===============================
+# python interpret_engine.py --check            (ใช้ snapshot ล่าสุดใน snapshots/)
+# python interpret_engine.py --check export.csv
+
+def check_parity(df):
+    year_data = YearData(df)
+    interpret_all(year_data, df["เพศ"] if "เพศ" in df.columns else [""] * len(df))
+    v = year_data.values
+    mismatches = []
+
+    def expect(name, pos, i, got, want):
+        if got != want:
+            mismatches.append((name, pos, year_data.years[i], got, want))
+
+    for pos in range(year_data.size):
+        sex = str(df["เพศ"].iloc[pos]).strip() if "เพศ" in df.columns else ""
+        for i in range(len(year_data.years)):
+            raw = {m: ("" if v[m][pos, i] is None else str(v[m][pos, i]).strip()) for m in NUMERIC_METRICS}
+            try:
+                bmi = round(float(v["weight"][pos, i]) / ((float(v["height"][pos, i]) / 100) ** 2), 1)
+                expect("bmi", pos, i, v["bmi_label"][pos, i], interpret.interpret_bmi(bmi))
+            except (TypeError, ValueError, ZeroDivisionError):
+                expect("bmi", pos, i, v["bmi_label"][pos, i], "-")
+            expect("bp", pos, i, v["bp_label"][pos, i], interpret.interpret_bp(raw["sbp"], raw["dbp"]))
+            expect("waist", pos, i, v["waist_label"][pos, i], interpret.interpret_waist(raw["waist"], raw["height"]))
+            expect("cbc_wbc", pos, i, v["cbc_wbc_label"][pos, i], interpret.interpret_wbc(raw["cbc_wbc"]))
+            expect("hb", pos, i, v["hb_label"][pos, i], interpret.interpret_hb(raw["hb"], sex))
+            expect("plt", pos, i, v["plt_label"][pos, i], interpret.interpret_plt(raw["plt"]))
+            for m, limit in LIVER_UPPER_LIMITS.items():
+                shown = interpret.with_label(v[f"{m}_value"][pos, i], v[f"{m}_label"][pos, i])
+                expect(m, pos, i, shown, interpret.interpret_liver(raw[m], limit)[0])
+            expect("liver_summary", pos, i, v["liver_summary"][pos, i], interpret.summarize_liver(raw["alp"], raw["sgot"], raw["sgpt"]))
+            for m, func in [
+                ("uric", interpret.interpret_uric), ("bun", interpret.interpret_bun), ("cr", interpret.interpret_cr),
+                ("gfr", interpret.interpret_gfr), ("fbs", interpret.interpret_fbs), ("chol", interpret.interpret_chol),
+                ("tgl", interpret.interpret_tgl), ("hdl", interpret.interpret_hdl), ("ldl", interpret.interpret_ldl),
+                ("fvc", interpret.format_result), ("fev1", interpret.format_result), ("fev1_fvc", interpret.format_result),
+            ]:
+                shown = interpret.with_label(v[f"{m}_value"][pos, i], v[f"{m}_label"][pos, i])
+                expect(m, pos, i, shown, func(raw[m]))
+            expect("lipid_summary", pos, i, v["lipid_summary"][pos, i], interpret.summarize_lipids(raw["chol"], raw["tgl"], raw["ldl"]))
+            expect("lung_summary", pos, i, v["lung_summary"][pos, i], interpret.interpret_lung(raw["fvc"], raw["fev1"], raw["fev1_fvc"]))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ตรวจว่าผลแปลแบบ batch ตรงกับฟังก์ชันทีละค่า")
+    parser.add_argument("--check", nargs="?", const="", metavar="EXPORT", required=True)
+    args = parser.parse_args(argv)
+
+    from snapshot_store import SnapshotStore, read_export
+    df = read_export(args.check) if args.check else SnapshotStore().load()
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุไฟล์ export หรือสร้าง snapshot ก่อน)")
+        return 1
+    mismatches = check_parity(df)
+    for name, pos, year, got, want in mismatches[:20]:
+        print(f"❌ {name} แถว {pos} ปี {year}: engine={got!r} เดิม={want!r}")
+    print(f"{'✅' if not mismatches else '❌'} ตรวจ {len(df)} คน · ไม่ตรง {len(mismatches)} จุด")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from health_data import exact_float
+from snapshot_store import add_source_arguments, frame_column, load_source, report_mismatches
+from timing import timed
+
+# ===============================
+# LUNG SCREEN (สมรรถภาพปอดทั้งหน่วยงานในรอบเดียว)
+# ===============================
+# python lung_screen.py worse.csv --year 2568     (รายชื่อที่ผลแย่ลงจากครั้งก่อน)
+# python lung_screen.py --check                    (เทียบกับ interpret.interpret_lung ทีละคนทีละปี)
+#
+# FVC / FEV1 / FEV1/FVC (%) ของทุกคนทุกปีเป็น array (คน, ปี) จาก year_data.numbers
+# แล้วจัดกลุ่มด้วย classify_lung ทีเดียวทั้งชุด (เกณฑ์เดียวกับ interpret.interpret_lung
+# ซึ่ง interpret_engine ใช้สร้าง lung_summary ด้วย)
+# ผลแย่ลง = ระดับความรุนแรงสูงขึ้นจากครั้งก่อนที่สรุปผลได้: ปกติ < ปอดจำกัดการขยายตัว / หลอดลมอุดกั้น < Mixed
+# (สรุปไม่ได้ / ไม่มีข้อมูล ไม่นำมาเทียบ)
+
+NO_DATA, NORMAL, RESTRICTIVE, MIXED, OBSTRUCTIVE, UNCLASSIFIED = range(6)
+# ข้อความผลสรุปตาม code (ตรงกับ interpret.interpret_lung, "-" = ไม่มีข้อมูล)
+LUNG_SUMMARIES = np.array([
+    "-",
+    "สมรรถภาพปอดปกติ",
+    "พบความผิดปกติแบบปอดจำกัดการขยายตัวเล็กน้อย",
+    "Mixed",
+    "พบความผิดปกติแบบหลอดลมอุดกั้นเล็กน้อย",
+    "สรุปไม่ได้",
+], dtype=object)
+PATTERN_LABELS = ["ไม่มีข้อมูล", "ปกติ", "ปอดจำกัดการขยายตัว (restrictive)", "Mixed", "หลอดลมอุดกั้น (obstructive)", "สรุปไม่ได้"]
+SEVERITY = np.array([-1, 0, 1, 2, 1, -1])  # -1 = ไม่นำมาเทียบ
+METRICS = ["fvc", "fev1", "fev1_fvc"]
+
+
+def classify_lung(fvc, fev1, ratio):
+    # → code (int8) ขนาดเดียวกับ input ลำดับเงื่อนไขเดียวกับ interpret_lung
+    with np.errstate(invalid="ignore"):
+        return np.select(
+            [
+                np.isnan(fvc) | np.isnan(fev1) | np.isnan(ratio),
+                (fvc > 80) & (fev1 > 80) & (ratio > 70),
+                (fvc <= 80) & (fev1 > 70) & (ratio <= 100),
+                (fvc <= 80) & (fev1 <= 70),
+                (fvc < 100) & (fev1 <= 70) & (ratio <= 65),
+            ],
+            [NO_DATA, NORMAL, RESTRICTIVE, MIXED, OBSTRUCTIVE],
+            UNCLASSIFIED,
+        ).astype(np.int8)
+
+
+class Spirometry:
+    def __init__(self, year_data):
+        self.years = list(year_data.years)
+        # ✅ (คน, ปี) จาก numbers ที่ YearData แปลงเป็นตัวเลขไว้แล้ว
+        self.values = {m: exact_float(year_data.numbers[m]) for m in METRICS}
+        self.codes = classify_lung(*(self.values[m] for m in METRICS))
+        self.severity = SEVERITY[self.codes]
+
+        # ===== ครั้งก่อนที่สรุปผลได้ (คน, ปี) → index ปี, -1 = ไม่มี =====
+        years = np.arange(len(self.years))
+        last = np.maximum.accumulate(np.where(self.severity >= 0, years, -1), axis=1)
+        self.previous = np.full_like(last, -1)
+        self.previous[:, 1:] = last[:, :-1]
+
+    def worse(self):
+        # (คน, ปี) ผลปีนี้รุนแรงกว่าครั้งก่อนที่สรุปผลได้
+        people = np.arange(len(self.codes))[:, None]
+        before = self.severity[people, np.maximum(self.previous, 0)]
+        return (self.previous >= 0) & (self.severity >= 0) & (self.severity > before)
+
+    def summary(self):
+        # จำนวนคนแต่ละรูปแบบต่อปี (เฉพาะปีที่มีผลตรวจ)
+        counts = np.stack([(self.codes == c).sum(axis=0) for c in range(len(PATTERN_LABELS))], axis=1)
+        table = pd.DataFrame(counts, columns=PATTERN_LABELS, index=pd.Index(self.years, name="ปี"))
+        table = table.drop(columns=PATTERN_LABELS[NO_DATA])
+        table.insert(0, "ตรวจ", table.sum(axis=1))
+        table["ผลแย่ลงจากครั้งก่อน"] = self.worse().sum(axis=0)
+        return table[table["ตรวจ"] > 0]
+
+
+# ===============================
+# WORSENED LIST
+# ===============================
+def worse_list(snapshot, year=None, spirometry=None):
+    # คนที่ผลปีนี้ (ค่าเริ่มต้น = ปีล่าสุด) แย่ลงจากครั้งก่อน เรียงจากระดับที่เพิ่มขึ้น / FEV1 ที่ลดลงมากสุด
+    spirometry = spirometry or Spirometry(snapshot.year_data)
+    year = year or snapshot.year_data.latest_year
+    i = spirometry.years.index(year)
+    people = np.flatnonzero(spirometry.worse()[:, i])
+    previous = spirometry.previous[people, i]
+    before = spirometry.codes[people, previous]
+    now = spirometry.codes[people, i]
+    labels = np.asarray(PATTERN_LABELS, dtype=object)
+    years = np.asarray(spirometry.years)
+
+    table = pd.DataFrame({
+        "HN": frame_column(snapshot.df, "HN")[people],
+        "เลขบัตรประชาชน": frame_column(snapshot.df, "เลขบัตรประชาชน")[people],
+        "ชื่อ-สกุล": frame_column(snapshot.df, "ชื่อ-สกุล")[people],
+        "ปีที่ตรวจครั้งก่อน": years[previous],
+        "ผลครั้งก่อน": labels[before],
+        f"ผลปี {year}": labels[now],
+    })
+    for m, title in (("fvc", "FVC"), ("fev1", "FEV1"), ("fev1_fvc", "FEV1/FVC")):
+        values = spirometry.values[m]
+        table[f"{title} ครั้งก่อน (%)"] = values[people, previous]
+        table[f"{title} (%)"] = values[people, i]
+    table["FEV1 เปลี่ยน (%)"] = np.round(table["FEV1 (%)"] - table["FEV1 ครั้งก่อน (%)"], 1)
+    table["_rank"] = SEVERITY[now] - SEVERITY[before]
+    table = table.sort_values(["_rank", "FEV1 เปลี่ยน (%)"], ascending=[False, True], kind="stable", na_position="last")
+    return table.drop(columns="_rank").reset_index(drop=True)
+
+
+# ===============================
+# UI
+# ===============================
+def render_lung_screen(snapshot):
+    import streamlit as st  # CLI ใช้ Spirometry โดยไม่ต้องโหลด streamlit
+
+    st.markdown("## 🫁 สมรรถภาพปอดทั้งหน่วยงาน")
+    st.caption(
+        "จัดกลุ่มตามเกณฑ์เดียวกับผลรายบุคคล · ผลแย่ลง = ปกติ → ปอดจำกัดการขยายตัว / หลอดลมอุดกั้น → Mixed "
+        "เทียบกับครั้งก่อนที่สรุปผลได้"
+    )
+    with timed("lung_screen", rows=len(snapshot)):
+        spirometry = Spirometry(snapshot.year_data)
+        summary = spirometry.summary()
+    if summary.empty:
+        st.info("ไม่มีข้อมูลการตรวจสมรรถภาพปอด")
+        return
+    st.dataframe(summary.T, width="stretch")
+    patterns = [PATTERN_LABELS[c] for c in (RESTRICTIVE, OBSTRUCTIVE, MIXED)]
+    st.bar_chart(summary[patterns].rename(index=str), stack=True)
+
+    years = list(summary.index)
+    year = st.selectbox("ปีที่ตรวจ", years, index=len(years) - 1, key="lung_screen_year")
+    with timed("lung_worse", year=year):
+        table = worse_list(snapshot, year, spirometry)
+    st.markdown(f"### 📉 รายชื่อที่ผลแย่ลงจากครั้งก่อน ปี {year} ({len(table):,} คน)")
+    if table.empty:
+        st.success("ไม่มีผู้ที่ผลแย่ลงจากครั้งก่อน")
+        return
+    st.dataframe(table, hide_index=True, width="stretch")
+    st.download_button(
+        "ดาวน์โหลด (.csv)",
+        data=table.to_csv(index=False).encode("utf-8-sig"),
+        file_name=f"lung_worse_{year}.csv",
+        mime="text/csv",
+        on_click="ignore",
+        key="lung_worse_download",
+    )
+
+
+# ===============================
+# CLI
+# ===============================
+def check_parity(snapshot):
+    # เทียบผลทุกคนทุกปีกับ interpret.interpret_lung (ค่าทีละช่องแบบเดียวกับที่กรอกในชีต)
+    from interpret import interpret_lung
+    year_data = snapshot.year_data
+    summaries = LUNG_SUMMARIES[Spirometry(year_data).codes]
+    raw = {m: year_data.values[m] for m in METRICS}
+    mismatches = []
+    for p in range(len(snapshot)):
+        for i, y in enumerate(year_data.years):
+            cells = ["" if raw[m][p, i] is None else str(raw[m][p, i]).strip() for m in METRICS]
+            want = interpret_lung(*cells)
+            if summaries[p, i] != want:
+                mismatches.append((p, y, summaries[p, i], want))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สมรรถภาพปอดทั้งหน่วยงาน → รายชื่อที่ผลแย่ลงจากครั้งก่อน")
+    parser.add_argument("out", nargs="?", help="ไฟล์ CSV รายชื่อที่ผลแย่ลง")
+    parser.add_argument("--year", type=int, help="ปี พ.ศ. (ค่าเริ่มต้น = ปีล่าสุด)")
+    parser.add_argument("--check", action="store_true", help="เทียบผลกับ interpret.interpret_lung ทีละค่า")
+    add_source_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from snapshot import Snapshot
+    df = load_source(args.source, args.dir)
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุ --source หรือสร้าง snapshot ก่อน)")
+        return 1
+    snapshot = Snapshot(df)
+    if args.year is not None and args.year not in snapshot.year_data.years:
+        parser.error(f"ไม่มีข้อมูลปี {args.year} (มี: {', '.join(map(str, snapshot.year_data.years))})")
+
+    if args.check:
+        return report_mismatches(check_parity(snapshot), len(snapshot))
+
+    spirometry = Spirometry(snapshot.year_data)
+    print(spirometry.summary().to_string())
+    table = worse_list(snapshot, args.year, spirometry)
+    print(f"📉 ผลแย่ลงจากครั้งก่อน {len(table):,} คน")
+    if args.out:
+        table.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ → {args.out}")
+    else:
+        print(table.head(20).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
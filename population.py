@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# ===============================
+# POPULATION STATS (จำนวนคนตามผลแปล × ปี × เพศ)
+# ===============================
+# นับครั้งเดียวต่อ snapshot จากผลแปลที่ interpret_engine คำนวณไว้แล้ว
+# หน้า dashboard แค่กรอง/รวมตารางนับ (ไม่กี่พันแถว) ไม่ต้องสแกนข้อมูลรายคนใหม่
+# ผล "-" = ไม่มีข้อมูล/ไม่ได้ตรวจ → ไม่นับเป็นตัวหาร
+
+SEXES = ["ชาย", "หญิง", "ไม่ระบุ"]
+NOT_TESTED = "-"
+
+# หมวดที่แสดงใน dashboard: ชื่อผลแปลใน year_data.values → ชื่อที่แสดง
+CATEGORIES = {
+    "bmi_label": "ดัชนีมวลกาย (BMI)",
+    "waist_label": "รอบเอว",
+    "bp_label": "ความดันโลหิต",
+    "urine_alb_label": "โปรตีนในปัสสาวะ",
+    "urine_sugar_label": "น้ำตาลในปัสสาวะ",
+    "urine_rbc_label": "เม็ดเลือดแดงในปัสสาวะ",
+    "urine_wbc_label": "เม็ดเลือดขาวในปัสสาวะ",
+    "urine_result": "ผลสรุปปัสสาวะ",
+    "stool_exam_label": "อุจจาระทั่วไป",
+    "stool_cs_label": "เพาะเชื้ออุจจาระ",
+    "cbc_result": "ความสมบูรณ์ของเลือด (CBC)",
+    "cbc_wbc_label": "เม็ดเลือดขาว (WBC)",
+    "hb_label": "ความเข้มข้นของเลือด (Hb)",
+    "plt_label": "เกล็ดเลือด (Plt)",
+    "alp_label": "ALP",
+    "sgot_label": "SGOT (AST)",
+    "sgpt_label": "SGPT (ALT)",
+    "liver_summary": "ผลสรุปการทำงานของตับ",
+    "uric_label": "กรดยูริค",
+    "bun_label": "BUN",
+    "cr_label": "Creatinine",
+    "gfr_label": "GFR",
+    "fbs_label": "น้ำตาลในเลือด (FBS)",
+    "chol_label": "CHOL",
+    "tgl_label": "TGL",
+    "hdl_label": "HDL",
+    "ldl_label": "LDL",
+    "lipid_summary": "ผลสรุปไขมันในเลือด",
+    "lung_summary": "สมรรถภาพปอด",
+    "eye_summary_short": "สมรรถภาพตา",
+}
+
+# ตัวชี้วัดหลักที่ทีมอาชีวเวชกรรมนับทุกปี: (ชื่อ, ชื่อในกราฟ, หมวด, ผลแปลที่นับว่าผิดปกติ)
+HEADLINES = [
+    ("ความดันสูง", "High BP", "bp_label", ["ความดันสูง", "ความดันสูงเล็กน้อย"]),
+    ("CBC ผิดปกติ", "Abnormal CBC", "cbc_result", ["ผิดปกติ"]),
+    ("ไขมันในเลือดสูง", "High lipids", "lipid_summary", ["ไขมันในเลือดสูง", "ไขมันในเลือดสูงเล็กน้อย"]),
+    ("GFR < 60", "GFR < 60", "gfr_label", ["ต่ำกว่าเกณฑ์"]),
+    ("น้ำตาลในเลือดสูง", "High FBS", "fbs_label", ["สูงเล็กน้อย", "สูง"]),
+    ("อ้วน (BMI ≥ 25)", "BMI >= 25", "bmi_label", ["อ้วน", "อ้วนมาก"]),
+]
+
+
+def normalize_sex(values):
+    sex = pd.Series(np.asarray(values, dtype=object)).map(lambda v: "" if v is None else str(v).strip())
+    return sex.where(sex.isin(["ชาย", "หญิง"]), "ไม่ระบุ").to_numpy(dtype=object)
+
+
+def cbc_result(values):
+    # ผิดปกติ ถ้า WBC / Hb / Plt ค่าใดค่าหนึ่งไม่ปกติ (ไม่ได้ตรวจเลย = "-")
+    labels = [values[m] for m in ("cbc_wbc_label", "hb_label", "plt_label")]
+    tested = np.logical_or.reduce([l != NOT_TESTED for l in labels])
+    abnormal = np.logical_or.reduce([(l != NOT_TESTED) & (l != "ปกติ") for l in labels])
+    return np.where(abnormal, "ผิดปกติ", np.where(tested, "ปกติ", NOT_TESTED)).astype(object)
+
+
+class PopulationStats:
+    def __init__(self, year_data, sex):
+        self.years = list(year_data.years)
+        sex_codes = pd.Categorical(normalize_sex(sex), categories=SEXES).codes
+        n_years = len(self.years)
+        values = dict(year_data.values)
+        values["cbc_result"] = cbc_result(values)
+
+        frames = []
+        for metric in CATEGORIES:
+            arr = values.get(metric)
+            if arr is None:
+                continue
+            # ✅ นับด้วย bincount ของคีย์ (ผลแปล, ปี, เพศ) ครั้งเดียวต่อหมวด
+            codes, labels = pd.factorize(arr.ravel(), use_na_sentinel=False)
+            year_codes = np.tile(np.arange(n_years), len(arr))
+            person_sex = np.repeat(sex_codes, n_years)
+            key = (codes * n_years + year_codes) * len(SEXES) + person_sex
+            counts = np.bincount(key, minlength=len(labels) * n_years * len(SEXES))
+            nonzero = np.flatnonzero(counts)
+            label_idx, rest = np.divmod(nonzero, n_years * len(SEXES))
+            year_idx, sex_idx = np.divmod(rest, len(SEXES))
+            frames.append(pd.DataFrame({
+                "metric": metric,
+                "year": np.asarray(self.years)[year_idx],
+                "sex": np.asarray(SEXES, dtype=object)[sex_idx],
+                "label": np.asarray(labels, dtype=object)[label_idx],
+                "count": counts[nonzero],
+            }))
+        columns = ["metric", "year", "sex", "label", "count"]
+        self.counts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        self.by_metric = {m: frame for m, frame in self.counts.groupby("metric", sort=False)}
+        self.metrics = [m for m in CATEGORIES if m in self.by_metric]
+        self._tables = {}  # (หมวด, เพศ, ปี) → ตารางที่รวมแล้ว (snapshot อ่านอย่างเดียว จึงเก็บไว้ใช้ซ้ำได้)
+
+    def _slice(self, metric, sexes=None, years=None):
+        counts = self.by_metric.get(metric, self.counts.iloc[:0])
+        if sexes:
+            counts = counts[counts["sex"].isin(sexes)]
+        if years:
+            counts = counts[counts["year"].isin(years)]
+        return counts
+
+    def table(self, metric, sexes=None, years=None):
+        # ผลแปล × ปี → จำนวนคน (เฉพาะคนที่มีผลตรวจ) พร้อมแถว "ตรวจทั้งหมด"
+        key = (metric, tuple(sexes or ()), tuple(years or ()))
+        if key not in self._tables:
+            self._tables[key] = self._table(metric, sexes, years)
+        return self._tables[key].copy()
+
+    def _table(self, metric, sexes, years):
+        counts = self._slice(metric, sexes, years)
+        counts = counts[counts["label"] != NOT_TESTED]
+        columns = years or self.years
+        table = counts.groupby(["label", "year"])["count"].sum().unstack(fill_value=0)
+        table = table.reindex(columns=columns, fill_value=0)
+        table = table.loc[table.sum(axis=1).sort_values(ascending=False).index]
+        table.loc["ตรวจทั้งหมด"] = table.sum()
+        table.index.name = table.columns.name = None
+        return table.astype(int)
+
+    def prevalence(self, metric, sexes=None, years=None):
+        # ร้อยละของคนที่มีผลตรวจในปีนั้น
+        table = self.table(metric, sexes, years)
+        tested = table.loc["ตรวจทั้งหมด"]
+        return (table.drop(index="ตรวจทั้งหมด") / tested.where(tested > 0) * 100).round(1)
+
+    def headline(self, sexes=None, years=None):
+        # ตัวชี้วัดหลัก × ปี → ร้อยละ
+        rows = {}
+        for title, _, metric, abnormal in HEADLINES:
+            table = self.table(metric, sexes, years)
+            tested = table.loc["ตรวจทั้งหมด"]
+            hits = table.loc[table.index.isin(abnormal)].sum()
+            rows[title] = (hits / tested.where(tested > 0) * 100).round(1)
+        return pd.DataFrame(rows).T
+
+    def by_sex(self, metric, year, sexes=None):
+        # เพศ × ผลแปล ของปีเดียว → ร้อยละ
+        counts = self._slice(metric, sexes, [year])
+        counts = counts[counts["label"] != NOT_TESTED]
+        table = counts.groupby(["sex", "label"])["count"].sum().unstack(fill_value=0)
+        table = table.reindex(index=[s for s in SEXES if s in table.index])
+        table.index.name = table.columns.name = None
+        return (table.div(table.sum(axis=1), axis=0) * 100).round(1)
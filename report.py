@@ -0,0 +1,575 @@
+import base64
+
+import pandas as pd
+
+from charts import render_chart
+from health_schema import HEARING_FREQS
+from interpret import interpret_hearing, is_no_hearing_data, with_label
+
+# ===============================
+# REPORT SECTIONS (ส่วนแสดงผลรายบุคคล)
+# ===============================
+# แต่ละส่วนคืนรายการ block: ("heading" | "html" | "info" | "success" | "image", เนื้อหา)
+# (กราฟเป็น PNG bytes จาก charts.py → report_cache.py เก็บ block ไว้ใช้ซ้ำได้ทั้งหมด)
+# - app.py แสดง block ด้วย st.markdown / st.info / st.image (หน้าเว็บเหมือนเดิม)
+# - batch_report.py แปลง block เดียวกันเป็นไฟล์ HTML / PDF → รายงานที่พิมพ์ตรงกับหน้าเว็บ
+
+
+def lab_result(rec, metric, year):
+    # ค่าตรวจ + ผลแปลบรรทัดล่าง (ค่าว่าง / 0 / ไม่ใช่ตัวเลข = "-")
+    return with_label(rec.get(f"{metric}_value", year), rec.get(f"{metric}_label", year))
+
+
+def first_hearing_year(rec):
+    # ปีแรกที่มีผลตรวจการได้ยิน (ใช้แทน baseline เมื่อไม่มี baseline จริง)
+    for y in rec.years:
+        left = {f: rec.get(f"L{f}", y) for f in HEARING_FREQS}
+        right = {f: rec.get(f"R{f}", y) for f in HEARING_FREQS}
+        if not is_no_hearing_data(left) or not is_no_hearing_data(right):
+            return {"data": {"left": left, "right": right}, "year": y}
+    return None
+
+
+# ===============================
+# HEADER (ชื่อ / เลขบัตร / HN / เพศ)
+# ===============================
+def header_section(rec, person):
+    blocks = []
+    # ✅ แสดงชื่อคนไข้ ด้วยแถบเขียว และขนาดใหญ่
+    # ✅ ปลอดภัย ไม่ทำให้ error
+    blocks.append(("success", f"✅ พบข้อมูลของ: {person.get('ชื่อ-สกุล', '-')}"))
+
+    # ✅ แสดงเลขบัตร / HN / เพศ ด้วยสีขาว (เพื่อ contrast กับพื้นเข้ม)
+    blocks.append(("html", f"""
+    <p style='color: white; font-size: 16px; line-height: 1.6;'>
+    เลขบัตรประชาชน: {person.get('เลขบัตรประชาชน', '-')}<br>
+    HN: {person.get('HN', '-')}<br>
+    เพศ: {person.get('เพศ', '-')}
+    </p>
+    """))
+    return blocks
+
+
+# ===============================
+# BODY (น้ำหนัก / รอบเอว / ความดัน)
+# ===============================
+def body_section(rec, person):
+    blocks = []
+    # ✅ สร้างตารางข้อมูลสุขภาพตามปี (ผลแปลคำนวณไว้แล้วตอนโหลด snapshot ดู interpret_engine)
+    table_data = {
+        "ปี พ.ศ.": [],
+        "น้ำหนัก (กก.)": [],
+        "ส่วนสูง (ซม.)": [],  # ✅ เพิ่มตรงนี้
+        "รอบเอว (ซม.)": [],
+        "ความดัน (mmHg)": [],
+        "BMI (แปลผล)": []
+    }
+    
+    for y in rec.years:
+        weight = rec.get("weight", y)
+        height = rec.get("height", y)
+        waist = rec.get("waist", y)
+        sbp = rec.get("sbp", y)
+        dbp = rec.get("dbp", y)
+    
+        # ✅ BMI จากน้ำหนักและส่วนสูง
+        bmi_label = rec.get("bmi_label", y)
+        if bmi_label != "-":
+            bmi_str = f"{rec.get('bmi', y)}<br><span style='font-size: 13px; color: gray;'>{bmi_label}</span>"
+        else:
+            bmi_str = "-"
+    
+        # ✅ แปลผลความดัน
+        if sbp or dbp:
+            bp_str = f"{sbp}/{dbp}<br><span style='font-size: 13px; color: gray;'>{rec.get('bp_label', y)}</span>"
+        else:
+            bp_str = "-"
+    
+        # ✅ เติมข้อมูลลงตาราง
+        table_data["ปี พ.ศ."].append(y)
+        table_data["น้ำหนัก (กก.)"].append(weight if weight else "-")
+        table_data["ส่วนสูง (ซม.)"].append(height if height else "-")
+        table_data["รอบเอว (ซม.)"].append(waist if waist else "-")
+        table_data["ความดัน (mmHg)"].append(bp_str)
+        table_data["BMI (แปลผล)"].append(bmi_str)
+    
+    # ✅ แสดงผลตาราง (รองรับ HTML <br> ด้วย unsafe_allow_html)
+    blocks.append(("heading", "### 📊 น้ำหนัก / รอบเอว / ความดัน"))
+    html_table = pd.DataFrame(table_data).set_index("ปี พ.ศ.").T.to_html(escape=False)
+    blocks.append(("html", html_table))
+    return blocks
+
+
+# ===============================
+# DISPLAY: URINE TEST (ทุกปีที่มีในชีต)
+# ===============================
+def urine_section(rec, person):
+    blocks = []
+    urine_table = {
+        "โปรตีน": [],
+        "น้ำตาล": [],
+        "เม็ดเลือดแดง": [],
+        "เม็ดเลือดขาว": [],
+        "ผลสรุป": []
+    }
+    
+    for y in rec.years:
+        for field, metric in [("โปรตีน", "urine_alb"), ("น้ำตาล", "urine_sugar"), ("เม็ดเลือดแดง", "urine_rbc"), ("เม็ดเลือดขาว", "urine_wbc")]:
+            raw = rec.text(metric, y)
+            urine_table[field].append(f"{raw}<br><span style='font-size:13px;color:gray;'>{rec.get(f'{metric}_label', y)}</span>" if raw else "-")
+        urine_table["ผลสรุป"].append(rec.get("urine_result", y))
+    
+    # คำแนะนำเฉพาะปีล่าสุดเท่านั้น
+    advice_latest = rec.get("urine_advice", rec.latest_year)
+    
+    # ===============================
+    # แสดงผลตาราง
+    # ===============================
+    blocks.append(("heading", "### 🚽 ผลตรวจปัสสาวะ"))
+    urine_df = pd.DataFrame.from_dict(urine_table, orient="index", columns=rec.years)
+    blocks.append(("html", urine_df.to_html(escape=False)))
+    
+    # แสดงคำแนะนำเฉพาะถ้าไม่ใช่ "ปกติ" และไม่ใช่ "-"
+    if advice_latest and advice_latest not in ["-", ""] and "ปกติ" not in advice_latest:
+        blocks.append(("html", f"""
+        <div style='
+            background-color: rgba(255, 215, 0, 0.2);
+            padding: 1rem;
+            border-radius: 6px;
+            color: white;
+        '>
+            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจปัสสาวะปี {rec.latest_year}</div>
+            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_latest}</div>
+        </div>
+        """))
+    return blocks
+
+
+# ===============================
+# DISPLAY: STOOL TEST
+# ===============================
+def stool_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 💩 ผลตรวจอุจจาระ"))
+    
+    stool_table = {
+        "ผลตรวจอุจจาระทั่วไป": [rec.get("stool_exam_label", y) for y in rec.years],
+        "ผลเพาะเชื้ออุจจาระ": [rec.get("stool_cs_label", y) for y in rec.years]
+    }
+    
+    # แสดงเป็น DataFrame
+    stool_df = pd.DataFrame.from_dict(stool_table, orient="index", columns=rec.years)
+    blocks.append(("html", stool_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: BLOOD TEST (CBC)
+# ===============================
+def cbc_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🩸 ความสมบูรณ์ของเลือด"))
+    
+    blood_table = {
+        "เม็ดเลือดขาว (WBC)": [rec.get("cbc_wbc_label", y) for y in rec.years],
+        "ความเข้มข้นของเลือด (Hb%)": [rec.get("hb_label", y) for y in rec.years],
+        "เกล็ดเลือด (Plt)": [rec.get("plt_label", y) for y in rec.years]
+    }
+    
+    blood_df = pd.DataFrame.from_dict(blood_table, orient="index", columns=rec.years)
+    blocks.append(("html", blood_df.to_html(escape=False)))
+    
+    # คำแนะนำ CBC ปีล่าสุด
+    cbc_results = [rec.get(m, rec.latest_year) for m in ("cbc_wbc_label", "hb_label", "plt_label")]
+    cbc_recommendation = rec.get("cbc_advice", rec.latest_year)
+    
+    # แสดงคำแนะนำ เฉพาะเมื่อมีข้อมูลอย่างน้อย 1 ค่าที่ไม่ใช่ "-"
+    if cbc_recommendation and not all(x == "-" for x in cbc_results):
+        blocks.append(("html", f"""
+        <div style='
+            background-color: rgba(255, 105, 135, 0.15);
+            padding: 1rem;
+            border-radius: 6px;
+            color: white;
+        '>
+            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจเลือด (CBC) ปี {rec.latest_year}</div>
+            <div style='font-size: 16px; margin-top: 0.3rem;'>{cbc_recommendation}</div>
+        </div>
+        """))
+    return blocks
+
+
+# ===============================
+# DISPLAY: LIVER TEST (การทำงานของตับ)
+# ===============================
+def liver_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🧪 การทำงานของตับ"))
+    
+    # เตรียมตาราง
+    liver_data = {
+        "ระดับเอนไซม์ ALP": [lab_result(rec, "alp", y) for y in rec.years],
+        "SGOT (AST)": [lab_result(rec, "sgot", y) for y in rec.years],
+        "SGPT (ALT)": [lab_result(rec, "sgpt", y) for y in rec.years],
+        "ผลสรุป": [rec.get("liver_summary", y) for y in rec.years]
+    }
+    
+    # คำแนะนำเฉพาะปีล่าสุด
+    advice_liver = rec.get("liver_advice", rec.latest_year)
+    
+    # แสดงตาราง
+    liver_df = pd.DataFrame.from_dict(liver_data, orient="index", columns=rec.years)
+    blocks.append(("html", liver_df.to_html(escape=False)))
+    
+    # แสดงเฉพาะเมื่อมีความผิดปกติ
+    if advice_liver and advice_liver != "-" and advice_liver != "":
+        blocks.append(("html", f"""
+        <div style='
+            background-color: rgba(100, 221, 23, 0.15);
+            padding: 1rem;
+            border-radius: 6px;
+            color: white;
+        '>
+            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำผลตรวจตับ ปี {rec.latest_year}</div>
+            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_liver}</div>
+        </div>
+        """))
+    return blocks
+
+
+# ===============================
+# DISPLAY: URIC ACID (ผลยูริคในเลือด)
+# ===============================
+def uric_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🧪 ผลกรดยูริคในเลือด"))
+    
+    uric_df = pd.DataFrame({
+        "กรดยูริคในเลือด (mg/dL)": [lab_result(rec, "uric", y) for y in rec.years]
+    }, index=rec.years).T
+    
+    # แสดงผล
+    blocks.append(("html", uric_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: KIDNEY FUNCTION (ผลตรวจไต)
+# ===============================
+def kidney_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🧪 การทำงานของไต"))
+    
+    kidney_data = {
+        "BUN (mg/dL)": [lab_result(rec, "bun", y) for y in rec.years],
+        "Creatinine (mg/dL)": [lab_result(rec, "cr", y) for y in rec.years],
+        "Estimated GFR (mL/min/1.73m²)": [lab_result(rec, "gfr", y) for y in rec.years]
+    }
+    
+    # แสดงผลเป็น DataFrame
+    kidney_df = pd.DataFrame.from_dict(kidney_data, orient="index", columns=rec.years)
+    blocks.append(("html", kidney_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: FBS (ผลตรวจน้ำตาลในเลือด)
+# ===============================
+def fbs_section(rec, person):
+    blocks = []
+    fbs_df = pd.DataFrame({
+        "ระดับน้ำตาลในเลือด (FBS) (mg/dL)": [lab_result(rec, "fbs", y) for y in rec.years]
+    }, index=rec.years).T
+    
+    blocks.append(("heading", "### 🍬 น้ำตาลในเลือด (FBS)"))
+    blocks.append(("html", fbs_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: BLOOD LIPIDS (ไขมันในเลือด)
+# ===============================
+def lipids_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🧪 ไขมันในเลือด"))
+    
+    lipid_data = {
+        "CHOL": [lab_result(rec, "chol", y) for y in rec.years],
+        "TGL": [lab_result(rec, "tgl", y) for y in rec.years],
+        "HDL": [lab_result(rec, "hdl", y) for y in rec.years],
+        "LDL": [lab_result(rec, "ldl", y) for y in rec.years],
+        "ผลสรุป": [rec.get("lipid_summary", y) for y in rec.years]
+    }
+    
+    # แสดงตาราง
+    lipid_df = pd.DataFrame.from_dict(lipid_data, orient="index", columns=rec.years)
+    blocks.append(("html", lipid_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: CHEST X-RAY (ผลเอกซเรย์)
+# ===============================
+def cxr_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🩻 ผลเอกซเรย์ (CXR)"))
+    
+    # ถ้าค่าไม่มีให้แสดง "-"
+    cxr_df = pd.DataFrame({
+        "ผลเอกซเรย์": [rec.text("cxr", y) or "-" for y in rec.years]
+    }, index=rec.years).T
+    
+    # แสดงผลในตาราง
+    blocks.append(("html", cxr_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: EKG (ผลคลื่นไฟฟ้าหัวใจ)
+# ===============================
+def ekg_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### ❤️ ผลคลื่นไฟฟ้าหัวใจ (EKG)"))
+    
+    # ถ้าไม่มีข้อมูล ให้แสดง "-"
+    ekg_df = pd.DataFrame({
+        "ผลคลื่นไฟฟ้าหัวใจ (EKG)": [rec.text("ekg", y) or "-" for y in rec.years]
+    }, index=rec.years).T
+    
+    # แสดงผล
+    blocks.append(("html", ekg_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# DISPLAY: ความจุปอด
+# ===============================
+def lung_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 🫁 สมรรถภาพปอด"))
+    
+    # ✅ ชื่อคอลัมน์สำรอง (มี/ไม่มีเว้นวรรค) เลือกไว้แล้วใน health_schema
+    lung_data = {
+        "FVC (%)": [lab_result(rec, "fvc", y) for y in rec.years],
+        "FEV1 (%)": [lab_result(rec, "fev1", y) for y in rec.years],
+        "FEV1/FVC (%)": [lab_result(rec, "fev1_fvc", y) for y in rec.years],
+        "ผลสรุป": [rec.get("lung_summary", y) for y in rec.years]
+    }
+    
+    # แสดงตาราง
+    lung_df = pd.DataFrame.from_dict(lung_data, orient="index", columns=rec.years)
+    blocks.append(("html", lung_df.to_html(escape=False)))
+    
+    # แสดงคำแนะนำ
+    advice_lung = rec.get("lung_advice", rec.latest_year)
+    
+    if advice_lung and advice_lung != "-":
+        blocks.append(("html", f"""
+        <div style='
+            background-color: rgba(0, 150, 136, 0.15);
+            padding: 1rem;
+            border-radius: 6px;
+            color: white;
+        '>
+            <div style='font-size: 18px; font-weight: bold;'>📌 คำแนะนำสมรรถภาพปอด ปี {rec.latest_year}</div>
+            <div style='font-size: 16px; margin-top: 0.3rem;'>{advice_lung}</div>
+        </div>
+        """))
+    return blocks
+
+
+# ===============================
+# DISPLAY: สมรรถภาพตา (รองรับปีอนาคต)
+# ===============================
+def eye_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 👁️ สมรรถภาพตา"))
+    
+    # ปีทั้งหมดจากข้อมูลจริง (จากชื่อคอลัมน์) หาไว้แล้วตอนโหลด snapshot
+    eye_years = rec.data.eye_years
+    
+    # หัวข้อข้อมูลที่เราสนใจ (ค่าแรกที่ไม่ว่างจากหลายคอลัมน์ ดู COALESCED_METRICS ใน health_schema)
+    # ผลสรุป / คำแนะนำ ย่อข้อความไว้แล้วตอนโหลด snapshot
+    eye_data = {
+        "ภาพรวมสายตา (ป)": [rec.text("eye_normal", y) or "-" for y in eye_years],
+        "ภาพรวมสายตา (ผ)": [rec.text("eye_abnormal", y) or "-" for y in eye_years],
+        "ผลสรุป": [rec.get("eye_summary_short", y) for y in eye_years],
+        "คำแนะนำ": [rec.get("eye_advice_short", y) for y in eye_years],
+    }
+    
+    # แสดงตาราง
+    eye_df = pd.DataFrame.from_dict(eye_data, orient="index", columns=eye_years)
+    blocks.append(("html", eye_df.to_html(escape=False)))
+    return blocks
+
+
+# ===============================
+# แปลผลสมรรถภาพการได้ยิน (ตามเกณฑ์มาตรฐาน)
+# ===============================
+def hearing_results(rec, person):
+    # ผลแปลการได้ยินรายปี → ({ปี: [บรรทัดผล]}, ปีที่ใช้แทน baseline หรือ None)
+    # (person ใช้เฉพาะคอลัมน์ baseline L1kB ... ส่ง dict แทน Series ได้ เช่นตอน export)
+    all_freqs = HEARING_FREQS
+    
+    # ===== เตรียม baseline =====
+    baseline_left = {f: person.get(f"L{f}B", "") for f in all_freqs}
+    baseline_right = {f: person.get(f"R{f}B", "") for f in all_freqs}
+    baseline = None
+    baseline_source_year = None
+    
+    if all(baseline_left.values()) and all(baseline_right.values()):
+        baseline = {"left": baseline_left, "right": baseline_right}
+    else:
+        fallback = first_hearing_year(rec)
+        if fallback:
+            baseline = fallback["data"]
+            baseline_source_year = fallback["year"]
+    
+    # ===== วนตรวจทุกปี =====
+    result_by_year = {}
+    
+    for y in rec.years:
+        left = {f: rec.get(f"L{f}", y) for f in all_freqs}
+        right = {f: rec.get(f"R{f}", y) for f in all_freqs}
+        compare = baseline is not None and y != baseline_source_year
+    
+        if is_no_hearing_data(left) and is_no_hearing_data(right):
+            result_by_year[y] = ["ไม่มีข้อมูลการตรวจ"]
+        else:
+            result_by_year[y] = interpret_hearing(left, right, baseline, compare_with_baseline=compare)
+    return result_by_year, baseline_source_year
+
+
+def hearing_section(rec, person):
+    blocks = []
+    blocks.append(("heading", "### 📌 สมรรถภาพการได้ยิน"))
+    result_by_year, baseline_source_year = hearing_results(rec, person)
+    
+    # ===== แสดงผลเป็นตาราง =====
+    max_lines = max(len(v) for v in result_by_year.values())
+    table_data = {}
+    for year, results in result_by_year.items():
+        padded = results + [""] * (max_lines - len(results))
+        table_data[year] = padded
+    
+    hearing_interp_df = pd.DataFrame(table_data)
+    blocks.append(("html", hearing_interp_df.to_html(escape=False, index=False)))
+    
+    # ===== แจ้ง baseline ที่ใช้ =====
+    if baseline_source_year:
+        blocks.append(("info", f"📌 ใช้ผลการตรวจปี {baseline_source_year} เป็น baseline เนื่องจากไม่มี baseline ที่แท้จริง"))
+    return blocks
+
+
+# ===============================
+# GRAPHS (กราฟแนวโน้ม ดู charts.py)
+# ===============================
+def bmi_chart_section(rec, person):
+    blocks = []
+    image = render_chart("bmi", rec)
+    if image:
+        blocks.append(("heading", "### 📈 BMI Trend"))
+        blocks.append(("image", image))
+    else:
+        blocks.append(("info", "ไม่มีข้อมูล BMI เพียงพอสำหรับแสดงกราฟ"))
+    return blocks
+
+
+def chart_section(*names):
+    # กราฟที่ไม่มีข้อมูลเลยจะไม่แสดง (ไม่ต้องมีข้อความแจ้งทุกกราฟ)
+    def section(rec, person):
+        images = (render_chart(name, rec) for name in names)
+        return [("image", image) for image in images if image]
+    return section
+
+
+# ✅ เปลี่ยนเลขนี้ทุกครั้งที่แก้ส่วนแสดงผลหรือกฎแปลผลในโค้ด → รายงาน batch เดิมจะถูกสร้างใหม่
+# (กฎคำแนะนำใน advice_rules.json ใช้ RULES.version แทน ไม่ต้องเปลี่ยนเลขนี้)
+REPORT_VERSION = "2"
+
+# ลำดับส่วนในรายงาน (หน้าเว็บและไฟล์รายงานใช้ลำดับเดียวกัน)
+SECTIONS = [
+    ("header", header_section),
+    ("body", body_section),
+    ("bmi_chart", bmi_chart_section),
+    ("bp_chart", chart_section("bp")),
+    ("urine", urine_section),
+    ("stool", stool_section),
+    ("cbc", cbc_section),
+    ("liver", liver_section),
+    ("liver_chart", chart_section("liver")),
+    ("uric", uric_section),
+    ("uric_chart", chart_section("uric")),
+    ("kidney", kidney_section),
+    ("kidney_chart", chart_section("cr", "gfr")),
+    ("fbs", fbs_section),
+    ("fbs_chart", chart_section("fbs")),
+    ("lipids", lipids_section),
+    ("lipids_chart", chart_section("lipids")),
+    ("cxr", cxr_section),
+    ("ekg", ekg_section),
+    ("lung", lung_section),
+    ("eye", eye_section),
+    ("hearing", hearing_section),
+]
+
+
+# แท็บในหน้าเว็บ: (ชื่อแท็บ, ชื่อส่วนใน SECTIONS) ส่วน header แสดงเหนือแท็บเสมอ
+# ✅ สร้างเฉพาะแท็บที่เปิดอยู่ (ส่วนใหญ่เจ้าหน้าที่ดูแค่ 1-2 หมวด)
+SECTION_TABS = [
+    ("⚖️ ร่างกาย / ความดัน", ["body", "bmi_chart", "bp_chart"]),
+    ("🧪 ปัสสาวะ / อุจจาระ", ["urine", "stool"]),
+    ("🩸 เลือด / ตับ / ไต", ["cbc", "liver", "liver_chart", "uric", "uric_chart", "kidney", "kidney_chart"]),
+    ("🍬 น้ำตาล / ไขมัน", ["fbs", "fbs_chart", "lipids", "lipids_chart"]),
+    ("🫁 เอกซเรย์ / EKG / ปอด", ["cxr", "ekg", "lung"]),
+    ("👁️ ตา / การได้ยิน", ["eye", "hearing"]),
+]
+
+
+def build_report(rec, person):
+    return [block for _, section in SECTIONS for block in section(rec, person)]
+
+
+# ===============================
+# HTML (สำหรับไฟล์รายงาน)
+# ===============================
+# หน้าเว็บใช้ธีมเข้ม (ตัวอักษรสีขาว) → ไฟล์รายงานสำหรับพิมพ์เปลี่ยนเป็นตัวอักษรสีเข้ม
+REPORT_CSS = """
+body { font-family: 'Chakra Petch', 'Sarabun', sans-serif; color: #222; margin: 2rem; }
+table { border-collapse: collapse; margin-bottom: 1rem; font-size: 14px; }
+th, td { border: 1px solid #999; padding: 4px 8px; text-align: center; }
+[style*="color: white"] { color: #222 !important; }
+.success { background: #e6f4ea; padding: 0.75rem 1rem; border-radius: 6px; font-size: 20px; font-weight: bold; }
+.info { background: #e8f0fe; padding: 0.75rem 1rem; border-radius: 6px; }
+img { max-width: 100%; height: auto; }
+table, img { page-break-inside: avoid; }
+"""
+
+
+def block_to_html(kind, content):
+    if kind == "heading":
+        level = len(content) - len(content.lstrip("#"))
+        return f"<h{level}>{content.lstrip('#').strip()}</h{level}>"
+    if kind == "success":
+        return f"<div class='success'>{content}</div>"
+    if kind == "info":
+        return f"<div class='info'>{content}</div>"
+    if kind == "image":
+        return f"<img src='data:image/png;base64,{base64.b64encode(content).decode('ascii')}'>"
+    return content
+
+
+def report_html(blocks, title):
+    body = "\n".join(block_to_html(kind, content) for kind, content in blocks)
+    return f"""<!DOCTYPE html>
+<html lang="th">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{REPORT_CSS}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
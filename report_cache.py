@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+from report import REPORT_VERSION, SECTIONS
+from sheet_sync import row_fingerprint
+from timing import record
+
+# ===============================
+# REPORT CACHE (ผลแสดงผลรายส่วนที่สร้างเสร็จแล้ว)
+# ===============================
+# คีย์ = (hash ของข้อมูลทั้งแถว, ชื่อส่วน, REPORT_VERSION, รุ่นกฎคำแนะนำที่ใช้แปลผล)
+# - เปิดดูคนเดิมซ้ำ → ไม่ต้องสร้าง DataFrame / to_html / กราฟใหม่ (กราฟเก็บเป็น PNG แยกตามชื่อกราฟ)
+# - ข้อมูลแถวเปลี่ยน → hash เปลี่ยน และลบผลเดิมของคนนั้นทิ้งทันที
+# - แก้ส่วนแสดงผล/กฎแปลผลในโค้ด → เปลี่ยน REPORT_VERSION ใน report.py ผลเดิมจะไม่ถูกใช้
+# - แก้ advice_rules.json → snapshot ถัดไปแปลผลด้วยกฎรุ่นใหม่ (rec.rules_version เปลี่ยน) ผลเดิมจะไม่ถูกใช้
+# - จำกัดจำนวนส่วนที่เก็บไว้ (LRU) ใช้ร่วมกันทุก session ผ่าน st.cache_resource
+# - หน้าเว็บขอเฉพาะส่วนของแท็บที่เปิดอยู่ (report.SECTION_TABS)
+
+SECTION_RENDERERS = dict(SECTIONS)
+
+
+def row_hash(person):
+    # รวมชื่อคอลัมน์ด้วย (เพิ่ม/ลบคอลัมน์ เช่น ปีใหม่ ก็ต้องสร้างผลใหม่)
+    values = [str(c) for c in person.index] + [str(v) for v in person.tolist()]
+    return row_fingerprint(values)
+
+
+def person_key(person):
+    return (str(person.get("เลขบัตรประชาชน", "")).strip(), str(person.get("HN", "")).strip())
+
+
+class ReportCache:
+    def __init__(self, maxsize=2000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # (row hash, ส่วน, version, รุ่นกฎ) → blocks
+        self._latest = {}              # (เลขบัตร, HN) → row hash ล่าสุดที่เห็น
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _invalidate(self, old_hash):
+        for key in [k for k in self._entries if k[0] == old_hash]:
+            del self._entries[key]
+
+    def section(self, rec, person, name, render, digest=None):
+        digest = digest or row_hash(person)
+        key = (digest, name, REPORT_VERSION, rec.rules_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # ✅ สร้างนอก lock (session อื่นไม่ต้องรอ) และจับเวลาเฉพาะตอนสร้างจริง
+        start = time.perf_counter()
+        blocks = render(rec, person)
+        record(f"section:{name}", time.perf_counter() - start)
+        with self._lock:
+            self._entries[key] = blocks
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return blocks
+
+    def report(self, rec, person, names=None):
+        # names = ชื่อส่วนที่ต้องการ (None = ทุกส่วนตามลำดับใน SECTIONS)
+        digest = row_hash(person)
+        with self._lock:
+            # ✅ แถวของคนนี้เปลี่ยนไปจากที่เคยเห็น → ลบผลเก่าของคนนี้ทิ้ง
+            who = person_key(person)
+            old = self._latest.get(who)
+            if old is not None and old != digest:
+                self._invalidate(old)
+            self._latest[who] = digest
+        sections = SECTIONS if names is None else [(name, SECTION_RENDERERS[name]) for name in names]
+        return [block for name, render in sections for block in self.section(rec, person, name, render, digest)]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,249 @@
+import bisect
+import re
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# LOOKUP INDEX (เลขบัตร / HN / ชื่อ → ตำแหน่งแถว)
+# ===============================
+# สร้างครั้งเดียวต่อ snapshot แล้วค้นหาแบบ O(1) ด้วย dict
+# ไม่ต้อง df.copy() และไม่ต้องสแกนทั้งคอลัมน์ทุกครั้งที่กดค้นหา
+# - เลขบัตร 13 หลักเก็บเป็นคีย์ int64 (เล็กและเร็วกว่าข้อความ)
+# - เลขบัตรซ้ำ → คืนทุกแถวที่ตรง ไม่ตัดเหลือแถวแรกเงียบ ๆ
+
+_NON_DIGIT = re.compile(r"[\s\-]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_id(value):
+    return _NON_DIGIT.sub("", str(value or ""))
+
+
+def id_key(value):
+    # ✅ เลขบัตร 13 หลัก → int64 ส่วนรูปแบบอื่น (เช่น passport) ใช้ข้อความเหมือนเดิม
+    value = normalize_id(value)
+    if len(value) == 13 and value.isdigit():
+        return int(value)
+    return value
+
+
+def normalize_hn(value):
+    return str(value or "").strip()
+
+
+def normalize_name(value):
+    return _SPACES.sub(" ", str(value or "")).strip()
+
+
+# ===============================
+# NAME NORMALIZATION (ภาษาไทย)
+# ===============================
+# ตัดคำนำหน้า (นาย/นาง/น.ส. ...) วรรณยุกต์ ไม้ไต่คู้ การันต์ ช่องว่าง และจุด
+# เพื่อให้ "น.ส. สมหญิง  ใจดี" กับ "สมหญิง ใจดี" ได้คีย์เดียวกัน
+
+NAME_TITLES = sorted([
+    "นางสาว", "นาง", "นาย", "น.ส.", "น.ส", "ด.ช.", "ด.ญ.", "เด็กชาย", "เด็กหญิง",
+    "mr.", "mrs.", "ms.", "miss", "mr", "mrs", "ms",
+], key=len, reverse=True)
+_TONE_MARKS = re.compile("[\u0e47-\u0e4c]")
+# สระ/เครื่องหมายที่ขึ้นต้นพยางค์ไม่ได้ → ถ้าตามหลังคำนำหน้า แปลว่าไม่ใช่คำนำหน้า (เช่น "นายิกา")
+_CANNOT_START = set("\u0e30\u0e31\u0e32\u0e33\u0e34\u0e35\u0e36\u0e37\u0e38\u0e39\u0e3a\u0e45") | set(chr(c) for c in range(0x0E47, 0x0E4F))
+_NAME_NOISE = re.compile(r"[\s.]+")
+
+
+def strip_title(name):
+    lowered = name.lower()
+    for title in NAME_TITLES:
+        if lowered.startswith(title):
+            rest = name[len(title):].lstrip()
+            if rest and rest[0] not in _CANNOT_START:
+                return rest
+    return name
+
+
+def name_key(value):
+    name = normalize_name(value).replace("\u0e4d\u0e32", "\u0e33")  # ํ + า → ำ
+    name = strip_title(name)
+    name = _TONE_MARKS.sub("", name)
+    return _NAME_NOISE.sub("", name).lower()
+
+
+def name_tokens(value):
+    # ชื่อ / นามสกุล แยกกัน (สำหรับค้นหาด้วยคำขึ้นต้นของนามสกุล)
+    name = strip_title(normalize_name(value))
+    return [name_key(token) for token in name.split(" ") if name_key(token)]
+
+
+def bigrams(key):
+    return {key[i:i + 2] for i in range(len(key) - 1)}
+
+
+def _positions_by_key(keys):
+    # คีย์ → array ตำแหน่งแถว (เรียงตามลำดับในชีต) ข้ามค่าว่าง
+    keys = pd.Series(keys)
+    positions = np.arange(len(keys))
+    valid = (keys != "").to_numpy()
+    if not valid.any():
+        return {}
+    valid_positions = positions[valid]
+    groups = pd.Series(valid_positions).groupby(keys[valid].to_numpy(), sort=False).indices
+    return {k: valid_positions[v] for k, v in groups.items()}
+
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name].astype(str)
+    return pd.Series([""] * len(df), dtype=str)
+
+
+class LookupIndex:
+    def __init__(self, df):
+        self.size = len(df)
+
+        # ✅ เลขบัตร: 13 หลักเป็น int64, ที่เหลือ (passport ฯลฯ) เก็บเป็นข้อความ
+        ids = _column(df, "เลขบัตรประชาชน").str.replace(r"[\s\-]", "", regex=True)
+        is_citizen_id = ids.str.fullmatch(r"\d{13}").fillna(False).to_numpy(dtype=bool)
+        positions = np.arange(self.size)
+        self.by_citizen_id = {}
+        if is_citizen_id.any():
+            int_keys = ids[is_citizen_id].astype(np.int64).to_numpy()
+            citizen_positions = positions[is_citizen_id]
+            groups = pd.Series(citizen_positions).groupby(int_keys, sort=False).indices
+            self.by_citizen_id = {int(k): citizen_positions[v] for k, v in groups.items()}
+        other_ids = ids.where(~is_citizen_id, "")
+        self.by_other_id = _positions_by_key(other_ids)
+
+        self.by_hn = _positions_by_key(_column(df, "HN").str.strip())
+        self.by_name = _positions_by_key([name_key(v) for v in _column(df, "ชื่อ-สกุล")])
+
+    def _find_id(self, id_card):
+        key = id_key(id_card)
+        if isinstance(key, int):
+            return self.by_citizen_id.get(key)
+        return self.by_other_id.get(key)
+
+    def find(self, id_card="", hn="", full_name=""):
+        # ✅ เงื่อนไขที่กรอกมาทุกช่องต้องตรงพร้อมกัน (AND) เหมือนการกรองแบบเดิม
+        criteria = []
+        if normalize_id(id_card):
+            criteria.append(self._find_id(id_card))
+        if normalize_hn(hn):
+            criteria.append(self.by_hn.get(normalize_hn(hn)))
+        if name_key(full_name):
+            criteria.append(self.by_name.get(name_key(full_name)))
+
+        if not criteria or any(c is None for c in criteria):
+            return []
+        positions = criteria[0]
+        for other in criteria[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return sorted(int(p) for p in positions)
+
+    def find_keys(self, keys):
+        # ค้นหลายคนในรอบเดียว: แต่ละคีย์ลองเป็นเลขบัตรก่อน ไม่พบ → HN
+        # → [ตำแหน่งแถว] ต่อคีย์ (ไม่พบ = [] / เลขซ้ำหลายแถว = คืนทุกแถว)
+        found = []
+        for key in keys:
+            positions = self._find_id(key) if normalize_id(key) else None
+            if positions is None:
+                positions = self.by_hn.get(normalize_hn(key))
+            found.append([] if positions is None else [int(p) for p in positions])
+        return found
+
+
+# เลขบัตร / HN ที่วางมาเป็นรายการ: คั่นด้วยขึ้นบรรทัดใหม่ จุลภาค เซมิโคลอน หรือแท็บ
+# (ไม่แยกด้วยช่องว่าง/ขีด เพราะเลขบัตรมักเขียนเป็น "1 2345 67890 12 3" หรือ "1-2345-...")
+_KEY_SEPARATORS = re.compile(r"[\n\r,;\t]+")
+
+
+def parse_keys(text):
+    # ข้อความ → รายการคีย์ไม่ซ้ำ (ตามลำดับที่วาง) ตัดช่องว่าง/เครื่องหมายคำพูดรอบ ๆ ออก
+    keys = (k.strip().strip("\"'").strip() for k in _KEY_SEPARATORS.split(str(text or "")))
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+# ===============================
+# NAME INDEX (ค้นหาชื่อบางส่วน / สะกดผิดเล็กน้อย)
+# ===============================
+# - prefix: bisect บนรายการ token (ชื่อ, นามสกุล) ที่เรียงไว้แล้ว
+# - substring / fuzzy: inverted index ของ bigram → ตำแหน่งแถว
+#   นับ bigram ที่ตรงกันด้วย np.bincount แล้วให้คะแนนแบบ Dice coefficient
+
+class NameIndex:
+    def __init__(self, names):
+        self.keys = [name_key(v) for v in names]
+        self.display = [normalize_name(v) for v in names]
+        self.size = len(self.keys)
+        self.by_key = _positions_by_key(self.keys)
+
+        # ✅ ทั้งชื่อเต็ม และแต่ละ token (ชื่อ, นามสกุล) เรียงไว้สำหรับ prefix search
+        entries = sorted(
+            (key, position)
+            for position, name in enumerate(names)
+            for key in {self.keys[position], *name_tokens(name)}
+            if key
+        )
+        self.prefix_keys = [k for k, _ in entries]
+        self.prefix_positions = np.array([p for _, p in entries], dtype=np.int64)
+
+        postings = {}
+        gram_counts = np.zeros(self.size, dtype=np.int32)
+        for position, key in enumerate(self.keys):
+            grams = bigrams(key)
+            gram_counts[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.postings = {g: np.array(p, dtype=np.int64) for g, p in postings.items()}
+        self.gram_counts = gram_counts
+
+    def suggest(self, query, limit=10, min_score=0.5):
+        # คืน [(ตำแหน่งแถว, คะแนน)] เรียงจาก ตรงทั้งหมด > ขึ้นต้นด้วย > มีคำนี้อยู่ > ใกล้เคียง
+        # หยุดทันทีที่ได้ครบ limit ไม่ต้องคำนวณชั้นถัดไป
+        query_key = name_key(query)
+        if not query_key or not self.size:
+            return []
+
+        scores = {}
+
+        def add(positions, score):
+            for position in positions:
+                if len(scores) >= limit:
+                    return True
+                scores.setdefault(int(position), score)
+            return len(scores) >= limit
+
+        # 1) ตรงทั้งหมด
+        if add(self.by_key.get(query_key, ()), 3.0):
+            return list(scores.items())
+
+        # 2) ขึ้นต้นด้วย (ชื่อ หรือ นามสกุล)
+        start = bisect.bisect_left(self.prefix_keys, query_key)
+        end = bisect.bisect_left(self.prefix_keys, query_key + "\uffff")
+        if add(self.prefix_positions[start:end], 2.0):
+            return list(scores.items())
+
+        query_grams = bigrams(query_key)
+        grams = sorted((g for g in query_grams if g in self.postings), key=lambda g: len(self.postings[g]))
+        if not grams:
+            return list(scores.items())
+
+        # 3) มีคำนี้อยู่ในชื่อ: intersect posting จาก bigram ที่พบน้อยที่สุดก่อน แล้วตรวจ substring จริง
+        if len(grams) == len(query_grams):
+            candidates = self.postings[grams[0]]
+            for gram in grams[1:]:
+                candidates = np.intersect1d(candidates, self.postings[gram], assume_unique=True)
+            hits = (p for p in candidates.tolist() if query_key in self.keys[p])
+            if add(hits, 1.0):
+                return list(scores.items())
+
+        # 4) ใกล้เคียง (สะกดผิด / ตกหล่นบางตัว) ด้วย Dice coefficient ของ bigram
+        common = np.bincount(np.concatenate([self.postings[g] for g in grams]), minlength=self.size)
+        dice = 2.0 * common / (len(query_grams) + self.gram_counts)
+        fuzzy = np.flatnonzero(dice >= min_score)
+        fuzzy = fuzzy[np.argsort(-dice[fuzzy], kind="stable")][:limit]
+        for position in fuzzy.tolist():
+            if len(scores) >= limit:
+                break
+            scores.setdefault(position, round(float(dice[position]), 3))
+        return list(scores.items())
@@ -0,0 +1,178 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from sheet_sync import KEY_COLUMNS, SheetSync
+from timing import record, timed
+
+# ===============================
+# SHEET SOURCES (หลายแผ่น / หลายไฟล์ → ข้อมูลชุดเดียว)
+# ===============================
+# ตั้งค่าใน secrets (ไม่ตั้ง = แผ่นแรกของ sheet_url ใน app.py เหมือนเดิม)
+#   [[SHEET_SOURCES]]
+#   url = "https://docs.google.com/spreadsheets/d/..."
+#   worksheet = "2568"      # ชื่อแผ่น / ลำดับแผ่น (0 = แผ่นแรก) / "*" = ทุกแผ่นในไฟล์ (ไม่ใส่ = แผ่นแรก)
+#   name = "รพ.หลัก"        # ชื่อที่แสดงในหน้าประสิทธิภาพระบบ (ไม่ใส่ = ชื่อแผ่น)
+#
+# - เปิดไฟล์ + ดึงแต่ละแผ่นพร้อมกันใน thread pool → เวลารวมใกล้เคียงแผ่นที่ช้าที่สุด ไม่ใช่ผลรวมทุกแผ่น
+#   (แผ่นของไฟล์ที่เปิดเสร็จแล้วเริ่มดึงได้ทันที ไม่ต้องรอไฟล์อื่น)
+# - แต่ละแผ่นมี SheetSync ของตัวเอง → รอบถัดไป parse เฉพาะแถวที่เปลี่ยนในแผ่นนั้น
+# - รวมเป็น 1 แถวต่อคนด้วยเลขบัตรประชาชน (ไม่มี → HN) เช่น แผ่นละปี / แผ่นละแผนก / ไฟล์ละโรงพยาบาล
+#   ช่องเดียวกันมีค่าจากหลายแหล่ง → ใช้ค่าจากแหล่งที่อยู่ก่อนในรายการ (ช่องว่างไม่ทับค่าที่มี)
+# - ทุกแผ่นไม่มีแถวเพิ่ม/แก้ไข/ลบ → ไม่รวมใหม่ คืนข้อมูลชุดเดิม (last_changed = False)
+# - แหล่งใดโหลดไม่สำเร็จ → ทั้งรอบล้มเหลว (SnapshotCache ใช้ข้อมูลเดิมต่อ) ไม่รวมข้อมูลที่ขาดบางส่วน
+# - เวลาของแต่ละแหล่ง: last_sources (หน้าประสิทธิภาพระบบ) และขั้น source:<ชื่อ> ใน timing
+
+DEFAULT_WORKERS = 8
+ALL_WORKSHEETS = "*"
+
+
+class SheetSource:
+    def __init__(self, url, worksheet=None, name=None):
+        self.url = url
+        self.worksheet = worksheet
+        self.name = name
+
+    @classmethod
+    def from_config(cls, config):
+        # secrets: ข้อความ (url อย่างเดียว) หรือ table ที่มี url / worksheet / name
+        if isinstance(config, str):
+            return cls(config)
+        config = dict(config)
+        return cls(config["url"], config.get("worksheet"), config.get("name"))
+
+    def open(self, client):
+        # → [(ชื่อแหล่ง, worksheet)]
+        spreadsheet = client.open_by_url(self.url)
+        if self.worksheet == ALL_WORKSHEETS:
+            worksheets = spreadsheet.worksheets()
+        elif self.worksheet is None:
+            worksheets = [spreadsheet.sheet1]
+        elif isinstance(self.worksheet, int):
+            worksheets = [spreadsheet.get_worksheet(self.worksheet)]
+            if worksheets[0] is None:
+                raise ValueError(f"ไม่พบแผ่นลำดับที่ {self.worksheet}")
+        else:
+            worksheets = [spreadsheet.worksheet(self.worksheet)]
+        if self.name and len(worksheets) == 1:
+            return [(self.name, worksheets[0])]
+        return [(f"{self.name}/{ws.title}" if self.name else ws.title, ws) for ws in worksheets]
+
+
+def parse_sources(configs, default_url):
+    sources = [SheetSource.from_config(c) for c in configs or []]
+    return sources or [SheetSource(default_url)]
+
+
+# ===============================
+# MERGE (รวมหลายตารางเป็น 1 แถวต่อคน)
+# ===============================
+def person_keys(df, source):
+    # เลขบัตรประชาชน → HN → ลำดับแถวในแหล่งนั้น (ไม่มีทั้งคู่ = ไม่รวมกับแถวอื่น)
+    key = pd.Series([""] * len(df), index=df.index, dtype=object)
+    for column in reversed(KEY_COLUMNS):
+        if column in df.columns:
+            values = df[column].astype(str).str.strip()
+            key = key.where(values == "", column + ":" + values)
+    blank = (key == "").to_numpy()
+    key[blank] = [f"row:{source}:{i}" for i in range(blank.sum())]
+    # ✅ เลขบัตรซ้ำในแหล่งเดียวกัน → คนละแถว (เหมือน SheetSync) ครั้งที่ n จับคู่กับครั้งที่ n ของแหล่งอื่น
+    return key + "#" + key.groupby(key).cumcount().astype(str)
+
+
+def merge_frames(frames):
+    # frames = [(ชื่อแหล่ง, DataFrame)] ตามลำดับความสำคัญ
+    if len(frames) == 1:
+        return frames[0][1]
+    columns, order, keyed = [], {}, []
+    for source, df in frames:
+        columns += [c for c in df.columns if c not in columns]
+        keys = person_keys(df, source)
+        for key in keys:
+            order.setdefault(key, len(order))
+        keyed.append((keys, df))
+
+    # ✅ เติมทีละแหล่งลง array เดียว: ช่องที่ยังว่างรับค่าจากแหล่งถัดไป (ไม่ต้อง align DataFrame ทีละคู่)
+    out = np.full((len(order), len(columns)), "", dtype=object)
+    col_pos = {c: i for i, c in enumerate(columns)}
+    for keys, df in keyed:
+        block = np.ix_([order[k] for k in keys], [col_pos[c] for c in df.columns])
+        current = out[block]
+        values = df.to_numpy(dtype=object)
+        fill = (current == "") & (values != "")
+        current[fill] = values[fill]
+        out[block] = current
+    return pd.DataFrame(out, columns=columns).infer_objects()
+
+
+# ===============================
+# LOADER
+# ===============================
+class MultiSheetLoader:
+    def __init__(self, sources, max_workers=DEFAULT_WORKERS):
+        self.sources = list(sources)
+        self.max_workers = max_workers
+        self._syncs = {}        # ชื่อแหล่ง → SheetSync (เก็บไว้ข้ามรอบ)
+        self.last_sources = []  # [{"source", "rows", "seconds", "summary"}] ของรอบล่าสุด
+        self.last_seconds = None
+        self.last_changed = True  # รอบล่าสุดมีแหล่งที่ข้อมูลเปลี่ยน (หรือโหลดใหม่ทั้งหมด)
+        self._merged = None       # ข้อมูลที่รวมแล้วของรอบล่าสุด
+
+    def _open(self, source, client):
+        start = time.perf_counter()
+        worksheets = source.open(client)
+        return worksheets, time.perf_counter() - start
+
+    def _sync(self, name, worksheet, open_seconds):
+        start = time.perf_counter()
+        try:
+            result = self._syncs.setdefault(name, SheetSync()).sync(worksheet)
+        except Exception as e:
+            raise ValueError(f"โหลด {name} ไม่สำเร็จ: {e}") from e
+        seconds = open_seconds + time.perf_counter() - start
+        record(f"source:{name}", seconds, rows=len(result.df))
+        return {"source": name, "rows": len(result.df), "seconds": round(seconds, 3), "summary": result.summary()}, result
+
+    def load(self, client):
+        start = time.perf_counter()
+        workers = max(1, min(self.max_workers, len(self.sources) * 4))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sheet-source") as pool:
+            opening = {pool.submit(self._open, source, client): source for source in self.sources}
+            syncing = {}  # future → (ลำดับแหล่ง, ลำดับแผ่น)
+            names = set()
+            for future in as_completed(opening):
+                index = self.sources.index(opening[future])
+                try:
+                    worksheets, open_seconds = future.result()
+                except Exception as e:
+                    source = opening[future]
+                    raise ValueError(f"เปิด {source.name or source.url} ไม่สำเร็จ: {e}") from e
+                for n, (name, worksheet) in enumerate(worksheets):
+                    if name in names:
+                        raise ValueError(f"ชื่อแหล่งข้อมูลซ้ำกัน (ตั้ง name ใน SHEET_SOURCES): {name}")
+                    names.add(name)
+                    # เวลาเปิดไฟล์รวมอยู่ในเวลาของแผ่นแรกของไฟล์นั้น
+                    syncing[pool.submit(self._sync, name, worksheet, open_seconds if n == 0 else 0.0)] = (index, n)
+            done = sorted((syncing[f], f.result()) for f in syncing)
+
+        # ✅ รายชื่อแหล่งเดิม และไม่มีแผ่นไหนเปลี่ยน → ใช้ข้อมูลที่รวมไว้แล้ว
+        sources = [summary["source"] for _, (summary, _) in done]
+        self.last_changed = (
+            self._merged is None
+            or sources != [summary["source"] for summary in self.last_sources]
+            or any(result.full_reload or result.touched for _, (_, result) in done)
+        )
+        if self.last_changed:
+            with timed("sheet_merge", sources=len(done)):
+                self._merged = merge_frames([(summary["source"], result.df) for _, (summary, result) in done])
+        self.last_sources = [summary for _, (summary, _) in done]
+        self.last_seconds = time.perf_counter() - start
+        return self._merged
+
+    def report(self):
+        # ตารางเวลาของแต่ละแหล่งในรอบล่าสุด (ช้าสุดอยู่บน)
+        if not self.last_sources:
+            return pd.DataFrame(columns=["rows", "seconds", "summary"])
+        return pd.DataFrame(self.last_sources).set_index("source").sort_values("seconds", ascending=False)
@@ -0,0 +1,123 @@
+import hashlib
+import time
+from collections import Counter
+
+import pandas as pd
+from gspread.utils import numericise_all
+
+from timing import record, timed
+
+# ===============================
+# DELTA SYNC (ดึงเฉพาะแถวที่เปลี่ยน)
+# ===============================
+# เก็บ fingerprint ของทุกแถวไว้ (คีย์ด้วยเลขบัตรประชาชน / HN)
+# รอบถัดไปดึงค่าแบบเป็นช่วง ๆ แล้ว parse ใหม่เฉพาะแถวที่ เพิ่ม / เปลี่ยน / ถูกลบ
+# ถ้าหัวตารางเปลี่ยน (เช่น มีคอลัมน์ ...69 ใหม่) จะ parse ใหม่ทั้งหมด
+
+KEY_COLUMNS = ("เลขบัตรประชาชน", "HN")
+TEXT_COLUMNS = ("เลขบัตรประชาชน", "HN", "ชื่อ-สกุล")  # ไม่แปลงเป็นตัวเลข (กันเลข 0 นำหน้าหาย)
+
+
+def row_fingerprint(values):
+    return hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=16).digest()
+
+
+class SyncResult:
+    def __init__(self, df, added, changed, deleted, full_reload):
+        self.df = df
+        self.added = added
+        self.changed = changed
+        self.deleted = deleted
+        self.full_reload = full_reload
+
+    @property
+    def touched(self):
+        return len(self.added) + len(self.changed) + len(self.deleted)
+
+    def summary(self):
+        if self.full_reload:
+            return f"โหลดใหม่ทั้งหมด {len(self.df)} แถว"
+        return f"เพิ่ม {len(self.added)} · แก้ไข {len(self.changed)} · ลบ {len(self.deleted)} แถว"
+
+
+class SheetSync:
+    def __init__(self, batch_rows=1000):
+        self.batch_rows = batch_rows
+        self._header = None
+        self._rows = {}  # key -> (fingerprint, parsed row)
+        self.last_result = None
+
+    def fetch_values(self, worksheet):
+        # ✅ ดึงหัวตาราง + ข้อมูลเป็นช่วงละ batch_rows แถว ในคำขอเดียว (batch_get)
+        total = worksheet.row_count
+        ranges = ["1:1"] + [
+            f"{start}:{min(start + self.batch_rows - 1, total)}"
+            for start in range(2, total + 1, self.batch_rows)
+        ]
+        blocks = worksheet.batch_get(ranges)
+        header = [str(h).strip() for h in blocks[0][0]] if blocks and blocks[0] else []
+        rows = [row for block in blocks[1:] for row in block]
+        return header, rows
+
+    def sync(self, worksheet):
+        with timed("sheet_fetch"):
+            header, rows = self.fetch_values(worksheet)
+        start = time.perf_counter()
+        if not header:
+            raise ValueError("ไม่พบหัวตารางในแผ่นแรกของ Google Sheet")
+        dupes = [h for h, n in Counter(header).items() if n > 1 and h]
+        if dupes:
+            raise ValueError(f"หัวตารางใน Google Sheet ซ้ำกัน: {dupes}")
+
+        full_reload = header != self._header
+        previous = {} if full_reload else self._rows
+        key_idx = [header.index(c) if c in header else None for c in KEY_COLUMNS]
+        ignore = [i + 1 for i, h in enumerate(header) if h in TEXT_COLUMNS]
+        width = len(header)
+
+        current = {}
+        added, changed = [], []
+        seen = Counter()
+        for position, row in enumerate(rows):
+            values = [str(v) for v in row[:width]] + [""] * (width - len(row))
+            if not any(v.strip() for v in values):
+                continue
+
+            key = self._row_key(values, key_idx, position)
+            seen[key] += 1
+            key = (key, seen[key])  # ✅ เลขบัตรซ้ำ → แยกเป็นคนละคีย์ ไม่ทับกัน
+
+            fp = row_fingerprint(values)
+            old = previous.get(key)
+            if old is not None and old[0] == fp:
+                current[key] = old
+                continue
+
+            current[key] = (fp, self.parse_row(values, ignore))
+            (changed if old is not None else added).append(key)
+
+        deleted = [key for key in previous if key not in current]
+        if not current:
+            raise ValueError("ไม่พบข้อมูลในแผ่นแรกของ Google Sheet")
+
+        self._header = header
+        self._rows = current
+        df = pd.DataFrame([parsed for _, parsed in current.values()], columns=header)
+        self.last_result = SyncResult(df, added, changed, deleted, full_reload)
+        record("sheet_parse", time.perf_counter() - start, rows=len(df), touched=self.last_result.touched)
+        return self.last_result
+
+    @staticmethod
+    def _row_key(values, key_idx, position):
+        for column, idx in zip(KEY_COLUMNS, key_idx):
+            if idx is not None and values[idx].strip():
+                return f"{column}:{values[idx].strip()}"
+        return f"row:{position}"
+
+    @staticmethod
+    def parse_row(values, ignore):
+        # ✅ แปลงตัวเลขแบบเดียวกับ get_all_records() แต่ทำเฉพาะแถวที่เปลี่ยน
+        parsed = numericise_all(values, default_blank="", ignore=ignore)
+        for i in ignore:
+            parsed[i - 1] = parsed[i - 1].strip()
+        return parsed
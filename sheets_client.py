@@ -0,0 +1,196 @@
+import calendar
+import random
+import threading
+import time
+from collections import deque
+
+import gspread
+import requests
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+from timing import record
+
+# ===============================
+# SHEETS CLIENT (client เดียวทั้ง process + คิวคำขอตามโควตา)
+# ===============================
+# - authorize ครั้งเดียวแล้วใช้ร่วมกันทุก session / ทุกรอบโหลด
+#   สร้าง credentials + client ใหม่ก่อน token หมดอายุ (REFRESH_MARGIN) → ไม่มีคำขอที่ใช้ token หมดอายุ
+# - ทุกคำขอไป Sheets API ผ่าน RequestScheduler (ต่อที่ HTTPClient ของ gspread → open / worksheets / batch_get ครบ)
+#   · token bucket: ได้ per_minute คำขอต่อนาที (สะสมได้ถึง burst) เกินนี้รอคิว แทนที่จะโดน 429
+#   · 429 / 408 / 5xx / เครือข่ายขัดข้อง → ลองใหม่แบบ exponential backoff + jitter (สุ่มเวลารอ 0..ขีดบน)
+#     และหยุดจ่าย token ชั่วคราว คำขออื่นที่รอคิวอยู่จะไม่ยิงซ้ำเข้าไปอีก
+# - stats(): โควตาที่เหลือในนาทีนี้ / จำนวนที่ลองใหม่ / เวลารอคิว (หน้าประสิทธิภาพระบบ)
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+DEFAULT_PER_MINUTE = 60   # โควตาอ่านของ Sheets API ต่อผู้ใช้ (service account) ต่อนาที
+TOKEN_LIFETIME = 3600     # วินาที (access token ของ Google)
+REFRESH_MARGIN = 300      # สร้าง token ใหม่ก่อนหมดอายุ 5 นาที
+RETRY_STATUS = {408, 429}
+
+
+def is_retryable(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, APIError):
+        code = error.code
+        if code in RETRY_STATUS or (isinstance(code, int) and code >= 500):
+            return True
+        # Drive API ตอบ 403 + usageLimits เมื่อเกินโควตา
+        reasons = error.error.get("errors", []) if isinstance(error.error, dict) else []
+        return code == 403 and any(r.get("domain") == "usageLimits" for r in reasons)
+    return False
+
+
+def is_rate_limited(error):
+    # ข้อผิดพลาดนี้ (หรือสาเหตุของมัน) มาจากการเกินโควตาหรือไม่
+    while error is not None:
+        if isinstance(error, APIError) and error.code in (403, 429) and is_retryable(error):
+            return True
+        error = error.__cause__
+    return False
+
+
+class RequestScheduler:
+    def __init__(self, per_minute=DEFAULT_PER_MINUTE, burst=None, max_retries=5,
+                 base_delay=1.0, max_delay=64.0, sleep=time.sleep):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.burst = burst or per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._sent = deque()  # เวลาที่ส่งคำขอ (monotonic) ในหนึ่งนาทีล่าสุด
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+        self.last_error = None
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        while self._sent and now - self._sent[0] >= 60:
+            self._sent.popleft()
+
+    def acquire(self):
+        # ✅ จอง token ก่อนแล้วค่อยรอนอก lock (token ติดลบ = คิวที่รออยู่) → ลำดับคำขอยุติธรรม
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+            self._sent.append(now + wait)
+            self.requests += 1
+            self.waited += wait
+        if wait:
+            self._sleep(wait)
+        return wait
+
+    def backoff(self, attempt):
+        # full jitter: สุ่ม 0..min(max_delay, base × 2^attempt) ไม่ให้ทุก thread ลองใหม่พร้อมกัน
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _pause(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def call(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            waited = self.acquire()
+            start = time.perf_counter()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    self.last_error = e
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                    self.rate_limited += isinstance(e, APIError) and e.code == 429
+                if isinstance(e, APIError) and e.code == 429:
+                    self._pause(delay)
+                record("sheets_retry", delay, attempt=attempt, error=str(getattr(e, "code", type(e).__name__)))
+                self._sleep(delay)
+                continue
+            record("sheets_request", time.perf_counter() - start, queued_ms=round(waited * 1000, 1), attempts=attempt + 1)
+            return response
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            used = len(self._sent)
+            return {
+                "per_minute": self.per_minute,
+                "used_last_minute": used,
+                "remaining": max(self.per_minute - used, 0),
+                "tokens": round(max(self._tokens, 0.0), 1),
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "waited_s": round(self.waited, 3),
+            }
+
+
+class ScheduledHTTPClient(HTTPClient):
+    # HTTPClient ของ gspread ที่ส่งทุกคำขอผ่าน scheduler (SheetsClient สร้าง subclass ที่ผูก scheduler ของตัวเอง)
+    scheduler = None
+
+    def request(self, *args, **kwargs):
+        if self.scheduler is None:
+            return super().request(*args, **kwargs)
+        return self.scheduler.call(super().request, *args, **kwargs)
+
+
+def token_expires_at(credentials):
+    # oauth2client: token_expiry / google-auth: expiry (datetime UTC ไม่มี tz) ยังไม่เคยขอ token = None
+    expiry = getattr(credentials, "token_expiry", None) or getattr(credentials, "expiry", None)
+    return calendar.timegm(expiry.utctimetuple()) if expiry else None
+
+
+class SheetsClient:
+    def __init__(self, make_credentials, scheduler=None, refresh_margin=REFRESH_MARGIN):
+        self._make_credentials = make_credentials
+        self.scheduler = scheduler or RequestScheduler()
+        self._http_client = type("ScheduledHTTPClient", (ScheduledHTTPClient,), {"scheduler": self.scheduler})
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._client = None
+        self._credentials = None
+        self._authorized_at = None
+        self.authorizations = 0
+
+    def expires_at(self):
+        if self._authorized_at is None:
+            return None
+        return token_expires_at(self._credentials) or self._authorized_at + TOKEN_LIFETIME
+
+    def get(self):
+        with self._lock:
+            if self._client is None or time.time() >= self.expires_at() - self.refresh_margin:
+                credentials = self._make_credentials()
+                client = gspread.authorize(credentials, http_client=self._http_client)
+                # gspread แปลง credentials ของ oauth2client เป็นของ google-auth → อ่านเวลาหมดอายุจากตัวที่ใช้จริง
+                self._credentials = getattr(getattr(client, "http_client", None), "auth", credentials)
+                self._client = client
+                self._authorized_at = time.time()
+                self.authorizations += 1
+            return self._client
+
+    def stats(self):
+        expires = self.expires_at()
+        return {
+            **self.scheduler.stats(),
+            "authorizations": self.authorizations,
+            "token_expires_in_s": None if expires is None else round(expires - time.time()),
+        }
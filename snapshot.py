@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from health_data import YearData
+from interpret_engine import interpret_all
+from population import PopulationStats
+from search_index import LookupIndex, NameIndex
+
+# ===============================
+# SNAPSHOT (ข้อมูล 1 ชุด + โครงสร้างที่คำนวณไว้ล่วงหน้า)
+# ===============================
+# สร้างครั้งเดียวต่อการโหลดข้อมูล (ทำใน thread เบื้องหลังได้)
+# ทุก session ใช้ร่วมกันแบบอ่านอย่างเดียว ห้ามแก้ไข df ตรง ๆ
+
+
+# คอลัมน์ที่ค่าไม่ซ้ำเกินสัดส่วนนี้ (เช่น เลขบัตร / ชื่อ) ไม่แปลงเป็น category
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def compact_frame(df):
+    # ✅ คอลัมน์ที่ค่าซ้ำกันเยอะ → category (เก็บค่าไม่ซ้ำครั้งเดียว + รหัสต่อแถว)
+    # ค่าทุกช่องยังเป็นค่าเดิม แต่ df.iloc[p] ทั้งแถวช้าลงหลายเท่า (ต้องแปลง category ทีละคอลัมน์)
+    # → อ่านแถวผ่าน Snapshot.row / Snapshot.cell ที่ใช้รหัส category โดยตรง
+    limit = max(1, int(len(df) * CATEGORY_MAX_UNIQUE_RATIO))
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            if series.nunique(dropna=False) <= limit:
+                series = series.astype("category")
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def column_arrays(df):
+    # คอลัมน์ → (ค่าไม่ซ้ำ, รหัสต่อแถว) ของคอลัมน์ category หรือ (None, ค่าต่อแถว) ของคอลัมน์อื่น
+    arrays = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[col] = (series.cat.categories.to_numpy(dtype=object), series.cat.codes.to_numpy())
+        else:
+            arrays[col] = (None, series.to_numpy(dtype=object))
+    return arrays
+
+
+class Snapshot:
+    def __init__(self, df, compact=True):
+        self.df = df
+        self.index = LookupIndex(df)
+        names = df["ชื่อ-สกุล"] if "ชื่อ-สกุล" in df.columns else []
+        self.names = NameIndex([str(v) for v in names])
+        self.year_data = YearData(df)
+        self.schema = self.year_data.schema  # ปี / คอลัมน์จริงของแต่ละ metric (หาจากหัวตารางครั้งเดียว)
+        # ✅ แปลผลทุกคนทุกปีไว้ล่วงหน้า หน้าเว็บแค่อ่านผล
+        sex = df["เพศ"] if "เพศ" in df.columns else [""] * len(df)
+        interpret_all(self.year_data, sex)
+        # ✅ ตารางนับสำหรับหน้าภาพรวม (กรองได้ทันที ไม่ต้องสแกนรายคน)
+        self.population = PopulationStats(self.year_data, sex)
+        # ✅ หลังเตรียมทุกอย่างเสร็จ เก็บข้อมูลแบบประหยัดหน่วยความจำ (ดู memory_report)
+        self.df = compact_frame(df) if compact else df
+        if compact:
+            self.year_data.compact()
+        self._columns = column_arrays(self.df)
+
+    def __len__(self):
+        return len(self.df)
+
+    def memory_usage(self):
+        # ส่วนประกอบ → จำนวน byte (ตารางดิบ / ค่ารายปี / ตารางนับของหน้าภาพรวม)
+        return {
+            "df": int(self.df.memory_usage(deep=True).sum()),
+            "year_data": int(sum(self.year_data.memory_usage().values())),
+            "population": int(self.population.counts.memory_usage(deep=True).sum()),
+        }
+
+    def cell(self, position, column, default=""):
+        if column not in self._columns:
+            return default
+        categories, values = self._columns[column]
+        if categories is None:
+            return values[position]
+        code = values[position]
+        return categories[code] if code >= 0 else np.nan
+
+    def row(self, position):
+        # ✅ ทั้งแถวเป็น Series (ค่าเดียวกับ df.iloc[p]) อ่านจากรหัส category ทีละคอลัมน์ เร็วกว่า iloc หลายเท่า
+        values = [self.cell(position, col) for col in self.df.columns]
+        return pd.Series(values, index=self.df.columns, name=self.df.index[position], dtype=object)
+
+    def rows(self, positions):
+        return [self.row(p) for p in positions]
+
+    def find(self, id_card="", hn="", full_name=""):
+        return self.rows(self.index.find(id_card, hn, full_name))
+
+    def suggest_names(self, query, limit=10):
+        # ชื่อบางส่วน / สะกดใกล้เคียง → [(ตำแหน่งแถว, ชื่อที่แสดง)]
+        return [(p, self.names.display[p]) for p, _ in self.names.suggest(query, limit=limit)]
+
+    def position_of(self, person):
+        # ✅ หาแถวของคนนี้ใน snapshot ปัจจุบัน (snapshot อาจถูกโหลดใหม่ระหว่างที่ session เปิดอยู่)
+        pos = person.name
+        if isinstance(pos, int) and 0 <= pos < len(self.df):
+            if all(str(self.cell(pos, c)) == str(person.get(c, "")) for c in ("เลขบัตรประชาชน", "HN")):
+                return pos
+        keys = (person.get("เลขบัตรประชาชน", ""), person.get("HN", ""))
+        positions = self.index.find(*keys)
+        if len(positions) > 1:
+            # เลขบัตร / HN ซ้ำกันหลายแถว → เทียบชื่อด้วย ยังเหลือมากกว่า 1 แถว = ไม่รู้ว่าเป็นแถวไหน
+            positions = self.index.find(*keys, person.get("ชื่อ-สกุล", ""))
+        return positions[0] if len(positions) == 1 else None
+
+    def person_years(self, person):
+        pos = self.position_of(person)
+        if pos is None:
+            # ✅ สำรองไว้กรณีหาแถวใน snapshot ไม่เจอ (เช่น ถูกลบระหว่างที่ session ยังเปิดอยู่)
+            # (หัวตารางของแถวนี้อาจมาจากชีตรุ่นก่อน → หาปี / คอลัมน์จากแถวนี้เอง)
+            year_data = YearData(pd.DataFrame([person]).reset_index(drop=True))
+            interpret_all(year_data, [person.get("เพศ", "")])
+            return year_data.person(0)
+        return self.year_data.person(pos)
+
+
+# ===============================
+# MEMORY REPORT (ก่อน / หลังบีบอัด)
+# ===============================
+# python snapshot.py --memory                 (snapshot ล่าสุดใน snapshots/)
+# python snapshot.py --memory export.csv
+# python snapshot.py --memory --rows 10000    (ชีตปลอมจาก synthetic_sheet)
+
+def memory_report(df):
+    before = Snapshot(df, compact=False).memory_usage()
+    after = Snapshot(df).memory_usage()
+    report = pd.DataFrame({"ก่อน (MB)": before, "หลัง (MB)": after}) / 1e6
+    report.loc["รวม"] = report.sum()
+    report["ลดลง (%)"] = (1 - report["หลัง (MB)"] / report["ก่อน (MB)"]) * 100
+    return report.round(1)
+
+
+def main(argv=None):
+    import argparse
+
+    from snapshot_store import SnapshotStore, read_export
+
+    parser = argparse.ArgumentParser(description="เทียบหน่วยความจำของ snapshot ก่อน/หลังบีบอัด")
+    parser.add_argument("--memory", nargs="?", const="", metavar="EXPORT", required=True)
+    parser.add_argument("--rows", type=int, help="ใช้ชีตปลอมจำนวนคนเท่านี้แทน")
+    args = parser.parse_args(argv)
+
+    if args.rows:
+        from sheet_sync import SheetSync
+        from synthetic_sheet import FakeWorksheet, SyntheticSheet
+        df = SheetSync().sync(FakeWorksheet(SyntheticSheet(args.rows))).df
+    else:
+        df = read_export(args.memory) if args.memory else SnapshotStore().load()
+    if df is None:
+        print("❌ ไม่พบข้อมูล (ระบุไฟล์ export, --rows หรือสร้าง snapshot ก่อน)")
+        return 1
+    print(f"📦 {len(df):,} คน × {len(df.columns)} คอลัมน์")
+    print(memory_report(df).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# SNAPSHOT STORE (Parquet บนดิสก์)
+# ===============================
+# เก็บข้อมูลที่โหลดสำเร็จล่าสุดเป็นไฟล์ Parquet (บีบอัดแบบ zstd)
+# - เปิดแอปครั้งแรกอ่านจากไฟล์ได้ทันที (memory map) ไม่ต้องรอ Google Sheet
+# - ถ้า Google Sheet ล่ม ยังใช้ข้อมูลจากไฟล์ได้
+# - สร้างไฟล์จากไฟล์ export (CSV / Excel) ได้โดยไม่ต้องต่อเน็ต
+#
+# ทุกคอลัมน์เก็บเป็นข้อความ (parquet ไม่รองรับคอลัมน์ที่มีทั้งตัวเลขและข้อความปนกัน)
+
+SNAPSHOT_FILE = "health_check.parquet"
+
+
+class SnapshotStore:
+    def __init__(self, directory="snapshots"):
+        self.directory = directory
+        self.path = os.path.join(directory, SNAPSHOT_FILE)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def saved_at(self):
+        return os.path.getmtime(self.path) if self.exists() else None
+
+    def save(self, df):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        to_text(df).to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+        os.replace(tmp_path, self.path)  # ✅ เขียนไฟล์ใหม่ให้เสร็จก่อนค่อยสลับ ไม่มีไฟล์ครึ่ง ๆ
+        return self.path
+
+    def load(self):
+        if not self.exists():
+            return None
+        return pd.read_parquet(self.path, engine="pyarrow", memory_map=True)
+
+
+def to_text(df):
+    text = df.copy()
+    text.columns = [str(c).strip() for c in text.columns]
+    for col in text.columns:
+        text[col] = text[col].map(lambda v: "" if v is None or (isinstance(v, float) and v != v) else str(v))
+    return text
+
+
+def read_export(path):
+    # ✅ อ่านไฟล์ export จาก Google Sheet แบบข้อความล้วน (เหมือนข้อมูลที่เก็บใน snapshot)
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, dtype=str).fillna("")
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    df = to_text(df)
+    for col in ["เลขบัตรประชาชน", "HN", "ชื่อ-สกุล"]:
+        if col in df.columns:
+            df[col] = df[col].str.strip()
+    return df
+
+
+def frame_column(df, column):
+    # คอลัมน์ข้อมูลบุคคล (HN / เลขบัตร / ชื่อ ...) เป็น object array ไม่มีคอลัมน์นี้ = ""
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    return df[column].astype(object).to_numpy()
+
+
+# ===============================
+# CLI ร่วม (อ่านข้อมูลจาก --source / --dir)
+# ===============================
+def add_source_arguments(parser):
+    parser.add_argument("--source", help="ไฟล์ export (CSV / Excel) แทน snapshot")
+    parser.add_argument("--dir", default="snapshots")
+
+
+def load_source(source=None, directory="snapshots"):
+    # --source → อ่านไฟล์ export, ไม่ระบุ → snapshot ล่าสุดใน --dir (ไม่มี = None)
+    return read_export(source) if source else SnapshotStore(directory).load()
+
+
+def report_mismatches(mismatches, rows, limit=20):
+    # พิมพ์ผล --check แบบ (แถว, ปี, ผลใหม่, ผลเดิม) → exit code
+    for p, y, got, want in mismatches[:limit]:
+        print(f"❌ แถว {p} ปี {y}: screen={got!r} เดิม={want!r}")
+    print(f"{'✅' if not mismatches else '❌'} ตรวจ {rows} คน · ไม่ตรง {len(mismatches)} จุด")
+    return 1 if mismatches else 0
+
+
+# ===============================
+# CLI: python snapshot_store.py build export.csv
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้าง snapshot ข้อมูลสุขภาพจากไฟล์ export")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="สร้าง snapshot จากไฟล์ CSV / Excel")
+    build.add_argument("source")
+    build.add_argument("--dir", default="snapshots")
+
+    info = sub.add_parser("info", help="แสดงข้อมูล snapshot ปัจจุบัน")
+    info.add_argument("--dir", default="snapshots")
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore(args.dir)
+
+    if args.command == "build":
+        df = read_export(args.source)
+        path = store.save(df)
+        print(f"✅ บันทึก {len(df)} แถว {len(df.columns)} คอลัมน์ → {path}")
+    elif args.command == "info":
+        if not store.exists():
+            print(f"❌ ไม่พบ snapshot ที่ {store.path}")
+            return 1
+        start = time.perf_counter()
+        df = store.load()
+        elapsed = (time.perf_counter() - start) * 1000
+        saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(store.saved_at()))
+        print(f"{store.path}: {len(df)} แถว {len(df.columns)} คอลัมน์ · บันทึกเมื่อ {saved} · อ่าน {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,311 @@
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from health_schema import COALESCED_METRICS, HEARING_FREQS, METRICS, YEARS
+
+# ===============================
+# SYNTHETIC SHEET (ชีตปลอมสำหรับวัดประสิทธิภาพแบบ offline)
+# ===============================
+# python synthetic_sheet.py 10000 --out fake_10k.csv
+#
+# - หัวตารางสร้างจาก health_schema → ชื่อคอลัมน์ตรงกับที่แอปอ่านจริง
+#   (ปี 61–67 มีเลขท้าย ปี 68 ไม่มี, การได้ยิน L1k61, ตา/ปอด ใช้ชื่อคอลัมน์สำรองสลับปี)
+# - สร้างทีละ block ด้วย seed (seed, เลข block) → ข้อมูลเหมือนเดิมทุกครั้ง ไม่ว่าจะขอช่วงแถวไหน
+#   (ไม่ต้องเก็บทั้งชีตไว้ในหน่วยความจำ)
+# - FakeWorksheet / FakeClient ใช้แทน gspread (batch_get / get_all_values / get_all_records)
+
+BLOCK_ROWS = 1000
+ATTEND_RATE = 0.8     # มาตรวจในปีนั้น
+TESTED_RATE = 0.9     # ตรวจรายการนั้น (เมื่อมาตรวจ)
+BASELINE_RATE = 0.3   # มี baseline การได้ยิน (L1kB ...)
+
+TITLES = ["นาย", "นาง", "นางสาว"]
+FIRST_NAMES = [
+    "สมชาย", "สมหญิง", "สมศักดิ์", "สมพร", "วิชัย", "วิไล", "ประเสริฐ", "ประภา", "สุรชัย", "สุภาพร",
+    "อนันต์", "อรุณี", "ธนพล", "ธิดารัตน์", "กิตติ", "กาญจนา", "ณัฐพล", "ณัฐธิดา", "พงษ์ศักดิ์", "พรทิพย์",
+]
+LAST_NAMES = [
+    "ใจดี", "สุขสันต์", "มีสุข", "ทองดี", "แก้วมณี", "ศรีสุข", "บุญมา", "จันทร์เพ็ญ", "รุ่งเรือง", "สายทอง",
+    "พรหมมา", "อินทร์แก้ว", "คำมา", "ปัญญาดี", "วงศ์ใหญ่", "ชัยมงคล", "เรือนคำ", "ดวงดี", "ยอดเยี่ยม", "นาคประเสริฐ",
+]
+
+
+def number_values(low, high, step):
+    # ค่าตัวเลขเป็นข้อความแบบที่ Google Sheet ส่งมา (จำนวนเต็มไม่มี .0)
+    values = np.arange(low, high + step / 2, step)
+    if float(step).is_integer():
+        return [str(int(v)) for v in values]
+    return [f"{v:.1f}" for v in values]
+
+
+# metric → ค่าที่เป็นไปได้ (สุ่มแบบเท่ากันทุกค่า)
+VALUES = {
+    "weight": number_values(40, 110, 0.1),
+    "height": number_values(145, 190, 1),
+    "waist": number_values(60, 115, 1),
+    "sbp": number_values(95, 185, 1),
+    "dbp": number_values(55, 110, 1),
+    "pulse": number_values(55, 110, 1),
+    "bmi_value": [""],  # แอปคำนวณ BMI จากน้ำหนัก/ส่วนสูงเอง
+    "urine_alb": ["negative", "trace", "1+", "2+", "3+"],
+    "urine_sugar": ["negative", "trace", "1+", "2+"],
+    "urine_rbc": ["0-1", "2-3", "3-5", "5-10", "10-20", "30-50", "numerous"],
+    "urine_wbc": ["0-1", "2-3", "3-5", "5-10", "10-20", "30-50", "numerous"],
+    "urine_summary": ["ปกติ", "ผิดปกติ"],
+    "stool_exam": ["ปกติ", "พบเม็ดเลือดแดง", "พบไข่พยาธิ"],
+    "stool_cs": ["ไม่พบเชื้อ", "พบเชื้อ Salmonella"],
+    "cbc_wbc": number_values(3000, 14000, 100),
+    "hb": number_values(9, 17, 0.1),
+    "plt": number_values(90000, 550000, 1000),
+    "alp": number_values(40, 160, 1),
+    "sgot": number_values(10, 70, 1),
+    "sgpt": number_values(10, 80, 1),
+    "uric": number_values(3, 10, 0.1),
+    "bun": number_values(5, 28, 1),
+    "cr": number_values(0.5, 1.6, 0.1),
+    "gfr": number_values(40, 125, 1),
+    "fbs": number_values(70, 160, 1),
+    "chol": number_values(140, 300, 1),
+    "tgl": number_values(50, 320, 1),
+    "hdl": number_values(28, 80, 1),
+    "ldl": number_values(70, 210, 1),
+    "cxr": ["ปกติ", "ปกติ", "ปกติ", "Mild cardiomegaly", "Old TB"],
+    "ekg": ["ปกติ", "ปกติ", "Sinus tachycardia", "LVH"],
+    "fvc": number_values(55, 115, 1),
+    "fev1": number_values(55, 115, 1),
+    "fev1_fvc": number_values(55, 95, 1),
+    "eye_normal": ["ปกติ"],
+    "eye_abnormal": ["ผิดปกติ"],
+    "eye_summary": ["การมองเห็นเหมาะสมกับลักษณะงาน", "ไม่สามารถสรุปได้", "การมองเห็นไม่เหมาะสมกับลักษณะงาน"],
+    "eye_advice": ["", "ควรพบจักษุแพทย์"],
+}
+HEARING_VALUES = number_values(0, 60, 5)
+for _ear in ("L", "R"):
+    for _freq in HEARING_FREQS:
+        VALUES[f"{_ear}{_freq}"] = HEARING_VALUES
+
+# กลุ่มการตรวจที่มักทำพร้อมกัน (ไม่ได้ตรวจ = ว่างทั้งกลุ่ม)
+GROUPS = {
+    "lung": ["fvc", "fev1", "fev1_fvc"],
+    "hearing": [f"{ear}{freq}" for ear in ("L", "R") for freq in HEARING_FREQS],
+    "eye": list(COALESCED_METRICS),
+}
+GROUP_RATE = 0.5
+
+
+def column_for(candidates, year, latest):
+    # ชื่อคอลัมน์ที่ใช้ในปีนั้น: ปีคี่ใช้ชื่อสำรอง (ถ้ามี) เพื่อให้ครอบคลุมทุกแบบที่แอปรองรับ
+    names = candidates(year, latest)
+    if not names:
+        return None
+    return names[year % len(names)]
+
+
+def sheet_layout(years=YEARS, latest=None):
+    # → หัวตาราง, [(คอลัมน์, metric, ปี)], [([คอลัมน์ที่เป็นไปได้], metric, ปี)], [คอลัมน์ baseline การได้ยิน]
+    header = ["เลขบัตรประชาชน", "HN", "ชื่อ-สกุล", "เพศ"]
+    single, coalesced = [], []
+    latest = latest or max(years)  # ปีล่าสุดไม่มีเลขท้าย (เหมือนชีตจริง)
+    for year in years:
+        for metric, candidates in METRICS.items():
+            name = column_for(candidates, year, latest)
+            if name is not None:
+                single.append((len(header), metric, year))
+                header.append(name)
+        for metric, candidates in COALESCED_METRICS.items():
+            names = candidates(year, latest)
+            coalesced.append((list(range(len(header), len(header) + len(names))), metric, year))
+            header.extend(names)
+    baseline = []
+    for ear in ("L", "R"):
+        for freq in HEARING_FREQS:
+            baseline.append(len(header))
+            header.append(f"{ear}{freq}B")
+    return header, single, coalesced, baseline
+
+
+class SyntheticSheet:
+    def __init__(self, n_rows, seed=0, years=YEARS, latest=None):
+        # latest = ปีล่าสุดของทั้งชุด (ใช้ตอนแบ่งปีเป็นหลายแผ่น เช่น แผ่น 2561–2564 ของชีตที่ล่าสุดคือ 2568)
+        self.n_rows = n_rows
+        self.seed = seed
+        self.years = list(years)
+        self.header, self._single, self._coalesced, self._baseline = sheet_layout(self.years, latest)
+        self._vocab = {m: np.array(v, dtype=object) for m, v in VALUES.items()}
+        self._block = (None, None)  # (เลข block, แถว) block ล่าสุดที่สร้าง
+
+    def __len__(self):
+        return self.n_rows
+
+    def rows(self, start=0, stop=None):
+        # แถวข้อมูล [start, stop) (ไม่รวมหัวตาราง) เป็น list ของ list ข้อความ เหมือน get_all_values()
+        stop = self.n_rows if stop is None else min(stop, self.n_rows)
+        out = []
+        for block in range(start // BLOCK_ROWS, (stop - 1) // BLOCK_ROWS + 1 if stop > start else 0):
+            rows = self._make_block(block)
+            first = block * BLOCK_ROWS
+            out.extend(rows[max(start - first, 0):stop - first])
+        return out
+
+    def _make_block(self, block):
+        if self._block[0] == block:
+            return self._block[1]
+        rng = np.random.default_rng((self.seed, block))
+        first = block * BLOCK_ROWS
+        n = min(BLOCK_ROWS, self.n_rows - first)
+        ids = np.arange(first, first + n)
+        cells = np.full((n, len(self.header)), "", dtype=object)
+
+        cells[:, 0] = [str(1100000000000 + i) for i in ids]
+        cells[:, 1] = [f"HN{i:07d}" for i in ids]
+        sex = rng.integers(0, 2, n)
+        title = np.where(sex == 0, 0, rng.integers(1, 3, n))
+        first_name = rng.integers(0, len(FIRST_NAMES), n)
+        last_name = rng.integers(0, len(LAST_NAMES), n)
+        cells[:, 2] = [
+            f"{TITLES[t]} {FIRST_NAMES[f]} {LAST_NAMES[l]}"
+            for t, f, l in zip(title, first_name, last_name)
+        ]
+        cells[:, 3] = np.where(sex == 0, "ชาย", "หญิง")
+
+        # ✅ มาตรวจ/ตรวจกลุ่มไหน สุ่มครั้งเดียวต่อ (คน, ปี) แล้วใช้ร่วมทุกคอลัมน์
+        attended = {y: rng.random(n) < ATTEND_RATE for y in self.years}
+        in_group = {(g, y): rng.random(n) < GROUP_RATE for g in GROUPS for y in self.years}
+        group_of = {m: g for g, metrics in GROUPS.items() for m in metrics}
+
+        def present(metric, year):
+            mask = attended[year] & (rng.random(n) < TESTED_RATE)
+            group = group_of.get(metric)
+            return mask & in_group[(group, year)] if group else mask
+
+        for col, metric, year in self._single:
+            vocab = self._vocab[metric]
+            mask = present(metric, year)
+            cells[mask, col] = vocab[rng.integers(0, len(vocab), mask.sum())]
+
+        for cols, metric, year in self._coalesced:
+            # ✅ กลุ่มคอลัมน์ตา: ใส่ค่าในคอลัมน์ใดคอลัมน์หนึ่ง (แอปใช้ค่าแรกที่ไม่ว่าง)
+            vocab = self._vocab[metric]
+            mask = present(metric, year)
+            rows = np.flatnonzero(mask)
+            picked = np.asarray(cols)[rng.integers(0, len(cols), len(rows))]
+            cells[rows, picked] = vocab[rng.integers(0, len(vocab), len(rows))]
+
+        has_baseline = rng.random(n) < BASELINE_RATE
+        baseline_values = np.array(HEARING_VALUES[:6], dtype=object)  # baseline มักปกติ (0–25 dB)
+        for col in self._baseline:
+            cells[has_baseline, col] = baseline_values[rng.integers(0, len(baseline_values), has_baseline.sum())]
+
+        rows = cells.tolist()
+        self._block = (block, rows)
+        return rows
+
+    def records(self):
+        # เหมือน get_all_records() (ยังไม่แปลงตัวเลข)
+        return [dict(zip(self.header, row)) for row in self.rows()]
+
+    def write_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            for start in range(0, self.n_rows, BLOCK_ROWS):
+                writer.writerows(self.rows(start, start + BLOCK_ROWS))
+        return path
+
+
+# ===============================
+# FAKE GSPREAD (ใช้แทน client / worksheet จริง)
+# ===============================
+class FakeWorksheet:
+    def __init__(self, sheet, latency=0.0, title="Sheet1"):
+        self.sheet = sheet
+        self.latency = latency  # วินาทีต่อคำขอ (จำลองเวลาเครือข่าย)
+        self.title = title
+        self.requests = 0
+
+    @property
+    def row_count(self):
+        return len(self.sheet) + 1
+
+    @property
+    def col_count(self):
+        return len(self.sheet.header)
+
+    def _request(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _range(self, spec):
+        # "2:1001" (เลขแถวในชีต เริ่มที่ 1 = หัวตาราง)
+        start, stop = (int(v) for v in spec.split(":"))
+        rows = [self.sheet.header] if start == 1 else []
+        rows.extend(self.sheet.rows(max(start, 2) - 2, stop - 1))
+        return rows
+
+    def batch_get(self, ranges, **kwargs):
+        self._request()
+        return [self._range(spec) for spec in ranges]
+
+    def get_all_values(self, **kwargs):
+        self._request()
+        return [self.sheet.header] + self.sheet.rows()
+
+    def get_all_records(self, **kwargs):
+        self._request()
+        return self.sheet.records()
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets):
+        self._worksheets = worksheets
+
+    @property
+    def sheet1(self):
+        return self._worksheets[0]
+
+    def worksheets(self):
+        return list(self._worksheets)
+
+    def worksheet(self, title):
+        for ws in self._worksheets:
+            if ws.title == title:
+                return ws
+        raise KeyError(title)
+
+    def get_worksheet(self, index):
+        return self._worksheets[index] if 0 <= index < len(self._worksheets) else None
+
+
+class FakeClient:
+    def __init__(self, *worksheets, spreadsheets=None):
+        # spreadsheets = {url: [worksheet, ...]} สำหรับหลายไฟล์ (url อื่น → ไฟล์จาก worksheets)
+        self.spreadsheet = FakeSpreadsheet(list(worksheets))
+        self.spreadsheets = {url: FakeSpreadsheet(list(ws)) for url, ws in (spreadsheets or {}).items()}
+
+    def open_by_url(self, url):
+        return self.spreadsheets.get(url, self.spreadsheet)
+
+    def open_by_key(self, key):
+        return self.spreadsheets.get(key, self.spreadsheet)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างไฟล์ชีตปลอม (CSV) ที่มีหัวตารางเหมือนชีตจริง")
+    parser.add_argument("rows", type=int, help="จำนวนคน")
+    parser.add_argument("--out", default="synthetic_sheet.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    sheet = SyntheticSheet(args.rows, seed=args.seed)
+    sheet.write_csv(args.out)
+    print(f"✅ {args.rows:,} แถว × {len(sheet.header)} คอลัมน์ → {args.out} ({time.perf_counter() - start:.1f} วินาที)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
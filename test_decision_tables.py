@@ -0,0 +1,243 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+
+import interpret
+from decision_tables import RULES, RuleBook
+from sheet_sync import SheetSync
+from snapshot import Snapshot
+from synthetic_sheet import FakeWorksheet, SyntheticSheet
+
+# ===============================
+# DECISION TABLES (advice_rules.json ต้องให้ผลเดียวกับกฎ if/elif เดิม)
+# ===============================
+# python -m pytest -q test_decision_tables.py
+# เทียบทุกชุดค่าใน vocab (+ ค่านอก vocab) กับฟังก์ชันอ้างอิงด้านล่าง, ตารางที่ compile แล้วกับการประเมินกฎตรง ๆ
+# และการโหลดไฟล์กฎใหม่ระหว่างทำงาน
+
+ROWS = 400
+
+# ค่าปัสสาวะดิบที่ใช้ทดสอบ advice_urine (ครบทุกผลแปลของ interpret_alb / sugar / rbc / urine_wbc)
+URINE_RAW = ["", "negative", "Negative", "trace", "1+", "2+", "3+", "4+", "0-1", "3-5", "5-10", "10-20", ">100"]
+OUTSIDE_VOCAB = "ไม่อยู่ใน vocab"
+
+
+# ===============================
+# REFERENCE: กฎ if/elif เดิม (ก่อนย้ายไป advice_rules.json) ใช้เทียบกับตารางกฎ
+# ===============================
+def summarize_urine_reference(*results):
+    if all(
+        r in ["-", "ปกติ", "ไม่พบ", "พบโปรตีนในปัสสาวะเล็กน้อย", "พบน้ำตาลในปัสสาวะเล็กน้อย"]
+        for r in results
+    ):
+        return "ปกติ"
+    if any("พบ" in r and "เล็กน้อย" not in r for r in results):
+        return "ผิดปกติ"
+    if any("เม็ดเลือดแดง" in r or "เม็ดเลือดขาว" in r for r in results if "ปกติ" not in r):
+        return "ผิดปกติ"
+    return "-"
+
+
+def advice_urine_reference(sex, alb, sugar, rbc, wbc):
+    alb_text = interpret.interpret_alb(alb)
+    sugar_text = interpret.interpret_sugar(sugar)
+    rbc_text = interpret.interpret_rbc(rbc)
+    wbc_text = interpret.interpret_urine_wbc(wbc)
+
+    if all(x in ["-", "ปกติ", "ไม่พบ", "พบโปรตีนในปัสสาวะเล็กน้อย", "พบน้ำตาลในปัสสาวะเล็กน้อย"]
+           for x in [alb_text, sugar_text, rbc_text, wbc_text]):
+        return "ผลปัสสาวะอยู่ในเกณฑ์ปกติ ควรรักษาสุขภาพและตรวจประจำปีสม่ำเสมอ"
+
+    if "พบน้ำตาลในปัสสาวะ" in sugar_text and "เล็กน้อย" not in sugar_text:
+        return "ควรลดการบริโภคน้ำตาล และตรวจระดับน้ำตาลในเลือดเพิ่มเติม"
+
+    if sex == "หญิง" and "พบเม็ดเลือดแดง" in rbc_text and "ปกติ" in wbc_text:
+        return "อาจมีปนเปื้อนจากประจำเดือน แนะนำให้ตรวจซ้ำ"
+
+    if sex == "ชาย" and "พบเม็ดเลือดแดง" in rbc_text and "ปกติ" in wbc_text:
+        return "พบเม็ดเลือดแดงในปัสสาวะ ควรตรวจทางเดินปัสสาวะเพิ่มเติม"
+
+    if "พบเม็ดเลือดขาวในปัสสาวะ" in wbc_text and "เล็กน้อย" not in wbc_text:
+        return "อาจมีการอักเสบของระบบทางเดินปัสสาวะ แนะนำให้ตรวจซ้ำ"
+
+    return "ควรตรวจปัสสาวะซ้ำเพื่อติดตามผล"
+
+
+# 🩸 ข้อความคำแนะนำ CBC แบบกระชับ
+CBC_MESSAGES = {
+    2:  "ดูแลสุขภาพ ออกกำลังกาย ทานอาหารมีประโยชน์ ติดตามผลเลือดสม่ำเสมอ",
+    4:  "ควรพบแพทย์เพื่อตรวจหาสาเหตุเกล็ดเลือดต่ำ และเฝ้าระวังอาการผิดปกติ",
+    6:  "ควรตรวจซ้ำเพื่อติดตามเม็ดเลือดขาว และดูแลสุขภาพร่างกายให้แข็งแรง",
+    8:  "ควรพบแพทย์เพื่อตรวจหาสาเหตุภาวะโลหิตจาง และรักษาตามนัด",
+    9:  "ควรพบแพทย์เพื่อตรวจหาและติดตามภาวะโลหิตจางร่วมกับเม็ดเลือดขาวผิดปกติ",
+    10: "ควรพบแพทย์เพื่อตรวจหาสาเหตุเกล็ดเลือดสูง และพิจารณาการรักษา",
+    13: "ควรดูแลสุขภาพ ติดตามภาวะโลหิตจางและเม็ดเลือดขาวผิดปกติอย่างใกล้ชิด",
+}
+
+
+# 🩸 ฟังก์ชันให้คำแนะนำ CBC (ตามสูตร Excel)
+def cbc_advice_reference(hb_result, wbc_result, plt_result):
+    if all(x in ["", "-", None] for x in [hb_result, wbc_result, plt_result]):
+        return "-"
+
+    hb = hb_result.strip()
+    wbc = wbc_result.strip()
+    plt = plt_result.strip()
+
+    # ✅ Plt ต่ำต้องตรวจสอบก่อน เพราะสูตร Excel ให้ความสำคัญเป็นพิเศษ
+    if plt in ["ต่ำกว่าเกณฑ์", "ต่ำกว่าเกณฑ์เล็กน้อย"]:
+        return CBC_MESSAGES[4]
+
+    if hb == "ปกติ" and wbc == "ปกติ" and plt == "ปกติ":
+        return ""
+
+    if hb == "พบภาวะโลหิตจาง" and wbc == "ปกติ" and plt == "ปกติ":
+        return CBC_MESSAGES[8]
+
+    if hb == "พบภาวะโลหิตจาง" and wbc in [
+        "ต่ำกว่าเกณฑ์",
+        "ต่ำกว่าเกณฑ์เล็กน้อย",
+        "สูงกว่าเกณฑ์เล็กน้อย",
+        "สูงกว่าเกณฑ์"
+    ]:
+        return CBC_MESSAGES[9]
+
+    if hb == "พบภาวะโลหิตจางเล็กน้อย" and wbc == "ปกติ" and plt == "ปกติ":
+        return CBC_MESSAGES[2]
+
+    if hb == "ปกติ" and wbc in [
+        "ต่ำกว่าเกณฑ์",
+        "ต่ำกว่าเกณฑ์เล็กน้อย",
+        "สูงกว่าเกณฑ์เล็กน้อย",
+        "สูงกว่าเกณฑ์"
+    ]:
+        return CBC_MESSAGES[6]
+
+    if plt == "สูงกว่าเกณฑ์":
+        return CBC_MESSAGES[10]
+
+    if hb == "พบภาวะโลหิตจางเล็กน้อย" and \
+       wbc in [
+           "ต่ำกว่าเกณฑ์",
+           "ต่ำกว่าเกณฑ์เล็กน้อย",
+           "สูงกว่าเกณฑ์เล็กน้อย",
+           "สูงกว่าเกณฑ์"
+       ] and plt == "ปกติ":
+        return CBC_MESSAGES[13]
+
+    return "ควรพบแพทย์เพื่อตรวจเพิ่มเติม"
+
+
+def liver_advice_reference(summary_text):
+    if summary_text == "การทำงานของตับสูงกว่าเกณฑ์ปกติเล็กน้อย":
+        return "ควรลดอาหารไขมันสูงและตรวจติดตามการทำงานของตับซ้ำ"
+    elif summary_text == "ปกติ":
+        return ""
+    return "-"
+
+
+def lung_advice_reference(summary_text):
+    if summary_text == "สมรรถภาพปอดปกติ":
+        return "ควรออกกำลังกายสม่ำเสมอเพื่อรักษาปอดให้แข็งแรง"
+    elif "ปอดจำกัดการขยายตัว" in summary_text or "หลอดลมอุดกั้น" in summary_text or "Mixed" in summary_text:
+        return "ควรเพิ่มสมรรถภาพปอดด้วยการออกกำลังกาย หลีกเลี่ยงควัน ฝุ่น และพบแพทย์หากมีอาการ"
+    elif summary_text == "สรุปไม่ได้":
+        return "ไม่สามารถสรุปผลได้ อาจเกิดจากข้อมูลไม่ครบ ควรตรวจซ้ำ"
+    return "-"
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return Snapshot(SheetSync().sync(FakeWorksheet(SyntheticSheet(ROWS))).df)
+
+
+def test_engine_advice_matches_scalar_functions(snapshot):
+    # lookup ทั้ง array (decision_tables) ตรงกับการเรียกฟังก์ชันใน interpret.py ทีละช่อง
+    v = snapshot.year_data.values
+    sex = snapshot.df["เพศ"].astype(object).to_numpy()
+    for p in range(len(snapshot)):
+        for i in range(len(snapshot.year_data.years)):
+            assert v["cbc_advice"][p, i] == interpret.cbc_advice(v["hb_label"][p, i], v["cbc_wbc_label"][p, i], v["plt_label"][p, i])
+            assert v["liver_advice"][p, i] == interpret.liver_advice(v["liver_summary"][p, i])
+            assert v["lung_advice"][p, i] == interpret.lung_advice(v["lung_summary"][p, i])
+            raw = [v[m][p, i] for m in ("urine_alb", "urine_sugar", "urine_rbc", "urine_wbc")]
+            if any(raw):
+                assert v["urine_advice"][p, i] == interpret.advice_urine(sex[p], *raw)
+
+
+REFERENCES = {
+    "cbc_advice": cbc_advice_reference,
+    "summarize_urine": summarize_urine_reference,
+    "liver_advice": liver_advice_reference,
+    "lung_advice": lung_advice_reference,
+}
+
+
+@pytest.mark.parametrize("name", list(REFERENCES))
+def test_advice_tables_match_original_rules(name):
+    # ทุกชุดค่าใน vocab (+ ค่านอก vocab) ให้ผลเดียวกับกฎ if/elif เดิม
+    domains = [vocab + [OUTSIDE_VOCAB] for vocab in RULES.tables[name].vocab]
+    for args in itertools.product(*domains):
+        assert getattr(interpret, name)(*args) == REFERENCES[name](*args), args
+
+
+def test_advice_urine_matches_original_rules():
+    for args in itertools.product(["ชาย", "หญิง", ""], URINE_RAW, URINE_RAW, URINE_RAW, URINE_RAW):
+        assert interpret.advice_urine(*args) == advice_urine_reference(*args), args
+
+
+@pytest.mark.parametrize("name", list(RULES.tables))
+def test_compiled_table_matches_rule_evaluation(name):
+    table = RULES.tables[name]
+    values = [vocab + [OUTSIDE_VOCAB] for vocab in table.vocab]
+    grids = np.meshgrid(*[np.array(v, dtype=object) for v in values], indexing="ij")
+    got = table.lookup(*grids)
+    for index in np.ndindex(got.shape):
+        assert got[index] == table._match([grid[index] for grid in grids])[1]
+
+
+def _write(path, text, version):
+    # กำหนดเวลาแก้ไฟล์เอง (เขียนติดกันเร็ว ๆ บางระบบไฟล์ได้ mtime เท่าเดิม)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(version * 10**9, version * 10**9))
+
+
+def test_rulebook_reloads_and_keeps_old_rules_on_error(tmp_path):
+    path = tmp_path / "rules.json"
+    specs = json.loads(open(RULES.path, encoding="utf-8").read())
+    _write(path, json.dumps(specs, ensure_ascii=False), 1)
+    book = RuleBook(str(path), check_every=0)
+    assert book.table("liver_advice")("ปกติ") == ""
+
+    specs["liver_advice"]["rules"][1]["then"] = "ตับปกติ"
+    _write(path, json.dumps(specs, ensure_ascii=False), 2)
+    assert book.table("liver_advice")("ปกติ") == "ตับปกติ"
+
+    _write(path, "{", 3)
+    assert book.table("liver_advice")("ปกติ") == "ตับปกติ"
+    assert book.last_error is not None
+
+
+def test_rulebook_version_follows_file_content(tmp_path):
+    # รุ่นกฎ (ใช้ในคีย์ report_cache / fingerprint ของ batch_report) เปลี่ยนตามเนื้อหาไฟล์ ไม่ใช่เวลาแก้ไฟล์
+    path = tmp_path / "rules.json"
+    text = open(RULES.path, encoding="utf-8").read()
+    _write(path, text, 1)
+    book = RuleBook(str(path), check_every=0)
+    version = book.current_version()
+
+    _write(path, text, 2)
+    assert book.current_version() == version
+
+    specs = json.loads(text)
+    specs["liver_advice"]["rules"][1]["then"] = "ตับปกติ"
+    _write(path, json.dumps(specs, ensure_ascii=False), 3)
+    assert book.current_version() != version
+
+
+def test_snapshot_records_rules_version(snapshot):
+    assert snapshot.year_data.rules_version == RULES.version
+    assert snapshot.year_data.person(0).rules_version == RULES.version
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import interpret_engine
+from health_data import YearData
+from hearing_screen import check_parity as hearing_parity
+from lung_screen import check_parity as lung_parity
+from sheet_sync import SheetSync
+from snapshot import Snapshot
+from synthetic_sheet import FakeWorksheet, SyntheticSheet
+
+# ===============================
+# PARITY (ผลแบบ batch ต้องตรงกับฟังก์ชันทีละค่าใน interpret.py / report.py)
+# ===============================
+# python -m pytest -q
+# ทดสอบชุดเดียวกับ --check ของแต่ละ CLI บนข้อมูลสังเคราะห์ (SyntheticSheet)
+
+ROWS = 400
+LABEL_COLUMNS = [
+    "bmi_label", "bp_label", "urine_result", "urine_advice", "cbc_advice", "liver_summary", "liver_advice",
+    "lipid_summary", "lung_summary", "lung_advice", "eye_summary_short", "eye_advice_short",
+]
+
+# ค่าที่กรอกผิด / ว่าง / ศูนย์ ที่พบในชีตจริง แทนลงในทุกคอลัมน์ผลตรวจทุก JUNK_EVERY แถว
+JUNK = ["0", "", "abc", " 0 ", "-", "0.0", " ", "N/A"]
+JUNK_EVERY = 3
+
+
+@pytest.fixture(scope="module")
+def df():
+    return SheetSync().sync(FakeWorksheet(SyntheticSheet(ROWS))).df
+
+
+@pytest.fixture(scope="module")
+def snapshot(df):
+    return Snapshot(df)
+
+
+@pytest.fixture(scope="module")
+def junk_df(df):
+    # ข้อมูลชุดเดียวกัน แต่บางช่องเป็น 0 / ว่าง / ไม่ใช่ตัวเลข (คอลัมน์ถัดจาก เพศ = ผลตรวจรายปี)
+    out = df.copy()
+    start = out.columns.get_loc("เพศ") + 1
+    for c, column in enumerate(out.columns[start:]):
+        values = out[column].to_numpy(dtype=object, copy=True)
+        for row in range(0, len(values), JUNK_EVERY):
+            values[row] = JUNK[(row + c) % len(JUNK)]
+        out[column] = values
+    return out
+
+
+@pytest.fixture(scope="module")
+def junk_snapshot(junk_df):
+    return Snapshot(junk_df)
+
+
+def test_interpret_engine_matches_scalar_rules(df):
+    assert interpret_engine.check_parity(df) == []
+
+
+def test_hearing_screen_matches_report(snapshot):
+    assert hearing_parity(snapshot) == []
+
+
+def test_lung_screen_matches_interpret_lung(snapshot):
+    assert lung_parity(snapshot) == []
+
+
+def test_compacted_snapshot_keeps_values(df, snapshot):
+    # CodedArray (dictionary encoding) ใน snapshot ต้องอ่านได้ค่าเดิมทุกช่อง
+    year_data = YearData(df)
+    interpret_engine.interpret_all(year_data, df["เพศ"])
+    for column in LABEL_COLUMNS:
+        want = np.asarray(year_data.values[column], dtype=object)
+        got = np.asarray(snapshot.year_data.values[column], dtype=object)
+        assert (got == want).all(), column
+
+
+def test_interpret_engine_matches_scalar_rules_on_junk_cells(junk_df):
+    assert interpret_engine.check_parity(junk_df) == []
+
+
+def test_hearing_screen_matches_report_on_junk_cells(junk_snapshot):
+    assert hearing_parity(junk_snapshot) == []
+
+
+def test_lung_screen_matches_interpret_lung_on_junk_cells(junk_snapshot):
+    assert lung_parity(junk_snapshot) == []
@@ -0,0 +1,171 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===============================
+# TIMING (เวลาแต่ละขั้น: โหลดชีต / ค้นหา / แต่ละส่วนแสดงผล)
+# ===============================
+# with timed("search"): ...
+#
+# - เก็บเป็น histogram ต่อขั้น (นับจำนวนครั้งในแต่ละช่วงเวลา) ไม่เก็บทุกค่า → ใช้หน่วยความจำคงที่
+#   ต้นทุนต่อครั้ง = perf_counter 2 ครั้ง + bisect + lock (ไม่กี่ไมโครวินาที) เปิดไว้ตลอดได้
+# - ดูได้ 3 ทาง: หน้า admin ในแอป, log แบบ JSON บรรทัดละ 1 ครั้ง (logger "health_report.timing"),
+#   และ http://localhost:<port>/metrics (รูปแบบ Prometheus) / /metrics.json
+# - ใช้ร่วมกันทั้ง process (ทุก session / thread โหลดข้อมูลเบื้องหลัง)
+
+# ขอบบนของแต่ละช่วง (มิลลิวินาที) ช่วงสุดท้าย = มากกว่า 30 วินาที
+BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+logger = logging.getLogger("health_report.timing")
+
+
+class StageHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q):
+        # ค่าประมาณจาก histogram = ขอบบนของช่วงที่มีลำดับที่ q (ช่วงสุดท้ายใช้ค่าสูงสุดที่เคยพบ)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+        }
+
+
+class StageTimings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}  # ชื่อขั้น → StageHistogram
+        self.started_at = time.time()
+
+    def record(self, stage, seconds, **fields):
+        ms = seconds * 1000
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram()
+            histogram.add(ms)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"ts": round(time.time(), 3), "stage": stage, "ms": round(ms, 3), **fields}, ensure_ascii=False))
+
+    @contextmanager
+    def timed(self, stage, **fields):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, **fields)
+
+    def summary(self):
+        with self._lock:
+            return {stage: h.summary() for stage, h in sorted(self._stages.items())}
+
+    def histograms(self):
+        # ชื่อขั้น → [(ขอบบน ms, จำนวนครั้ง)] (ขอบบน None = มากกว่าช่วงสุดท้าย)
+        with self._lock:
+            edges = BUCKETS_MS + [None]
+            return {stage: list(zip(edges, h.counts)) for stage, h in sorted(self._stages.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self.started_at = time.time()
+
+    def prometheus(self):
+        lines = [
+            "# HELP health_report_stage_seconds Time spent per stage",
+            "# TYPE health_report_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._stages.items()):
+                label = stage.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for edge, n in zip(BUCKETS_MS, h.counts):
+                    cumulative += n
+                    lines.append(f'health_report_stage_seconds_bucket{{stage="{label}",le="{edge / 1000:g}"}} {cumulative}')
+                lines.append(f'health_report_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'health_report_stage_seconds_sum{{stage="{label}"}} {h.total_ms / 1000:.6f}')
+                lines.append(f'health_report_stage_seconds_count{{stage="{label}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+
+# ✅ ตัวเก็บเวลากลางของ process
+stages = StageTimings()
+timed = stages.timed
+record = stages.record
+
+
+# ===============================
+# LOG / METRICS ENDPOINT
+# ===============================
+def log_to_file(path):
+    # log JSON บรรทัดละ 1 ครั้ง (เรียกซ้ำได้ ไม่เพิ่ม handler ซ้ำ)
+    path = os.path.abspath(path)
+    for handler in logger.handlers:
+        if getattr(handler, "baseFilename", None) == path:
+            return handler
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = stages.prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(stages.summary(), ensure_ascii=False), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # ไม่พิมพ์ทุกคำขอ
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    # ✅ เปิดเฉพาะในเครื่อง (localhost) ใน thread เบื้องหลัง
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True)
+    thread.start()
+    return server